@@ -0,0 +1,54 @@
+# Description: measure the time of a match with the debug logs off, with the debug logs on
+# and with the debug logs on in the old way (each record is formatted immediately and added to a string)
+# each match is run in a new process because the player bots keep module-level state
+# run it from the Kernel-faster-for-python directory: python benchmarks/bench_debug_log.py
+
+import json
+import subprocess
+import sys
+import match
+
+
+class StringDebugLog:
+    # the debug logs before the DebugLog buffer: formatted immediately and concatenated to a string
+    def __init__(self, levels):
+        self.levels = levels
+        self.text = ""
+
+    def enabled(self, category, level=1):
+        return level <= self.levels[category]
+
+    def log(self, category, level, text, *args):
+        if level > self.levels[category]:
+            return
+        self.text += (text.format(*args) if args else text) + "\n"
+
+    def flush(self):
+        with open("debug.txt", "w") as debug_log_file:
+            debug_log_file.write(self.text)
+
+
+def use_string_debug_log(main_game):
+    main_game.debug_log = StringDebugLog(main_game.debug_log.levels)
+
+
+MODES = {
+    'debug off': ({'debug': False}, None),
+    'debug on (string)': ({'debug': True, 'debug_dice': True}, use_string_debug_log),
+    'debug on (buffer)': ({'debug': True, 'debug_dice': True}, None),
+    'turns only, no nodes and dice': ({'debug': True, 'debug_dice': False, 'debug_levels': {'turns': 1}}, None),
+}
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 3 and sys.argv[1] == '--child':
+        config, game_hook = MODES[sys.argv[2]]
+        main_game, match_time = match.run_match('map1.json', 1, game_hook, **config)
+        print(json.dumps(match_time))
+        sys.exit()
+
+    repeat = 7
+    for mode in MODES:
+        times = [json.loads(subprocess.run([sys.executable, __file__, '--child', mode], capture_output=True, text=True,
+                                           check=True).stdout) for _ in range(repeat)]
+        print(f"{mode:30}  match: {min(times) * 1e3:8.2f} ms (min of {repeat})")
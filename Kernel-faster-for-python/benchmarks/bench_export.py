@@ -0,0 +1,27 @@
+# Description: measure the time and the peak memory of exporting logs as columnar tables
+# the peak memory should stay about the same when the number of games grows
+# run it from the Kernel-faster-for-python directory: python benchmarks/bench_export.py
+
+import os
+import tempfile
+import time
+import tracemalloc
+import match
+from src.tools.export import export, pa
+
+
+if __name__ == '__main__':
+    file_format = 'parquet' if pa is not None else 'npz'
+    for number_of_games in [100, 400, 1600]:
+        with tempfile.TemporaryDirectory() as path:
+            logs_path = match.make_logs(path, number_of_games)
+            output_path = os.path.join(path, 'export')
+            tracemalloc.start()
+            start = time.perf_counter()
+            export(logs_path, output_path, file_format)
+            spent = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            size = sum(os.path.getsize(os.path.join(output_path, name)) for name in os.listdir(output_path))
+            print(f"{number_of_games:5} games ({file_format})  export: {spent:6.2f} s  peak memory: {peak / 2**20:6.2f} MB"
+                  f"  output: {size / 2**20:6.2f} MB")
@@ -0,0 +1,68 @@
+# Description: the time of loading generated maps (src/tools/map_generator.py) with src/tools/map_loader.py
+# for each size: the read_map before the loader (json and appending each edge to the lists of its nodes, without checks),
+# the parse of the json, the checks and the CSR of load_map, read_map of the json map and of its npz version
+# run it from the Kernel-faster-for-python directory: python benchmarks/bench_map_loader.py [--sizes 10000,100000,1000000]
+
+import argparse
+import json
+import os
+import tempfile
+import time
+# match adds the kernel path address to sys.path for the src imports below
+import match  # noqa: F401
+from src.components.game import Game
+from src.components.node import Node
+from src.tools.map_generator import generate_map, save_map
+from src.tools.map_loader import load_map, validate_map
+
+
+def old_read_map(map_file):
+    # the read_map of the kernel before the loader
+    nodes = {}
+    with open(map_file, 'r') as json_file:
+        json_py = json.load(json_file)
+    for id in range(json_py["number_of_nodes"]):
+        nodes[id] = Node(id)
+    for edge in json_py["list_of_edges"]:
+        nodes[edge[0]].adj_main_map.append(nodes[edge[1]])
+        nodes[edge[1]].adj_main_map.append(nodes[edge[0]])
+    for id, score in zip(json_py["strategic_nodes"], json_py["scores_of_strategic_nodes"]):
+        nodes[id].is_strategic = True
+        nodes[id].score_of_strategic = score
+    return nodes
+
+
+def timed(func, repeat):
+    # the best time of repeat calls
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='the time of loading large maps')
+    parser.add_argument('--sizes', type=str, default='10000,100000,1000000', help='the numbers of nodes, separated by commas')
+    parser.add_argument('--topology', type=str, default='planar', help='the topology of src/tools/map_generator.py')
+    parser.add_argument('--repeat', type=int, default=3, help='the best of repeat calls is reported')
+    args = parser.parse_args()
+
+    print(f"{'nodes':>9}{'json MB':>9}{'npz MB':>8}{'old read_map':>14}{'json parse':>12}{'checks+CSR':>12}{'read_map json':>15}{'read_map npz':>14}")
+    with tempfile.TemporaryDirectory() as temporary_path:
+        for number_of_nodes in [int(size) for size in args.sizes.split(',')]:
+            json_file = os.path.join(temporary_path, f'{args.topology}{number_of_nodes}.json')
+            npz_file = json_file[:-len('.json')] + '.npz'
+            save_map(generate_map(number_of_nodes, args.topology), json_file)
+            load_map(json_file).save(npz_file)
+            with open(json_file) as map_file:
+                map_json = json.load(map_file)
+
+            times = [timed(lambda: old_read_map(json_file), args.repeat),
+                     timed(lambda: json.load(open(json_file)), args.repeat),
+                     timed(lambda: validate_map(map_json, json_file), args.repeat),
+                     timed(lambda: Game().read_map(json_file), args.repeat),
+                     timed(lambda: Game().read_map(npz_file), args.repeat)]
+            print(f"{number_of_nodes:9}{os.path.getsize(json_file) / 2 ** 20:9.1f}{os.path.getsize(npz_file) / 2 ** 20:8.1f}"
+                  + ''.join(f'{seconds * 1000:{width}.1f}' for seconds, width in zip(times, [11, 9, 9, 12, 11])) + '  (ms)', flush=True)
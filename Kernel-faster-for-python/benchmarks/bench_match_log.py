@@ -0,0 +1,51 @@
+# Description: measure the size of the streaming log of a match with a keyframe in each turn
+# and with keyframes every log_keyframe_interval turns (the other turns only have the changed nodes),
+# the time to read a random turn with MatchLogReader and check that all the logs give the same turns
+# run it from the Kernel-faster-for-python directory: python benchmarks/bench_match_log.py
+
+import glob
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import match
+
+
+INTERVALS = [0, 5, 10, 20]
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 4 and sys.argv[1] == '--child':
+        match.run_match('map1.json', 1, log_path=sys.argv[3], debug=False, streaming_log=True,
+                        log_keyframe_interval=int(sys.argv[2]))
+        sys.exit()
+
+    from src.tools.match_log import load_match_log, MatchLogReader
+
+    logs = {}
+    with tempfile.TemporaryDirectory() as path:
+        for interval in INTERVALS:
+            log_path = os.path.join(path, str(interval))
+            os.makedirs(log_path)
+            subprocess.run([sys.executable, __file__, '--child', str(interval), log_path], check=True)
+            log_file = glob.glob(os.path.join(log_path, 'log', '*.jsonl'))[0]
+            log = load_match_log(log_file)
+
+            reader = MatchLogReader(log_file)
+            turn_numbers = reader.turn_numbers()
+            rng = random.Random(0)
+            samples = [rng.choice(turn_numbers) for _ in range(500)]
+            start = time.perf_counter()
+            for turn_number in samples:
+                turn = reader.get_turn(turn_number)
+            read_time = (time.perf_counter() - start) / len(samples)
+            same = all(reader.get_turn(number) == log['turns']['turn' + str(number)] for number in turn_numbers)
+            reader.close()
+
+            logs[interval] = log
+            print(f"log_keyframe_interval={interval:3}  size: {os.path.getsize(log_file):8} bytes"
+                  f"  random turn: {read_time * 1e6:8.1f} us  reader matches loader: {same}")
+
+    print('all the intervals give the same log:', all(logs[interval] == logs[0] for interval in INTERVALS))
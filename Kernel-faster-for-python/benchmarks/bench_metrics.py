@@ -0,0 +1,36 @@
+# Description: measure the cost of the API metrics: the time of a call of ClientGame with and without the metrics
+# (get_state and get_player_id are the cheapest APIs, so the cost of the metrics is the most visible)
+# and the time of a match with and without the metrics
+# each match is run in a new process because the player bots keep module-level state
+# run it from the Kernel-faster-for-python directory: python benchmarks/bench_metrics.py
+
+import json
+import subprocess
+import sys
+import timeit
+import match
+
+
+def call_times(main_game, metrics, number=200000):
+    # the time of a call of the cheap APIs on the game at the end of a match
+    from src.components.client_game import ClientGame
+    main_game.config['metrics'] = metrics
+    client_game = ClientGame(main_game)
+    return {api: min(timeit.repeat(getattr(client_game, api), number=number, repeat=5)) / number
+            for api in ['get_state', 'get_player_id']}
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 3 and sys.argv[1] == '--child':
+        metrics = json.loads(sys.argv[2])
+        main_game, match_time = match.run_match('map1.json', 1, debug=False, metrics=metrics)
+        print(json.dumps([match_time, call_times(main_game, metrics)]))
+        sys.exit()
+
+    repeat = 5
+    for metrics in [False, True]:
+        results = [json.loads(subprocess.run([sys.executable, __file__, '--child', json.dumps(metrics)], capture_output=True,
+                                             text=True, check=True).stdout) for _ in range(repeat)]
+        match_time = min(result[0] for result in results)
+        calls = '  '.join(f"{api}: {min(result[1][api] for result in results) * 1e6:5.2f} us" for api in results[0][1])
+        print(f"metrics={metrics!s:5}  match: {match_time * 1e3:7.2f} ms  {calls}  (min of {repeat})")
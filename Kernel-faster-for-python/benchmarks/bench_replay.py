@@ -0,0 +1,68 @@
+# Description: measure the time and the peak memory of the strategic nodes query over many logs
+# with the replay index (memory-mapped logs, one game at a time) and with loading all the json logs
+# the logs are copies of the logs of a few matches (json logs and streaming logs)
+# run it from the Kernel-faster-for-python directory: python benchmarks/bench_replay.py [number of games]
+
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import match
+from src.tools.replay import ReplayIndex, per_turn
+from src.tools.match_log import load_match_log
+
+
+def load_all(path):
+    # the old way: load the whole logs and keep them in the memory
+    logs = []
+    for name in sorted(os.listdir(path)):
+        game_path = os.path.join(path, name)
+        logs.append(load_match_log(game_path) if name.endswith('.jsonl') else json.load(open(game_path)))
+    return logs
+
+
+def measure(func):
+    # the time is measured without tracemalloc because it slows down the allocations
+    start = time.perf_counter()
+    func()
+    spent = time.perf_counter() - start
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return spent, peak
+
+
+if __name__ == '__main__':
+    number_of_games = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    with open(os.path.join(match.file_path, 'maps', 'map1.json')) as map_file:
+        strategic_nodes = np.array(json.load(map_file)['strategic_nodes'])
+
+    with tempfile.TemporaryDirectory() as path:
+        logs_path = match.make_logs(path, number_of_games)
+
+        def replay_query():
+            with contextlib.redirect_stdout(io.StringIO()) as output:
+                per_turn(ReplayIndex(logs_path), lambda owners, troops, forts, player_id: np.count_nonzero(owners[strategic_nodes] == player_id))
+            return output.getvalue()
+
+        def load_all_query():
+            logs = load_all(logs_path)
+            sums = {}
+            for log in logs:
+                for name, turn in log['turns'].items():
+                    owners = np.array(turn['nodes_owner'])[strategic_nodes]
+                    sums.setdefault(name, np.zeros(3))
+                    sums[name] += [np.count_nonzero(owners == player_id) for player_id in range(3)]
+            return sums
+
+        replay_time, replay_peak = measure(replay_query)
+        load_time, load_peak = measure(load_all_query)
+        print(f"{number_of_games} games")
+        print(f"replay index:  {replay_time:6.2f} s  peak memory: {replay_peak / 2**20:8.2f} MB")
+        print(f"load all json: {load_time:6.2f} s  peak memory: {load_peak / 2**20:8.2f} MB")
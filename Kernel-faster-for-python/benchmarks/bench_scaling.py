@@ -0,0 +1,178 @@
+# Description: the time and the memory of the kernel on generated maps of growing size (src/tools/map_generator.py)
+# for each topology and size: read_map, the read APIs, find_path and find_reachable, attack and full matches of the bots
+# the nodes are owned by the three players in three blocks of ids (like the end of the initialize phase),
+# find_path goes between the first and the last node of the block of player 0 and find_reachable starts from the first one
+# the memory is the peak of the python allocations of the step (tracemalloc), it's measured in another run because tracemalloc
+# slows the code, the memory of a match is the maximum resident size of its process
+# the matches are played by the root bot (main.py of the repository, its errors don't stop the match) in new processes
+# (the bots keep module-level state), only on the maps up to --match-size nodes because the bot is slow on the large maps
+# the growth of a step is the slope of log(time) over log(number of nodes): 1 is linear, 0 doesn't depend on the size
+# run it from the Kernel-faster-for-python directory:
+# python benchmarks/bench_scaling.py [--sizes 100,1000,10000,100000] [--topologies grid,planar,small_world] [--json scaling.json]
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import match
+
+
+# the read APIs of the kernel with their arguments (from the first node of player 0)
+READ_APIS = ['get_owners', 'get_troops_count', 'get_state', 'get_turn_number', 'get_adj', 'get_player_id', 'get_strategic_nodes',
+             'get_number_of_troops_to_put', 'get_number_of_fort_troops', 'get_reachable', 'get_changes', 'get_map_analysis']
+
+
+def measure(func, repeat=1):
+    # the time of a call (the average of repeat calls) and the peak of the memory of a call in bytes
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    seconds = (time.perf_counter() - start) / repeat
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def make_game(map_file):
+    # the game of the map in the turn state, the nodes are owned by the three players in three blocks of ids
+    from src.components.game import Game
+    with open(os.path.join(match.file_path, 'config.json')) as config_file:
+        config = {**json.load(config_file), 'debug': False}
+    main_game = Game()
+    main_game.config = config
+    main_game.read_map(map_file)
+    for player_id in range(config['number_of_players']):
+        main_game.add_player(player_id)
+    number_of_nodes = len(main_game.nodes)
+    for node_id, node in main_game.nodes.items():
+        player_id = node_id * config['number_of_players'] // number_of_nodes
+        node.owner = main_game.players[player_id]
+        main_game.players[player_id].nodes.append(node)
+        node.number_of_troops = 2
+    main_game.turn_number = config['number_of_players'] * config['initial_troop'] + 1
+    main_game.game_state = 2
+    main_game.state = 2
+    main_game.player_turn = main_game.players[0]
+    return main_game
+
+
+def read_api(main_game, name, node_id):
+    from src.blueprints.BluePrints import BluePrints
+    func = getattr(BluePrints(), name)
+    if name == 'get_reachable':
+        return lambda: func(node_id, main_game)
+    if name == 'get_changes':
+        return lambda: func(0, main_game)
+    return lambda: func(main_game)
+
+
+def attacker(main_game, rng):
+    # an attack of player 0 on a node of player 1 next to it, the target is given back to player 1 before the next attack
+    from src.blueprints.attack import attack
+    pairs = [(node.id, adjacent.id) for node in main_game.players[0].nodes for adjacent in node.adj_main_map
+             if adjacent.owner is main_game.players[1]]
+
+    def attack_once():
+        attacking_id, target_id = rng.choice(pairs)
+        target = main_game.nodes[target_id]
+        if target.owner is not main_game.players[1]:
+            main_game.remove_node_from_player(target_id, target.owner.id)
+            main_game.add_node_to_player(target_id, 1)
+        main_game.nodes[attacking_id].number_of_troops = 20
+        target.number_of_troops = 1
+        attack(attacking_id, target_id, 0, 0.5, main_game, 0)
+    return attack_once
+
+
+def run_match(map_file, bots):
+    # play a match in a new process, returns its time, number of turns and the maximum resident size (bytes)
+    code = (f"import json, resource, match; main_game, match_time = match.run_match({map_file!r}, 1, bots={bots!r}, debug=False); "
+            "print(json.dumps([match_time, main_game.turn_number, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024]))")
+    output = subprocess.run([sys.executable, '-c', code], cwd=os.path.dirname(os.path.abspath(__file__)),
+                            capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def benchmark(map_file, number_of_nodes, repeat, match_size, bots):
+    # {step: (seconds, bytes)} of the map
+    from src.tools.find_path import find_path
+    from src.tools.find_reachable import find_reachable
+    from src.components.game import Game
+    results = {}
+    results['read_map'] = measure(lambda: Game().read_map(map_file))
+
+    main_game = make_game(map_file)
+    first, last = main_game.players[0].nodes[0].id, main_game.players[0].nodes[-1].id
+    # the analysis of the map is computed and saved by the first call (the time), the next calls read it from the cache (the memory)
+    results['map_analysis'] = measure(lambda: main_game.__setattr__('map_analysis', None) or main_game.get_map_analysis())
+    for name in READ_APIS:
+        results[name] = measure(read_api(main_game, name, first), repeat)
+    results['find_path'] = measure(lambda: find_path(first, last, main_game, 0), repeat)
+    results['find_reachable'] = measure(lambda: find_reachable(first, main_game), repeat)
+    results['attack'] = measure(attacker(main_game, random.Random(0)), repeat * 10)
+    if number_of_nodes <= match_size:
+        match_time, turn_number, memory = run_match(map_file, bots)
+        results['match'] = (match_time, memory)
+        results['match_turn'] = (match_time / turn_number, memory)
+    return results
+
+
+def growth(sizes, seconds):
+    # the slope of log(time) over log(size)
+    if len(sizes) < 2:
+        return float('nan')
+    return np.polyfit(np.log(sizes), np.log(np.maximum(seconds, 1e-9)), 1)[0]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='the time and the memory of the kernel on growing maps')
+    parser.add_argument('--sizes', type=str, default='100,1000,10000,100000', help='the numbers of nodes, separated by commas')
+    parser.add_argument('--topologies', type=str, default='grid,planar,small_world', help='the topologies of src/tools/map_generator.py')
+    parser.add_argument('--repeat', type=int, default=5, help='the number of the calls of each API that are timed')
+    parser.add_argument('--match-size', type=int, default=1000, help='the largest map that full matches are played on')
+    parser.add_argument('--bot', type=str, default=os.path.join(os.path.dirname(match.file_path), 'main.py'),
+                        help='the main.py of the bot of all the seats')
+    parser.add_argument('--json', type=str, default=None, help='save the results in this json file')
+    args = parser.parse_args()
+    from src.tools.map_generator import generate_map, save_map
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    bots = [(os.path.abspath(args.bot), {})] * 3
+    results = {}
+    with tempfile.TemporaryDirectory() as temporary_path:
+        # the maps are in a maps folder, so their analyses are saved in the temporary folder too (see get_cache_path)
+        os.makedirs(os.path.join(temporary_path, 'maps'))
+        for topology in args.topologies.split(','):
+            results[topology] = {}
+            for number_of_nodes in sizes:
+                map_file = os.path.join(temporary_path, 'maps', f'{topology}{number_of_nodes}.json')
+                start = time.perf_counter()
+                save_map(generate_map(number_of_nodes, topology), map_file)
+                generate_time = time.perf_counter() - start
+                results[topology][number_of_nodes] = benchmark(map_file, number_of_nodes, args.repeat, args.match_size, bots)
+                print(f"{topology} {number_of_nodes} nodes: generated in {generate_time:.2f}s", flush=True)
+                for step, (seconds, memory) in results[topology][number_of_nodes].items():
+                    print(f"    {step:28}{seconds * 1000:12.3f} ms{memory / 2 ** 20:12.2f} MB", flush=True)
+
+    print(f"\n{'growth (slope of log time over log nodes)':44}" + ''.join(f'{topology:>14}' for topology in results))
+    steps = list(dict.fromkeys(step for topology in results.values() for size in topology.values() for step in size))
+    for step in steps:
+        slopes = []
+        for topology in results.values():
+            measured = [(size, topology[size][step][0]) for size in topology if step in topology[size]]
+            slopes.append(growth([size for size, _ in measured], [seconds for _, seconds in measured]))
+        print(f"{step:44}" + ''.join(f'{slope:14.2f}' for slope in slopes))
+
+    if args.json:
+        with open(args.json, 'w') as json_file:
+            json.dump({topology: {size: {step: {'seconds': seconds, 'bytes': memory} for step, (seconds, memory) in steps.items()}
+                                  for size, steps in sizes_results.items()} for topology, sizes_results in results.items()},
+                      json_file, indent=2)
@@ -0,0 +1,89 @@
+# Description: check and measure the simulator of the bot (src/simulator.py in the root of the repository)
+# the probabilities of the battles (dynamic programming over the dice) are compared with rolling the dice like the kernel,
+# then hypothetical turns are played on the board of the end of a match: put, attacks, move and end_turn, undone after each turn
+# run it from the Kernel-faster-for-python directory: python benchmarks/bench_simulator.py [number of turns]
+
+import importlib.util
+import os
+import random
+import sys
+import time
+import match
+
+
+def load_simulator():
+    path = os.path.join(os.path.dirname(match.file_path), 'src', 'simulator.py')
+    spec = importlib.util.spec_from_file_location('client_simulator', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def make_simulator(simulator, main_game, player_id):
+    # the simulator of the player from the game of the kernel
+    nodes = main_game.nodes.values()
+    players = [main_game.players[i] for i in sorted(main_game.players)]
+    return simulator.Simulator({node.id: node.owner.id if node.owner is not None else -1 for node in nodes},
+                               {node.id: node.number_of_troops for node in nodes},
+                               {node.id: node.number_of_fort_troops for node in nodes},
+                               {node.id: [adj.id for adj in node.adj_main_map] for node in nodes},
+                               {node.id: node.score_of_strategic for node in nodes if node.is_strategic},
+                               player_id, main_game.turn_number, len(players),
+                               [player.number_of_troops_to_place for player in players], [player.use_fort for player in players],
+                               main_game.config['fort_coef'], main_game.config['number_of_troops_after_successful_attack'],
+                               main_game.config['minimum_troops_per_turn'])
+
+
+def check_battles(simulator, rolls=20000):
+    # the largest difference between the probability of winning and the rate of winning with the dice
+    rng = random.Random(0)
+    largest = 0
+    for attacker_troops, target_troops, fraction in [(2, 1, 0), (4, 2, 0), (10, 6, 0), (10, 6, 1), (25, 20, 0.5), (8, 12, 0)]:
+        probability = simulator.win_probability(attacker_troops, target_troops, fraction)
+        wins = sum(simulator.roll_battle(attacker_troops, target_troops, fraction, rng)[1] <= 0 for _ in range(rolls))
+        largest = max(largest, abs(probability - wins / rolls))
+        print(f"battle {attacker_troops:3} vs {target_troops:3} fraction {fraction}: probability {probability:.4f}  dice {wins / rolls:.4f}")
+    return largest
+
+
+def play_turns(state, number_of_turns, rng=None):
+    # play number_of_turns hypothetical turns of the player of the state, each turn is undone after it
+    player_id = state.player_id
+    mine = [i for i, owner in enumerate(state.owners) if owner == player_id]
+    attacks = [(i, j) for i in mine for j in state.adjacents[i] if state.owners[j] not in [-1, player_id]]
+    random_state = random.Random(1)
+    start = time.perf_counter()
+    for _ in range(number_of_turns):
+        mark = state.mark()
+        state.apply_put(random_state.choice(mine), max(state.troops_to_put[player_id], 1))
+        for attacking_id, target_id in random_state.sample(attacks, min(3, len(attacks))):
+            if state.troops[attacking_id] >= 2 and state.owners[target_id] != player_id:
+                state.apply_attack(attacking_id, target_id, 0.5, 0.5, rng)
+        source, destination = random_state.sample(mine, 2)
+        if state.troops[source] > 1:
+            state.apply_move(source, destination, state.troops[source] - 1)
+        state.end_turn()
+        state.undo(mark)
+    return number_of_turns / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    number_of_turns = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    simulator = load_simulator()
+    largest = check_battles(simulator)
+    print(f"largest difference of the battles: {largest:.4f}")
+
+    main_game, match_time = match.run_match('map1.json', 1, debug=False)
+    state = make_simulator(simulator, main_game, main_game.turn_number % len(main_game.players))
+    before = (state.owners[:], state.troops[:], state.fort_troops[:], state.troops_to_put[:], state.turn_number)
+    for name, rng in [('expected', None), ('dice', random.Random(2))]:
+        print(f"{name:8} attacks: {play_turns(state, number_of_turns, rng):9.0f} turns/s")
+    after = (state.owners, state.troops, state.fort_troops, state.troops_to_put, state.turn_number)
+    print('undo restored the state' if before == after else 'undo did not restore the state')
+
+    number = 20000
+    start = time.perf_counter()
+    for _ in range(number):
+        state.clone()
+    print(f"clone: {(time.perf_counter() - start) / number * 1e6:.2f} us")
+    sys.exit(0 if before == after and largest < 0.02 else 1)
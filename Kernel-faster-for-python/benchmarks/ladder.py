@@ -0,0 +1,220 @@
+# Description: a rating ladder of bot versions on the faster kernel
+# the bots are main.py-style modules (initializer and turn), each version is a path and its parameters (src/parameters.py of the root bot)
+# the ratings are TrueSkill-like (mu and sigma, the Bradley-Terry update of Weng and Lin for games of more than two players),
+# the players of a match are ranked by their scores (calculate_score of check_finish)
+# the next match is the group of bots with the most uncertain result: large sigma and close ratings, the groups that are already
+# playing in other workers are less likely to be chosen again
+# the matches run in parallel processes and the ratings are updated after each match, all in a SQLite file
+# run it from the Kernel-faster-for-python directory:
+# python benchmarks/ladder.py add root ../main.py
+# python benchmarks/ladder.py add root-no-risk ../main.py --parameters '{"attack_risk": 0}'
+# python benchmarks/ladder.py run --matches 30
+# python benchmarks/ladder.py show
+
+import argparse
+import collections
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import queue
+import random
+import sqlite3
+import time
+import match
+
+
+MU = 25.0
+SIGMA = MU / 3
+BETA = SIGMA / 2
+KAPPA = 1e-4  # the smallest factor of sigma in an update
+
+SCHEMA = '''
+create table if not exists bots (
+    name text primary key,
+    path text not null,
+    parameters text not null,
+    mu real not null,
+    sigma real not null,
+    games integer not null default 0,
+    wins integer not null default 0
+);
+create table if not exists matches (
+    id integer primary key autoincrement,
+    time text not null,
+    map text not null,
+    seed integer not null,
+    seats text not null,
+    scores text not null,
+    errors text not null
+);
+'''
+
+
+class Ladder:
+    def __init__(self, path) -> None:
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+
+    def add(self, name, path, parameters):
+        with self.connection:
+            self.connection.execute('insert into bots (name, path, parameters, mu, sigma) values (?, ?, ?, ?, ?)',
+                                    (name, os.path.abspath(path), json.dumps(parameters), MU, SIGMA))
+
+    def remove(self, name):
+        with self.connection:
+            self.connection.execute('delete from bots where name = ?', (name,))
+
+    def bots(self):
+        # name: {path, parameters, mu, sigma, games, wins}
+        rows = self.connection.execute('select name, path, parameters, mu, sigma, games, wins from bots')
+        return {name: {'path': path, 'parameters': json.loads(parameters), 'mu': mu, 'sigma': sigma, 'games': games, 'wins': wins}
+                for name, path, parameters, mu, sigma, games, wins in rows}
+
+    def next_match(self, bots, rng, size=3, running=()):
+        """
+            the group of bots with the most uncertain result: the sum of their variances times the quality of the match
+            (how close their ratings are), a bot plays more than one seat if there are less bots than seats
+            running is the seats of the matches that are being played, the value of a group is divided by 1 + its number of them,
+            because their results will change the ratings before this match is recorded
+        """
+        playing = collections.Counter(tuple(sorted(seats)) for seats in running)
+        best, best_value = None, -1.0
+        for group in itertools.combinations_with_replacement(sorted(bots), size):
+            if len(set(group)) < min(len(bots), size):
+                continue
+            variance = sum(bots[name]['sigma'] ** 2 for name in group)
+            mus = [bots[name]['mu'] for name in group]
+            spread = max(mus) - min(mus)
+            quality = math.exp(-spread ** 2 / (2 * (size * BETA ** 2 + variance)))
+            value = math.sqrt(variance) * quality / (1 + playing[group]) * (1 + 1e-6 * rng.random())
+            if value > best_value:
+                best, best_value = group, value
+        seats = list(best)
+        rng.shuffle(seats)
+        return seats
+
+    def record(self, map_name, seed, seats, scores, errors):
+        """ Save the match and update the ratings of its bots, a bot in more than one seat gets one update and one game (see rate) """
+
+        bots = self.bots()
+        new_ratings = rate({name: (bots[name]['mu'], bots[name]['sigma']) for name in seats}, seats, scores)
+        winner = seats[max(range(len(scores)), key=lambda seat: scores[seat])]
+        with self.connection:
+            self.connection.execute('insert into matches (time, map, seed, seats, scores, errors) values (?, ?, ?, ?, ?, ?)',
+                                    (time.strftime('%Y-%m-%d %H:%M:%S'), map_name, seed, json.dumps(seats), json.dumps(scores),
+                                     json.dumps(errors)))
+            for name, (mu, sigma) in new_ratings.items():
+                self.connection.execute('update bots set mu = ?, sigma = ?, games = games + 1, wins = wins + ? where name = ?',
+                                        (mu, sigma, int(name == winner), name))
+
+    def number_of_matches(self):
+        return self.connection.execute('select count(*) from matches').fetchone()[0]
+
+    def show(self):
+        bots = self.bots()
+        print(f"{'bot':30}{'rating':>9}{'mu':>9}{'sigma':>8}{'games':>7}{'wins':>6}")
+        # the conservative rating: mu - 3 sigma
+        for name in sorted(bots, key=lambda name: bots[name]['mu'] - 3 * bots[name]['sigma'], reverse=True):
+            bot = bots[name]
+            print(f"{name:30}{bot['mu'] - 3 * bot['sigma']:9.2f}{bot['mu']:9.2f}{bot['sigma']:8.2f}{bot['games']:7}{bot['wins']:6}")
+
+
+def rate(ratings, seats, scores):
+    """
+        the Bradley-Terry full pair update of Weng and Lin: each seat is compared with every seat of the other bots of the match
+        ratings is {name: (mu, sigma)}, seats is the name of the bot of each seat and scores is the score of each seat (the higher the better)
+        the changes of all the seats of a bot are added to one update, returns the new ratings {name: (mu, sigma)}
+    """
+    omegas = dict.fromkeys(ratings, 0.0)
+    deltas = dict.fromkeys(ratings, 0.0)
+    for i, name_i in enumerate(seats):
+        mu_i, sigma_i = ratings[name_i]
+        for q, name_q in enumerate(seats):
+            if name_q == name_i:
+                continue
+            mu_q, sigma_q = ratings[name_q]
+            c = math.sqrt(sigma_i ** 2 + sigma_q ** 2 + 2 * BETA ** 2)
+            p = 1 / (1 + math.exp((mu_q - mu_i) / c))
+            s = 1.0 if scores[i] > scores[q] else 0.5 if scores[i] == scores[q] else 0.0
+            omegas[name_i] += sigma_i ** 2 / c * (s - p)
+            gamma = sigma_i / c
+            deltas[name_i] += gamma * sigma_i ** 2 / c ** 2 * p * (1 - p)
+    return {name: (mu + omegas[name], sigma * math.sqrt(max(1 - deltas[name], KAPPA))) for name, (mu, sigma) in ratings.items()}
+
+
+def play_match(task):
+    # play a match in the process of the pool
+    bots, map_name, seed, config = task
+    main_game, match_time = match.run_match(map_name, seed, bots=bots, **config)
+    return main_game.score, [len(errors) for errors in main_game.bot_errors]
+
+
+def run(ladder, number_of_matches, workers, maps, config, seed):
+    # keep the workers busy, the next match is chosen with the ratings after the finished matches
+    # each match runs in a new process (maxtasksperchild), the bots and the player folders keep module-level state
+    # a match that fails is skipped (it's not recorded) and the other matches go on
+    rng = random.Random(seed)
+    pool = multiprocessing.Pool(workers, maxtasksperchild=1)
+    results = queue.Queue()  # (index, result, error) of the finished matches, from the callbacks of the pool
+    running = {}  # index: (seats, map_name)
+    scheduled = finished = failed = 0
+    start = time.perf_counter()
+    first = ladder.number_of_matches()
+    while finished < number_of_matches:
+        while len(running) < workers and scheduled < number_of_matches:
+            bots = ladder.bots()
+            seats = ladder.next_match(bots, rng, running=[seats for seats, _ in running.values()])
+            index = first + scheduled
+            map_name = maps[index % len(maps)]
+            task = ([(bots[name]['path'], bots[name]['parameters']) for name in seats], map_name, index, config)
+            running[index] = (seats, map_name)
+            pool.apply_async(play_match, (task,), callback=lambda result, index=index: results.put((index, result, None)),
+                             error_callback=lambda error, index=index: results.put((index, None, error)))
+            scheduled += 1
+
+        index, result, error = results.get()
+        seats, map_name = running.pop(index)
+        finished += 1
+        if error is not None:
+            failed += 1
+            print(f"match {index}: {map_name}  failed: {error!r}", flush=True)
+            continue
+        scores, errors = result
+        ladder.record(map_name, index, seats, scores, errors)
+        print(f"match {index}: {map_name}  " + '  '.join(f'{name}: {score}' for name, score in zip(seats, scores)), flush=True)
+    pool.close()
+    pool.join()
+    print(f"{finished} matches ({failed} failed), {finished / (time.perf_counter() - start):.2f} matches/s")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='a rating ladder of bot versions')
+    parser.add_argument('--database', type=str, default='ladder.sqlite', help='the SQLite file of the ladder')
+    commands = parser.add_subparsers(dest='command', required=True)
+    add = commands.add_parser('add', help='add a bot version')
+    add.add_argument('name')
+    add.add_argument('path', help='the path of the main.py of the bot')
+    add.add_argument('--parameters', type=str, default='{}', help='a json of the parameters of the bot')
+    remove = commands.add_parser('remove', help='remove a bot version')
+    remove.add_argument('name')
+    run_parser = commands.add_parser('run', help='play matches and update the ratings')
+    run_parser.add_argument('--matches', type=int, default=30)
+    run_parser.add_argument('--workers', type=int, default=os.cpu_count())
+    run_parser.add_argument('--maps', type=str, default='map1.json', help='the maps, separated by commas')
+    run_parser.add_argument('--config', type=str, default='{"debug": false}', help='a json to override config.json of the kernel')
+    run_parser.add_argument('--seed', type=int, default=0)
+    commands.add_parser('show', help='show the ratings')
+    args = parser.parse_args()
+
+    ladder = Ladder(args.database)
+    if args.command == 'add':
+        ladder.add(args.name, args.path, json.loads(args.parameters))
+    elif args.command == 'remove':
+        ladder.remove(args.name)
+    elif args.command == 'run':
+        run(ladder, args.matches, args.workers, args.maps.split(','), json.loads(args.config), args.seed)
+        ladder.show()
+    else:
+        ladder.show()
@@ -0,0 +1,142 @@
+# Description: run a match of the kernel without the console and the map menu
+# the match is played by the bots of the player0, player1 and player2 folders like run.py does
+# the log files are written in a temporary folder
+# usage: python benchmarks/match.py [-m map1.json] [-s seed] [-c '{"debug": false}']
+# it prints a json of the time of the match, the number of turns and the scores
+
+import argparse
+import contextlib
+import functools
+import glob
+import importlib.util
+import io
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+file_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# the player folders and the src package are imported from the kernel path address
+sys.path.insert(0, file_path)
+
+
+def guarded(func, errors):
+    # an error of a bot ends its turn (like a bot of the web kernel), the errors are kept instead of stopping the match
+    @functools.wraps(func)
+    def wrapper(game):
+        try:
+            return func(game)
+        except Exception as error:
+            errors.append(repr(error))
+    return wrapper
+
+
+def install_bot(seat, path, parameters=None):
+    # use the main.py-style bot of path (initializer and turn) as the bot of the player<seat> folder
+    # the modules of the bot that are not in the src folder of the kernel are imported from the src folder next to it
+    # parameters are given to set_parameters of the bot (the tuning constants of the root main.py)
+    # returns the list of the errors of the bot in the match
+    import src
+    bot_src = os.path.join(os.path.dirname(os.path.abspath(path)), 'src')
+    if os.path.isdir(bot_src) and bot_src not in src.__path__:
+        src.__path__.append(bot_src)
+
+    name = f'player{seat}.main'
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    if parameters:
+        module.set_parameters(**parameters)
+
+    errors = []
+    module.initializer = guarded(module.initializer, errors)
+    module.turn = guarded(module.turn, errors)
+    return errors
+
+
+def run_match(map_name='map1.json', seed=0, game_hook=None, log_path=None, bots=None, **config):
+    # play a match and return the game object and the time of the match
+    # config overrides the values of config.json, game_hook(main_game) is called before the match starts
+    # the log files are written in log_path (a temporary folder if it's None)
+    # bots is a list of (path of main.py, parameters) of the seats, the bots of the player folders are used if it's None,
+    # their errors are saved in main_game.bot_errors
+    # the player bots keep module-level state, so run one match in each process
+    # the bots are installed before change_turn imports them
+    bot_errors = [install_bot(seat, path, parameters) for seat, (path, parameters) in enumerate(bots)] if bots is not None else None
+    from src.components.game import Game
+    from src.components.client_game import ClientGame
+    from src.tools.debug_log import read_levels
+    from src.turn_controllers.change_turn import change_turn
+    import src.turn_controllers.check_finish as check_finish
+
+    random.seed(seed)
+    main_game = Game()
+    main_game.bot_errors = bot_errors
+    main_game.read_map(os.path.join(file_path, 'maps', map_name))
+    with open(os.path.join(file_path, 'config.json')) as config_file:
+        main_game.config = {**json.load(config_file), **config}
+    main_game.debug = main_game.config['debug']
+    main_game.debug_log.levels.update(read_levels(main_game.config))
+    if game_hook is not None:
+        game_hook(main_game)
+
+    # keep the scores of the end of the match
+    game_finished = check_finish.game_finished
+    def save_score(main_game, score):
+        main_game.score = score
+        game_finished(main_game, score)
+    check_finish.game_finished = save_score
+
+    from player0.initialize import initializer as initializer_p0
+    from player1.initialize import initializer as initializer_p1
+    from player2.initialize import initializer as initializer_p2
+
+    with tempfile.TemporaryDirectory() as temporary_path:
+        os.chdir(log_path or temporary_path)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            client_game = ClientGame(main_game)
+            initializer_p0(client_game)
+            initializer_p1(client_game)
+            initializer_p2(client_game)
+            if main_game.game_started:
+                change_turn(main_game, client_game)
+        match_time = time.perf_counter() - start
+        os.chdir(file_path)
+
+    return main_game, match_time
+
+
+def make_logs(path, number_of_games, map_name='map1.json'):
+    # write number_of_games logs in path (copies of the json and streaming logs of a few matches)
+    # the matches are played in new processes because the player bots keep module-level state
+    sources = []
+    for seed, config in [(1, {}), (1, {'streaming_log': True}), (4, {}), (4, {'streaming_log': True})]:
+        log_path = os.path.join(path, f'match{len(sources)}')
+        os.makedirs(log_path)
+        code = f"import match; match.run_match({map_name!r}, {seed}, log_path={log_path!r}, debug=False, **{config!r})"
+        subprocess.run([sys.executable, '-c', code], cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+        sources += glob.glob(os.path.join(log_path, 'log', '*'))
+
+    logs_path = os.path.join(path, 'logs')
+    os.makedirs(logs_path)
+    for i in range(number_of_games):
+        source = sources[i % len(sources)]
+        shutil.copy(source, os.path.join(logs_path, f'{i:05}' + os.path.splitext(source)[1]))
+    return logs_path
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='run a match without the console')
+    parser.add_argument('-m', '--map', type=str, default='map1.json', help='the map of the match')
+    parser.add_argument('-s', '--seed', type=int, default=0, help='the seed of the random module')
+    parser.add_argument('-c', '--config', type=str, default='{}', help='a json to override config.json')
+    args = parser.parse_args()
+
+    main_game, match_time = run_match(args.map, args.seed, **json.loads(args.config))
+    print(json.dumps({'time': match_time, 'turn_number': main_game.turn_number, 'score': getattr(main_game, 'score', None)}))
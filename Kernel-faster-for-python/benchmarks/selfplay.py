@@ -0,0 +1,245 @@
+# Description: tune the parameters of the bot (src/parameters.py in the root of the repository) with self-play
+# each candidate plays in one seat against the baseline parameters in the other seats, over the maps and all the seat orders
+# the matches run in parallel processes (one match in each process because the bots keep module-level state)
+# search: grid (all the combinations), random, or es (a diagonal evolution strategy in the style of CMA-ES for the numeric parameters)
+# a candidate stops early when the upper bound of its win rate is below the lower bound of the best candidate,
+# and the search stops when the best lower bound doesn't improve for --patience rounds
+# space is a json of the parameters: {"name": [values]} or {"name": {"min": low, "max": high}}
+# run it from the Kernel-faster-for-python directory, for example:
+# python benchmarks/selfplay.py --space '{"attack_risk": [0, 0.5, 1]}' --baseline '{"attack_search_time": 0.02}' --games 30
+
+import argparse
+import concurrent.futures
+import importlib.util
+import itertools
+import json
+import math
+import os
+import random
+import time
+import match
+
+
+Z = 1.96  # the 95% confidence interval
+
+
+def wilson(wins, games):
+    # the Wilson score interval of the win rate
+    if games == 0:
+        return 0.0, 1.0
+    rate = wins / games
+    center = (rate + Z * Z / (2 * games)) / (1 + Z * Z / games)
+    margin = Z * math.sqrt(rate * (1 - rate) / games + Z * Z / (4 * games * games)) / (1 + Z * Z / games)
+    return max(center - margin, 0.0), min(center + margin, 1.0)
+
+
+def play_game(task):
+    # play a match in the process of the pool and return the result of the seat of the candidate
+    bots, map_name, seed, seat, config = task
+    main_game, match_time = match.run_match(map_name, seed, bots=bots, **config)
+    scores = main_game.score
+    return {'scores': scores, 'win': scores[seat] > max(score for i, score in enumerate(scores) if i != seat),
+            'share': scores[seat] / max(sum(scores), 1), 'time': match_time, 'errors': len(main_game.bot_errors[seat])}
+
+
+class Candidate:
+    def __init__(self, parameters) -> None:
+        self.parameters = parameters  # the parameters that are different from the baseline
+        self.games = 0
+        self.wins = 0
+        self.shares = []  # the share of the candidate in the scores of each game
+        self.errors = 0
+        self.scheduled = 0
+        self.stopped = False
+
+    def interval(self):
+        return wilson(self.wins, self.games)
+
+    def rate(self):
+        # the win rate with one win and one loss as the prior (to rank the candidates with a few games)
+        return (self.wins + 1) / (self.games + 2)
+
+    def report(self):
+        low, high = self.interval()
+        share = sum(self.shares) / len(self.shares) if self.shares else 0
+        return (f"{json.dumps(self.parameters):60} games: {self.games:4}  wins: {self.wins:4}  rate: {self.wins / max(self.games, 1):.3f} "
+                f"[{low:.3f}, {high:.3f}]  share: {share:.3f}  errors: {self.errors}" + ('  (stopped early)' if self.stopped else ''))
+
+
+class SelfPlay:
+    def __init__(self, bot, baseline, maps, games, min_games, workers, config) -> None:
+        self.bot = bot  # the path of main.py
+        self.baseline = baseline  # the parameters of the other seats
+        self.maps = maps
+        self.games = games  # the games of each candidate
+        self.min_games = min_games  # the games before a candidate can be stopped early
+        self.workers = workers
+        self.config = config  # the config of the kernel
+        self.best = None
+        self.results = []
+        self.matches = 0
+        self.start = time.perf_counter()
+        self.executor = concurrent.futures.ProcessPoolExecutor(workers, max_tasks_per_child=1)
+
+    def task(self, candidate):
+        # the next game of the candidate: the maps and the seats change in turn, each game has its own seed
+        index = candidate.scheduled
+        candidate.scheduled += 1
+        map_name = self.maps[index % len(self.maps)]
+        seat = (index // len(self.maps)) % 3
+        bots = [(self.bot, {**self.baseline, **candidate.parameters} if i == seat else self.baseline) for i in range(3)]
+        return bots, map_name, index, seat, self.config
+
+    def best_lower_bound(self):
+        return self.best.interval()[0] if self.best is not None else 0.0
+
+    def evaluate(self, candidates):
+        """
+            play the games of the candidates together (the workers are always busy), the next game is given to the candidates in turn
+            a candidate stops when it can't be better than the best candidate
+        """
+        running = {}
+        queue = itertools.cycle(candidates)
+        while True:
+            while len(running) < self.workers:
+                candidate = next((c for c in itertools.islice(queue, len(candidates))
+                                  if not c.stopped and c.scheduled < self.games), None)
+                if candidate is None:
+                    break
+                running[self.executor.submit(play_game, self.task(candidate))] = candidate
+            if not running:
+                break
+
+            done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                candidate = running.pop(future)
+                result = future.result()
+                self.matches += 1
+                candidate.games += 1
+                candidate.wins += result['win']
+                candidate.shares.append(result['share'])
+                candidate.errors += result['errors']
+                if candidate.games >= self.min_games and candidate.interval()[1] < self.best_lower_bound():
+                    candidate.stopped = True
+                if candidate.games >= self.min_games and (self.best is None or candidate.interval()[0] > self.best_lower_bound()):
+                    self.best = candidate
+
+        for candidate in candidates:
+            self.results.append(candidate)
+            print(candidate.report(), flush=True)
+        print(f"{self.matches} matches, {self.matches / (time.perf_counter() - self.start):.2f} matches/s", flush=True)
+
+
+def get_space(space):
+    # the values of each parameter: a list or a (low, high) range
+    return {name: tuple([values['min'], values['max']]) if isinstance(values, dict) else list(values) for name, values in space.items()}
+
+
+def sample(rng, values):
+    if isinstance(values, list):
+        return rng.choice(values)
+    low, high = values
+    return rng.randint(low, high) if isinstance(low, int) and isinstance(high, int) else rng.uniform(low, high)
+
+
+def grid_search(space, population):
+    # all the combinations of the lists, in rounds of population candidates
+    names = list(space)
+    combinations = [dict(zip(names, values)) for values in itertools.product(*[space[name] for name in names])]
+    for i in range(0, len(combinations), population):
+        yield combinations[i:i + population]
+
+
+def random_search(space, population, rng):
+    while True:
+        yield [{name: sample(rng, values) for name, values in space.items()} for _ in range(population)]
+
+
+def load_defaults(bot):
+    # the default parameters of the bot (src/parameters.py next to main.py)
+    spec = importlib.util.spec_from_file_location('bot_parameters', os.path.join(os.path.dirname(bot), 'src', 'parameters.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.DEFAULTS
+
+
+def es_search(space, population, rng, baseline, selfplay):
+    """
+        a diagonal evolution strategy: the candidates are sampled around the mean with a step for each parameter,
+        the mean moves to the weighted mean of the better half and the steps follow their spread (CMA-ES without the full covariance)
+        the parameters with a list of values are sampled from the list
+    """
+    defaults = load_defaults(selfplay.bot)
+    numeric = {name: (min(values), max(values)) if isinstance(values, list) else values for name, values in space.items()
+               if not isinstance(values, list) or all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in values)}
+    mean = {name: min(max(baseline.get(name, defaults[name]), low), high) for name, (low, high) in numeric.items()}
+    steps = {name: (high - low) / 4 for name, (low, high) in numeric.items()}
+    elite = population // 2
+    weights = [math.log(elite + 0.5) - math.log(i + 1) for i in range(elite)]
+    weights = [weight / sum(weights) for weight in weights]
+    while True:
+        candidates = []
+        for _ in range(population):
+            parameters = {name: sample(rng, values) for name, values in space.items() if name not in numeric}
+            for name, (low, high) in numeric.items():
+                value = min(max(rng.gauss(mean[name], steps[name]), low), high)
+                parameters[name] = round(value) if isinstance(low, int) and isinstance(high, int) else value
+            candidates.append(parameters)
+        yield candidates
+
+        ranked = sorted(selfplay.results[-population:], key=lambda candidate: candidate.rate(), reverse=True)[:elite]
+        for name in numeric:
+            new_mean = sum(weight * candidate.parameters[name] for weight, candidate in zip(weights, ranked))
+            spread = math.sqrt(sum(weight * (candidate.parameters[name] - mean[name]) ** 2 for weight, candidate in zip(weights, ranked)))
+            steps[name] = max(0.5 * steps[name] + 0.5 * spread, 1e-3 * (numeric[name][1] - numeric[name][0]))
+            mean[name] = new_mean
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='tune the parameters of the bot with self-play')
+    parser.add_argument('--bot', type=str, default=os.path.join(os.path.dirname(match.file_path), 'main.py'), help='the path of main.py')
+    parser.add_argument('--space', type=str, required=True, help='a json of the values of the parameters')
+    parser.add_argument('--baseline', type=str, default='{}', help='a json of the parameters of the other seats (and of the candidates)')
+    parser.add_argument('--search', choices=['grid', 'random', 'es'], default='grid')
+    parser.add_argument('--population', type=int, default=4, help='the candidates of each round')
+    parser.add_argument('--rounds', type=int, default=10, help='the most rounds of random and es')
+    parser.add_argument('--patience', type=int, default=3, help='stop after this many rounds without a better candidate')
+    parser.add_argument('--games', type=int, default=30, help='the games of each candidate')
+    parser.add_argument('--min-games', type=int, default=9, help='the games before a candidate can be stopped early')
+    parser.add_argument('--maps', type=str, default='map1.json', help='the maps, separated by commas')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--config', type=str, default='{"debug": false}', help='a json to override config.json of the kernel')
+    parser.add_argument('--seed', type=int, default=0, help='the seed of the random and es searches')
+    parser.add_argument('--output', type=str, default=None, help='save the results in this json file')
+    args = parser.parse_args()
+
+    space = get_space(json.loads(args.space))
+    baseline = json.loads(args.baseline)
+    selfplay = SelfPlay(os.path.abspath(args.bot), baseline, args.maps.split(','), args.games, args.min_games, args.workers,
+                        json.loads(args.config))
+    rng = random.Random(args.seed)
+    if args.search == 'grid':
+        rounds = grid_search(space, args.population)
+    elif args.search == 'random':
+        rounds = itertools.islice(random_search(space, args.population, rng), args.rounds)
+    else:
+        rounds = itertools.islice(es_search(space, args.population, rng, baseline, selfplay), args.rounds)
+
+    # the baseline against itself is the first candidate, the win rate of a seat is 1/3 if the parameters are the same
+    selfplay.evaluate([Candidate({})])
+    waiting = 0
+    for candidates in rounds:
+        best = selfplay.best
+        selfplay.evaluate([Candidate(parameters) for parameters in candidates])
+        waiting = 0 if selfplay.best is not best else waiting + 1
+        if waiting >= args.patience:
+            print(f'no better candidate in {waiting} rounds')
+            break
+    selfplay.executor.shutdown()
+
+    print('best:', selfplay.best.report() if selfplay.best is not None else None)
+    if args.output is not None:
+        with open(args.output, 'w') as output_file:
+            json.dump({'baseline': baseline, 'best': selfplay.best.parameters if selfplay.best is not None else None,
+                       'candidates': [{'parameters': c.parameters, 'games': c.games, 'wins': c.wins, 'interval': c.interval(),
+                                       'errors': c.errors} for c in selfplay.results]}, output_file)
@@ -18,6 +18,8 @@ from src.blueprints.get_number_of_troops_to_put import get_number_of_troops_to_p
 from src.blueprints.get_reachable import get_reachable
 from src.blueprints.get_number_of_fort_troops import get_number_of_fort_troops
 from src.blueprints.fort import fort
+from src.blueprints.get_changes import get_changes
+from src.blueprints.get_map_analysis import get_map_analysis
 
 
 class BluePrints:
@@ -41,3 +43,5 @@ class BluePrints:
         self.get_reachable = get_reachable
         self.get_number_of_fort_troops = get_number_of_fort_troops
         self.fort = fort
+        self.get_changes = get_changes
+        self.get_map_analysis = get_map_analysis
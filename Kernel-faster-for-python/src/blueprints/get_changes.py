@@ -0,0 +1,18 @@
+def get_changes(since: int, main_game):
+    # this API used to get the nodes that changed after the since version of the game state
+    # each changed node is like this: node_id: [owner, number_of_troops, number_of_fort_troops]
+    # if the changes are not available anymore (or since is -1) all the nodes are returned and full is 1
+
+    version = main_game.version
+    changed_nodes = main_game.get_changes(since)
+    full = changed_nodes is None
+    if full:
+        changed_nodes = main_game.nodes.keys()
+
+    output_dict = {'version': version, 'full': int(full), 'changes': {}}
+    for node_id in changed_nodes:
+        node = main_game.nodes[node_id]
+        output_dict['changes'][str(node_id)] = [node.owner.id if node.owner is not None else -1,
+                                                node.number_of_troops,
+                                                node.number_of_fort_troops]
+    return output_dict
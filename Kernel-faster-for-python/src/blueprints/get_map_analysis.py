@@ -0,0 +1,11 @@
+from src.tools.map_analysis import FIELDS
+
+
+def get_map_analysis(main_game):
+    # this API used to get the analysis of the map (see src/tools/map_analysis.py), it doesn't change during the game
+    # the fields are the numpy arrays that are memory-mapped from the map_cache folder (they are read-only)
+    analysis = main_game.get_map_analysis()
+    output_dict = {'hash': analysis.hash, 'number_of_nodes': analysis.number_of_nodes}
+    for name in FIELDS:
+        output_dict[name] = getattr(analysis, name)
+    return output_dict
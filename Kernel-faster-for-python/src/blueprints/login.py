@@ -6,12 +6,9 @@
 # it also gets a port number to run a server
 # player also should send a token/password to this API so server is going to use it to authenticate that the request comes from server 
 
-# initialize the player_id
-player_id = 0
-
-
 def login(main_game):
-    global player_id
+    # the players get the ids in the order of their login, so each new game starts from 0
+    player_id = len(main_game.players)
     # make sure there is no more than number_of_players players
     if player_id >= main_game.config['number_of_players']:
         output_dict = {'error': 'game players is full'}
@@ -24,5 +21,4 @@ def login(main_game):
     # initialize the player
     main_game.add_player(player_id)
     main_game.players[player_id].number_of_troops_to_place = main_game.config['initial_troop']
-    player_id += 1
     return output_dict
@@ -65,12 +65,11 @@ def move_troop(source: int, destination: int, troop_count: int, main_game, playe
     main_game.nodes[destination].number_of_troops += troop_count
 
     main_game.move_troop_done = True
+    main_game.bump_version('troops', node_ids=[source, destination])
 
     main_game.log_fortify = {"number_of_troops": troop_count,
                              "path": path}
 
-    if main_game.debug:
-        main_game.print("player " + str(player_id) + " moved " + str(troop_count) + " troops from node " + str(
-            source) + " to node " + str(destination))
+    main_game.debug_log.log('actions', 1, "player {} moved {} troops from node {} to node {}", player_id, troop_count, source, destination)
 
     return {'message': 'troops moved successfully'}
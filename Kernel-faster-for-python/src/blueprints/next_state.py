@@ -7,16 +7,18 @@ def next_state(main_game):
     4: fortification state
     '''
     if main_game.game_state != 2:
-        output_dict = {'error': 'The game is not in the turn state'}
+        main_game.state = 5
+        main_game.bump_version()
+        output_dict = {'game_state': main_game.state, 'message': 'success'}
         return output_dict
 
-    if main_game.state >= 4:
+    if main_game.state >= 5:
         output_dict = {'error': 'you already finished the turn'}
         return output_dict
 
     main_game.state += 1
-    if main_game.debug:
-        main_game.print("******* state changed to: " + str(main_game.state) + " *******")
+    main_game.bump_version()
+    main_game.debug_log.log('actions', 1, "******* state changed to: {} *******", main_game.state)
 
     output_dict = {'game_state': main_game.state, 'message': 'success'}
     return output_dict
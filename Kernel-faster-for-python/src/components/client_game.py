@@ -1,11 +1,36 @@
 import requests
+import time
 from src.blueprints import BluePrints
+from src.tools.metrics import Metrics
+
+
+class InstrumentedBluePrints:
+    # the blueprints that record the time of each call in main_game.metrics
+    # the response size is not recorded because the outputs are not sent to the players
+    def __init__(self, main_game) -> None:
+        for api, func in BluePrints.BluePrints().__dict__.items():
+            setattr(self, api, self.instrument(api, func, main_game))
+
+    def instrument(self, api, func, main_game):
+        metrics = main_game.metrics
+        perf_counter = time.perf_counter
+
+        def instrumented(*args):
+            start = perf_counter()
+            output = func(*args)
+            metrics.record(api, main_game.player_turn.id if main_game.player_turn is not None else -1, perf_counter() - start)
+            return output
+        return instrumented
 
 
 class ClientGame:
     def __init__(self, main_game) -> None:
         self.main_game = main_game
         self.blueprints = BluePrints
+        # the blueprints are wrapped only if the metrics are enabled, so there is no cost otherwise
+        if main_game.config.get('metrics', False):
+            main_game.metrics = Metrics()
+            self.blueprints = InstrumentedBluePrints(main_game)
 
     def output_handler(self, output):
         """
@@ -153,3 +178,19 @@ class ClientGame:
         node_id = self.__check_int(node_id)
         troop_count = self.__check_int(troop_count)
         return self.output_handler(self.blueprints.fort(node_id, troop_count, self.main_game, self.get_player_id()['player_id']))
+
+    def get_changes(self, since):
+        """
+            returns the nodes that changed after the since version of the game state
+            {"version": version, "full": 0 or 1, "changes": {node_id: [owner, number_of_troops, number_of_fort_troops], ...}}
+            if full is 1 the changes are not available anymore and all the nodes are returned
+        """
+        since = self.__check_int(since)
+        return self.output_handler(self.blueprints.get_changes(since, self.main_game))
+
+    def get_map_analysis(self):
+        """
+            returns the analysis of the map (see src/tools/map_analysis.py), the fields are read-only numpy arrays
+            {"hash": hash, "number_of_nodes": number_of_nodes, "indptr": array, "indices": array, "distances": array, ...}
+        """
+        return self.output_handler(self.blueprints.get_map_analysis(self.main_game))
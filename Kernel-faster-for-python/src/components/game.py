@@ -16,13 +16,19 @@
 from src.components.node import Node
 from src.components.player import Player
 from src.turn_controllers.change_turn import change_turn
-import json
+from collections import deque
 from src.tools.calculate_number_of_troops import calculate_number_of_troops
+from src.tools.match_log import MatchLogWriter
+from src.tools.debug_log import DebugLog
+from src.tools.map_analysis import load_map_analysis
+from src.tools.map_loader import load_map, paused_gc
+import datetime
+import os
 
 
 class Game:
     def __init__(self) -> None:
-        self.debug_logs = ""
+        self.debug_log = DebugLog() # the debug logs, the levels of its categories are set from the config
         self.debug = False
         self.players = {} # player_id: player object, includes all players in the game
 
@@ -46,6 +52,17 @@ class Game:
         self.log_fort = [] # the log of the fortify at each turn
         self.has_won_troop = False
         self.move_troop_done = False # a boolean that shows if the move_troop is done or not in the current turn
+        self.version = 0 # the version of the game state, it increases after each change in the game
+        self.field_versions = {'owner': 0, 'troops': 0, 'fort_troops': 0} # the version of the last change of each field of the nodes
+        self.changes = deque(maxlen=1000) # the journal of the last changed nodes: (version, node_id)
+        self.changes_floor = 0 # the changes up to this version are dropped from the journal
+        self.log_writer = None # the writer of the streaming log (if streaming_log is true in the config)
+        self.log_changes = None # the owner and troops of the changed nodes at the beginning of the turn (None if the turn is a keyframe)
+        self.log_board_version = None # the version of the game state at the beginning of the last logged turn
+        self.log_turn_count = 0 # the number of logged turns
+        self.metrics = None # the metrics of the API calls (if metrics is true in the config, see src/tools/metrics.py)
+        self.map_file = None # the path of the map file
+        self.map_analysis = None # the analysis of the map (see src/tools/map_analysis.py), it's loaded when it's asked for
         # the main log file that will saved at the end of the game
         self.log = {"initialize": self.log_initialize, "turns": {}} 
 
@@ -68,31 +85,37 @@ class Game:
             self.players[player_id] = Player(player_id)
 
     def read_map(self, map_file: str) -> None:
-        # read the map from the json file and create the nodes and initialize them  
+        # read the map from the map file and create the nodes and initialize them  
 
-        # open the json file and load it into a dictionary
-        with open(map_file,'r') as json_file:   
-            json_py=json.load(json_file)        
+        self.map_file = map_file
+        self.map_analysis = None
 
-        # create the nodes and add them to the nodes dictionary
-        for id in range(json_py["number_of_nodes"]):
-            node=Node(id)        
-            self.nodes[id] = node
+        # load and check the map file (json or npz, see src/tools/map_loader.py), a map that is not valid raises a ValueError
+        map_data = load_map(map_file)
 
-        # add edges to the nodes
-        for edge in json_py["list_of_edges"]:  
-            self.nodes[edge[0]].adj_main_map.append(self.nodes[edge[1]])
-            self.nodes[edge[1]].adj_main_map.append(self.nodes[edge[0]])
+        with paused_gc():
+            # create the nodes and add them to the nodes dictionary
+            for id in range(map_data.number_of_nodes):
+                node=Node(id)        
+                self.nodes[id] = node
+
+            # add the adjacent nodes to the nodes from the CSR adjacency of the map (in the order of the edges of the map file)
+            nodes = [self.nodes[id] for id in range(map_data.number_of_nodes)]
+            indptr, indices = map_data.indptr.tolist(), map_data.indices.tolist()
+            for id, node in enumerate(nodes):
+                node.adj_main_map = [nodes[i] for i in indices[indptr[id]:indptr[id + 1]]]
         
         # add the strategic nodes to the nodes
-        for id in json_py["strategic_nodes"]:
+        for id, score in zip(map_data.strategic_nodes.tolist(), map_data.scores.tolist()):
             self.nodes[id].is_strategic = True
-        
-        for i in range(len(json_py["scores_of_strategic_nodes"])):
-            id = json_py["strategic_nodes"][i]
-            score = json_py["scores_of_strategic_nodes"][i]
             self.nodes[id].score_of_strategic = score
 
+    def get_map_analysis(self):
+        # return the analysis of the map, it's loaded from the map_cache folder (or computed and saved there) the first time
+        if self.map_analysis is None:
+            self.map_analysis = load_map_analysis(self.map_file)
+        return self.map_analysis
+
     def check_all_players_ready(self) -> None:
         # this function will check if all players are ready to start the game
         # this function will be called after each player sends a ready request
@@ -139,10 +162,19 @@ class Game:
             # calculate the number of troops that the player get at the beginning of this turn
             self.player_turn.number_of_troops_to_place += calculate_number_of_troops(player_id, self)
             # initialize the log variables
-            ## the log of the node owner at the beginning of each turn
-            self.log_node_owner = [i.owner.id if i.owner is not None else -1 for i in self.nodes.values()]
-            ## the log of the number of troops at the beginning of each turn
-            self.log_troop_count = [i.number_of_troops for i in self.nodes.values()]
+            changed_nodes = self.get_log_changes()
+            if changed_nodes is None:
+                ## the log of the node owner at the beginning of each turn
+                self.log_node_owner = [i.owner.id if i.owner is not None else -1 for i in self.nodes.values()]
+                ## the log of the number of troops at the beginning of each turn
+                self.log_troop_count = [i.number_of_troops for i in self.nodes.values()]
+                self.log_changes = None
+            else:
+                ## the owner and number of troops of the nodes that changed since the beginning of the last turn
+                self.log_changes = {}
+                for node_id in sorted(changed_nodes):
+                    node = self.nodes[node_id]
+                    self.log_changes[str(node_id)] = [node.owner.id if node.owner is not None else -1, node.number_of_troops]
             ## clear the log of the number of troops that are put on the map at each turn
             self.log_put_troop = []
             ## clear the log of the attacks at each turn
@@ -150,15 +182,37 @@ class Game:
             ## clear the log of the move_troop at each turn
             self.log_fortify = {}
 
+        self.bump_version()
         return player_id
 
     def end_turn(self):
         # this function will be called at the end of each turn
         # it will save all the log variables in the main log variable
 
+        # the metrics of the API calls in the turn (the calls of the initialize phase are only in the totals)
+        turn_metrics = self.metrics.pop_turn() if self.metrics is not None else None
+
         # check if the game is in the turns state
         if self.game_state == 2:
-            self.log['turns']['turn'+str(self.turn_number)] = {
+            # the turns between the keyframes of the streaming log just have the changed nodes
+            if self.log_changes is not None:
+                changed_nodes = self.get_changes(self.log_board_version)
+                turn_log = {
+                    "changes": self.log_changes,
+                    "add_troop": self.log_put_troop,
+                    "attack": self.log_attack,
+                    "fortify": self.log_fortify
+                }
+                if changed_nodes is None:
+                    turn_log["fort"] = [i.number_of_fort_troops for i in self.nodes.values()]
+                else:
+                    turn_log["fort_changes"] = {str(i): self.nodes[i].number_of_fort_troops for i in sorted(changed_nodes)}
+                if turn_metrics is not None:
+                    turn_log["metrics"] = turn_metrics
+                self.write_log(['delta', self.turn_number, turn_log])
+                return
+
+            turn_log = {
                 "nodes_owner": self.log_node_owner,
                 "troop_count": self.log_troop_count,
                 "add_troop": self.log_put_troop,
@@ -166,15 +220,75 @@ class Game:
                 "fortify": self.log_fortify,
                 "fort": [i.number_of_fort_troops for i in self.nodes.values()]
             }
+            if turn_metrics is not None:
+                turn_log["metrics"] = turn_metrics
+            # the turns are kept in the memory only if the streaming log is disabled
+            if not self.write_log(['turn', self.turn_number, turn_log]):
+                self.log['turns']['turn'+str(self.turn_number)] = turn_log
+
+    def get_log_changes(self):
+        # this function will be called at the beginning of each logged turn
+        # return the nodes that changed since the beginning of the last logged turn if the turn is saved as a delta
+        # return None if the turn is saved as a keyframe (all the nodes)
+        # the streaming log saves a keyframe every log_keyframe_interval turns (0: all the turns are keyframes)
+        interval = self.config.get('log_keyframe_interval', 0) if self.config.get('streaming_log', False) else 0
+        changed_nodes = None
+        if interval > 0 and self.log_turn_count % interval != 0 and self.log_board_version is not None:
+            changed_nodes = self.get_changes(self.log_board_version)
+        self.log_turn_count += 1
+        self.log_board_version = self.version
+        return changed_nodes
+
+    def write_log(self, record):
+        # write a record in the streaming log (see src/tools/match_log.py)
+        # the log file is created in the log folder at the first record
+        # return False if the streaming log is disabled
+        if not self.config.get('streaming_log', False):
+            return False
+        if self.log_writer is None:
+            if not os.path.exists("log"):
+                os.makedirs("log")
+            self.log_writer = MatchLogWriter("log/" + datetime.datetime.now().strftime("%Y-%m-%d-%H-%M-%S") + ".jsonl")
+        self.log_writer.write(record)
+        return True
+
+    def bump_version(self, *fields, node_ids=()):
+        # this function will be called after each change in the game state (nodes, troops, turn and state)
+        # fields are the changed fields of the nodes: 'owner', 'troops' and 'fort_troops'
+        # node_ids are the changed nodes, they are saved in the journal of changes
+        # clients use the versions to know if the game state is changed since their last request
+        # the journal is updated before the version, so the journal has all the changes up to the version
+        version = self.version + 1
+        for node_id in node_ids:
+            if len(self.changes) == self.changes.maxlen:
+                self.changes_floor = self.changes[0][0]
+            self.changes.append((version, node_id))
+        for field in fields:
+            self.field_versions[field] = version
+        self.version = version
+
+    def get_changes(self, since):
+        # return the ids of the nodes that changed after the since version
+        # return None if some of the changes are dropped from the journal
+        if since < self.changes_floor or since > self.version:
+            return None
+        changed_nodes = set()
+        for version, node_id in reversed(list(self.changes)):
+            if version <= since:
+                break
+            changed_nodes.add(node_id)
+        return changed_nodes
 
     def print(self, text):
         # this function will print the text in the a log
-        self.debug_logs += text + "\n"
+        self.debug_log.log('game', 1, text)
     
     def add_node_to_player(self, node_id, player_id):
         self.players[player_id].nodes.append(self.nodes[node_id])
         self.nodes[node_id].owner = self.players[player_id]
+        self.bump_version('owner', node_ids=[node_id])
 
     def remove_node_from_player(self, node_id, player_id):
         self.players[player_id].nodes.remove(self.nodes[node_id])
-        self.nodes[node_id].owner = None
\ No newline at end of file
+        self.nodes[node_id].owner = None
+        self.bump_version('owner', node_ids=[node_id])
\ No newline at end of file
@@ -8,6 +8,7 @@
 
 from src.components.game import Game
 import src.tools.read_config as read_config
+from src.tools.debug_log import read_levels
 from src.turn_controllers.change_turn import change_turn
 import os
 import argparse
@@ -42,6 +43,7 @@ main_game.config = read_config.read_config()
 debug = main_game.config['debug']
 
 main_game.debug = debug
+main_game.debug_log.levels.update(read_levels(main_game.config))
 
 
 # Todo: Build Clients
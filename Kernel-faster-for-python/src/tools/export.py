@@ -0,0 +1,168 @@
+'''
+export the match logs of a folder as columnar tables for bulk analysis
+## games: one row for each game (game, path, first_turn, last_turn, score_0, score_1, ...)
+## nodes: one row for each node in each turn (game, turn, node, owner, troops, fort)
+## attacks: one row for each attack (game, turn, index, attacker, target, new_troop_count_attacker,
+##     new_troop_count_target, new_target_owner, new_fort_troop)
+the tables are written as parquet files if pyarrow is installed, else as parts of numpy .npz files
+(<table>-00000.npz, <table>-00001.npz, ..., read them with load_npz_table)
+the games are read one by one and the rows of each game are written to temporary files of the columns as soon as they are read,
+each part is copied from these files to its npz or parquet file, so the memory holds the rows of one game and not the columns of a part
+(only the index of the games grows with the number of games, a few hundred bytes for each game)
+
+usage: python -m src.tools.export <log folder> <output folder> [--format parquet|npz]
+'''
+
+import argparse
+import glob
+import os
+import shutil
+import tempfile
+import zipfile
+
+import numpy as np
+
+from src.tools.replay import ReplayIndex
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+
+ATTACK_COLUMNS = ['attacker', 'target', 'new_troop_count_attacker', 'new_troop_count_target', 'new_target_owner', 'new_fort_troop']
+
+
+class TableWriter:
+    # write the rows of a table as they are appended: each column is appended to a temporary file (the raw values,
+    # or one line for each value of the text columns), a part of rows_per_part rows is copied from the files to its npz or parquet file
+    def __init__(self, path, name, file_format, rows_per_part=250000) -> None:
+        self.path = path
+        self.name = name
+        self.file_format = file_format
+        self.rows_per_part = rows_per_part
+        self.files = None # column: the temporary file of the column
+        self.dtypes = None # column: dtype (the kind 'U' is a text column)
+        self.rows = 0 # the number of rows in the temporary files
+        self.parts = 0 # the number of written parts
+        self.writer = None # the parquet writer
+
+    def append(self, **columns):
+        # add rows to the table, the columns are numpy arrays with the same length
+        size = len(next(iter(columns.values())))
+        if self.rows + size > self.rows_per_part:
+            self.flush()
+        if self.files is None:
+            self.dtypes = {name: values.dtype for name, values in columns.items()}
+            self.files = {name: tempfile.TemporaryFile() for name in columns}
+
+        for name, values in columns.items():
+            if self.dtypes[name].kind == 'U':
+                self.files[name].write(''.join(value + '\n' for value in values.tolist()).encode())
+            else:
+                self.files[name].write(np.ascontiguousarray(values, dtype=self.dtypes[name]).data)
+        self.rows += size
+
+    def read(self, name):
+        # the values of a column in the temporary file, the number columns are memory-mapped
+        column_file = self.files[name]
+        column_file.flush()
+        if self.dtypes[name].kind == 'U':
+            column_file.seek(0)
+            return np.array(column_file.read().decode().splitlines())
+        return np.memmap(column_file, dtype=self.dtypes[name], mode='r', shape=(self.rows,))
+
+    def flush(self):
+        if self.rows == 0:
+            return
+        if self.file_format == 'parquet':
+            table = pa.table({name: self.read(name) for name in self.files})
+            if self.writer is None:
+                self.writer = pq.ParquetWriter(os.path.join(self.path, self.name + '.parquet'), table.schema)
+            self.writer.write_table(table)
+        else:
+            # the same file as np.savez, the number columns are copied to it from their files in blocks
+            with zipfile.ZipFile(os.path.join(self.path, f'{self.name}-{self.parts:05}.npz'), 'w', allowZip64=True) as npz_file:
+                for name, column_file in self.files.items():
+                    with npz_file.open(name + '.npy', 'w', force_zip64=True) as member:
+                        if self.dtypes[name].kind == 'U':
+                            np.lib.format.write_array(member, self.read(name))
+                            continue
+                        np.lib.format.write_array_header_1_0(member, {'descr': np.lib.format.dtype_to_descr(self.dtypes[name]),
+                                                                      'fortran_order': False, 'shape': (self.rows,)})
+                        column_file.seek(0)
+                        shutil.copyfileobj(column_file, member)
+        self.parts += 1
+        self.rows = 0
+        for column_file in self.files.values():
+            column_file.seek(0)
+            column_file.truncate()
+
+    def close(self):
+        self.flush()
+        if self.files is not None:
+            for column_file in self.files.values():
+                column_file.close()
+        if self.writer is not None:
+            self.writer.close()
+
+
+def load_npz_table(path, name):
+    # read all the parts of a table that is exported as npz files
+    columns = {}
+    for part in sorted(glob.glob(os.path.join(path, name + '-*.npz'))):
+        with np.load(part) as data:
+            for column in data.files:
+                columns.setdefault(column, []).append(data[column])
+    return {column: np.concatenate(arrays) for column, arrays in columns.items()}
+
+
+def export(log_path, output_path, file_format=None, rows_per_part=250000):
+    # export the logs of log_path to output_path and return the number of exported games
+    if file_format is None:
+        file_format = 'parquet' if pa is not None else 'npz'
+    if file_format == 'parquet' and pa is None:
+        raise ImportError('pyarrow is not installed, use the npz format')
+    if not os.path.exists(output_path):
+        os.makedirs(output_path)
+
+    index = ReplayIndex(log_path)
+    number_of_players = max((len(game['score']) for game in index.games if game['score'] is not None), default=0)
+    games = TableWriter(output_path, 'games', file_format, rows_per_part)
+    nodes = TableWriter(output_path, 'nodes', file_format, rows_per_part)
+    attacks = TableWriter(output_path, 'attacks', file_format, rows_per_part)
+
+    for game_id, replay in enumerate(index.replays()):
+        game = index.games[game_id]
+        score = game['score'] if game['score'] is not None else [-1] * number_of_players
+        games.append(game=np.array([game_id], dtype=np.int32), path=np.array([os.path.basename(game['path'])]),
+                     first_turn=np.array([game['first_turn']], dtype=np.int32), last_turn=np.array([game['last_turn']], dtype=np.int32),
+                     **{f'score_{player_id}': np.array([score[player_id]], dtype=np.int64) for player_id in range(number_of_players)})
+
+        node_ids = np.arange(replay.number_of_nodes, dtype=np.int32)
+        for turn_number, data, owners, troops, forts in replay.turns():
+            nodes.append(game=np.full(len(node_ids), game_id, dtype=np.int32), turn=np.full(len(node_ids), turn_number, dtype=np.int32),
+                         node=node_ids, owner=owners, troops=troops, fort=forts)
+
+            attack_log = data['attack']
+            if attack_log:
+                values = np.array([[attack[column] for column in ATTACK_COLUMNS] for attack in attack_log], dtype=np.int32)
+                attacks.append(game=np.full(len(attack_log), game_id, dtype=np.int32), turn=np.full(len(attack_log), turn_number, dtype=np.int32),
+                               index=np.arange(len(attack_log), dtype=np.int32),
+                               **{column: values[:, i] for i, column in enumerate(ATTACK_COLUMNS)})
+
+    for table in [games, nodes, attacks]:
+        table.close()
+    return len(index.games)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='export the match logs of a folder as columnar tables')
+    parser.add_argument('log_path', type=str, help='the folder of the logs')
+    parser.add_argument('output_path', type=str, help='the folder of the tables')
+    parser.add_argument('--format', type=str, choices=['parquet', 'npz'], help='parquet if pyarrow is installed else npz')
+    args = parser.parse_args()
+
+    number_of_games = export(args.log_path, args.output_path, args.format)
+    print(f'{number_of_games} games are exported to {args.output_path}')
@@ -1,29 +1,32 @@
-mark = []
-
 def DFS(u, v, main_game, player_id):
-    global mark
+    # the DFS of the nodes owned by the player from u, it stops when it reaches v
+    # it's without recursion so the long paths of the large maps don't reach the recursion limit of python
+    # the nodes are visited in the same order as the recursive DFS, so the path is the same
+    mark = [0 for i in range(len(main_game.nodes))]
     mark[u] = 1
-    if u == v:
-        return True, [v]
-    path = []
-    for node in main_game.nodes[u].adj_main_map:
-        if mark[node.id] == 0 and node.owner != None and node.owner.id == player_id:
-            res, path = DFS(node.id, v, main_game, player_id)
-            if res:
-                path = [u] + path
-                return True, path
+    path = [u]
+    stack = [iter(main_game.nodes[u].adj_main_map)]
+    while stack:
+        if path[-1] == v:
+            return True, path
+        for node in stack[-1]:
+            if mark[node.id] == 0 and node.owner != None and node.owner.id == player_id:
+                mark[node.id] = 1
+                path.append(node.id)
+                stack.append(iter(node.adj_main_map))
+                break
+        else:
+            stack.pop()
+            path.pop()
     return False, []
                 
 
 
 def find_path(u, v, main_game, player_id):
-    global mark
     # find a path from node u to node v that all the nodes in the path are owned by the player
     # return the path as a list of nodes
     # if there is no path return None
-    mark = [0 for i in range(len(main_game.nodes))]
     return DFS(u, v, main_game, player_id)
     
 
     
-
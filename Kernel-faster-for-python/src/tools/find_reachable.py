@@ -1,23 +1,23 @@
-ans = []
-mark = []
-
 def DFS(node_id, main_game, player_id):
-    global ans
-    global mark
+    # the nodes owned by the player that are reached from node_id in the order of the DFS
+    # it's without recursion so the large maps don't reach the recursion limit of python
+    mark = [0 for i in range(len(main_game.nodes))]
     mark[node_id] = 1
-    ans.append(node_id)
-    for node in main_game.nodes[node_id].adj_main_map:
-        if mark[node.id] == 0 and node.owner != None and node.owner.id == player_id:
-            DFS(node.id, main_game, player_id)
+    ans = [node_id]
+    stack = [iter(main_game.nodes[node_id].adj_main_map)]
+    while stack:
+        for node in stack[-1]:
+            if mark[node.id] == 0 and node.owner != None and node.owner.id == player_id:
+                mark[node.id] = 1
+                ans.append(node.id)
+                stack.append(iter(node.adj_main_map))
+                break
+        else:
+            stack.pop()
+    return ans
 
 
 def find_reachable(node_id, main_game):
-    global ans
-    global mark
-
-    mark = [0 for i in range(len(main_game.nodes))]
-    ans.clear()
     if main_game.nodes[node_id].owner == None:
-        return ans
-    DFS(node_id, main_game, main_game.nodes[node_id].owner.id)
-    return ans 
\ No newline at end of file
+        return []
+    return DFS(node_id, main_game, main_game.nodes[node_id].owner.id)
@@ -0,0 +1,288 @@
+'''
+the analysis of a map that doesn't change during the game, it's computed once for each map and saved on disk
+the analysis of a map file is saved in the map_cache folder (next to the maps folder) in a folder named by the hash of the content
+of the map file, so an edited map gets a new analysis. each field is a .npy file and it's memory-mapped when it's loaded
+
+fields:
+## indptr, indices: the adjacency of the nodes in the CSR format, the adjacent nodes of the node i are indices[indptr[i]:indptr[i + 1]]
+## distances: the number of edges between each two nodes (-1 if there is no path), only for the maps up to MAXIMUM_ALL_PAIRS nodes
+## ring_order, ring_starts: the BFS rings of the nodes, the nodes at the distance k of the node i are
+##                          ring_order[i, ring_starts[i, k]:ring_starts[i, k + 1]] (only with the distances)
+## articulation_points: the nodes that disconnect the map if they are removed
+## bridges: the edges [u, v] that disconnect the map if they are removed
+## chokepoints: the articulation points that separate strategic nodes from each other
+## strategic_nodes, strategic_scores: the strategic nodes and their scores
+## strategic_distances: the distances from each strategic node to all the nodes
+## strategic_closeness: sum(score / (1 + distance)) of the strategic nodes for each node
+## strategic_betweenness: the number of the shortest paths between the pairs of strategic nodes that pass each node
+##                        (a path with several shortest versions counts the fraction of them that pass the node)
+'''
+
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+
+from src.tools.map_loader import load_map
+
+
+VERSION = 1 # the version of the format of the analysis, the old analyses are not used after it changes
+MAXIMUM_ALL_PAIRS = 4096 # the all-pairs distances and the rings are computed only for the maps up to this number of nodes
+FIELDS = ['indptr', 'indices', 'distances', 'ring_order', 'ring_starts', 'articulation_points', 'bridges', 'chokepoints',
+          'strategic_nodes', 'strategic_scores', 'strategic_distances', 'strategic_closeness', 'strategic_betweenness']
+
+
+class MapAnalysis:
+    def __init__(self, map_hash, number_of_nodes, fields) -> None:
+        self.hash = map_hash
+        self.number_of_nodes = number_of_nodes
+        for name in FIELDS:
+            setattr(self, name, fields[name])
+
+    def ring(self, node_id, level):
+        # the nodes at the distance level of the node
+        return self.ring_order[node_id, self.ring_starts[node_id, level]:self.ring_starts[node_id, level + 1]]
+
+    def rings(self, node_id):
+        # the rings of the node: {level: [node_id, ...]} up to the farthest node
+        starts = self.ring_starts[node_id]
+        return {level: self.ring_order[node_id, starts[level]:starts[level + 1]].tolist()
+                for level in range(len(starts) - 1) if starts[level + 1] > starts[level]}
+
+    def to_dict(self):
+        # the analysis as a json object (lists of integers and floats)
+        output_dict = {'hash': self.hash, 'number_of_nodes': self.number_of_nodes}
+        for name in FIELDS:
+            output_dict[name] = np.asarray(getattr(self, name)).tolist()
+        return output_dict
+
+    def save(self, path):
+        # save the fields in a new folder, the folder is renamed at the end so a half saved analysis is never read
+        temporary_path = path + '.tmp-' + str(os.getpid())
+        os.makedirs(temporary_path, exist_ok=True)
+        for name in FIELDS:
+            np.save(os.path.join(temporary_path, name + '.npy'), getattr(self, name))
+        with open(os.path.join(temporary_path, 'meta.json'), 'w') as meta_file:
+            json.dump({'hash': self.hash, 'number_of_nodes': self.number_of_nodes, 'version': VERSION}, meta_file)
+        try:
+            os.rename(temporary_path, path)
+        except OSError:
+            # another process saved the same analysis first
+            shutil.rmtree(temporary_path, ignore_errors=True)
+
+    @staticmethod
+    def load(path):
+        with open(os.path.join(path, 'meta.json')) as meta_file:
+            meta = json.load(meta_file)
+        fields = {}
+        for name in FIELDS:
+            try:
+                fields[name] = np.load(os.path.join(path, name + '.npy'), mmap_mode='r')
+            except ValueError:
+                # the empty arrays can't be memory-mapped
+                fields[name] = np.load(os.path.join(path, name + '.npy'))
+        return MapAnalysis(meta['hash'], meta['number_of_nodes'], fields)
+
+
+def map_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()[:16]
+
+
+def get_csr(number_of_nodes, edges):
+    # the adjacency of the nodes in the CSR format, the adjacent nodes of each node are sorted and repeated edges are removed
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    if edges.size and (edges.min() < 0 or edges.max() >= number_of_nodes):
+        raise ValueError(f'the edges have node ids out of the range 0 to {number_of_nodes - 1}')
+    pairs = np.concatenate([edges, edges[:, ::-1]])
+    pairs = np.unique(pairs[pairs[:, 0] != pairs[:, 1]], axis=0)
+    indptr = np.zeros(number_of_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(pairs[:, 0], minlength=number_of_nodes), out=indptr[1:])
+    return indptr, pairs[:, 1].astype(np.int32)
+
+
+def expand(indptr, indices, nodes):
+    # the adjacent nodes of each node of nodes: (the index of the node in nodes, the adjacent node) for each edge
+    degrees = indptr[nodes + 1] - indptr[nodes]
+    owners = np.repeat(np.arange(len(nodes)), degrees)
+    offsets = np.arange(len(owners)) - np.repeat(np.cumsum(degrees) - degrees, degrees)
+    return owners, indices[indptr[nodes][owners] + offsets]
+
+
+def bfs(indptr, indices, sources, count_paths=False):
+    """
+        the distances from each source to all the nodes (len(sources) x number_of_nodes, -1 if there is no path)
+        the BFS of all the sources is done together, level by level, with the frontier as (source, node) pairs
+        if count_paths is True the number of the shortest paths from each source to each node is also returned
+    """
+    number_of_nodes = len(indptr) - 1
+    sources = np.asarray(sources, dtype=np.int64)
+    dtype = np.int16 if number_of_nodes < np.iinfo(np.int16).max else np.int32
+    distances = np.full((len(sources), number_of_nodes), -1, dtype=dtype)
+    flat_distances = distances.reshape(-1)
+    rows = np.arange(len(sources))
+    distances[rows, sources] = 0
+    counts = flat_counts = None
+    if count_paths:
+        counts = np.zeros((len(sources), number_of_nodes))
+        flat_counts = counts.reshape(-1)
+        counts[rows, sources] = 1
+    claims = np.zeros(distances.size, dtype=np.int32) # the last edge that reached each (source, node) pair, to remove the repeated pairs
+    nodes = sources
+    level = 0
+    while len(rows):
+        level += 1
+        owners, adjacents = expand(indptr, indices, nodes)
+        rows = rows[owners]
+        keys = rows * number_of_nodes + adjacents
+        if count_paths:
+            parents = rows * number_of_nodes + nodes[owners]
+        new = flat_distances[keys] == -1
+        if count_paths:
+            # every edge from the last level to a node of this level is the last edge of some shortest paths
+            on_path = new | (flat_distances[keys] == level)
+            np.add.at(flat_counts, keys[on_path], flat_counts[parents[on_path]])
+        keys = keys[new]
+        flat_distances[keys] = level
+        # the next frontier is the new pairs without repetition
+        claims[keys] = np.arange(len(keys))
+        keys = keys[claims[keys] == np.arange(len(keys))]
+        rows, nodes = keys // number_of_nodes, keys % number_of_nodes
+    return distances, counts
+
+
+def get_rings(distances):
+    # the nodes of each row sorted by their distance, and the start of each distance in the sorted row
+    farthest = int(distances.max()) if distances.size else 0
+    levels = np.where(distances < 0, farthest + 1, distances).astype(np.int64)
+    ring_order = np.argsort(levels, axis=1, kind='stable').astype(np.int32)
+    counts = np.bincount((np.arange(len(distances))[:, None] * (farthest + 2) + levels).ravel(),
+                         minlength=len(distances) * (farthest + 2)).reshape(len(distances), farthest + 2)
+    ring_starts = np.zeros((len(distances), farthest + 2), dtype=np.int32)
+    np.cumsum(counts[:, :-1], axis=1, out=ring_starts[:, 1:])
+    return ring_order, ring_starts
+
+
+def get_cut_nodes(indptr, indices, is_strategic):
+    """
+        the articulation points, the bridges and the chokepoints with the DFS of Tarjan (without recursion, in O(nodes + edges))
+        a child c of an articulation point v (low[c] >= order[v]) is the root of a part of the map that is separated from the rest
+        of the map by v, v is a chokepoint if that part and the rest of the map (without v) both have strategic nodes
+    """
+    number_of_nodes = len(indptr) - 1
+    order = [-1] * number_of_nodes # the order that the nodes are visited in
+    low = [0] * number_of_nodes
+    strategics = [0] * number_of_nodes # the number of the strategic nodes under each node in the DFS tree
+    articulation_points, bridges, chokepoints = set(), [], set()
+    counter = 0
+    for root in range(number_of_nodes):
+        if order[root] != -1:
+            continue
+        component = []
+        separated = [] # (v, c) of the parts that are separated by the articulation points
+        order[root] = low[root] = counter
+        counter += 1
+        stack = [(root, -1, indptr[root])]
+        while stack:
+            node, parent, position = stack[-1]
+            if position < indptr[node + 1]:
+                stack[-1] = (node, parent, position + 1)
+                adjacent = int(indices[position])
+                if order[adjacent] == -1:
+                    order[adjacent] = low[adjacent] = counter
+                    counter += 1
+                    stack.append((adjacent, node, indptr[adjacent]))
+                elif adjacent != parent:
+                    low[node] = min(low[node], order[adjacent])
+                continue
+
+            stack.pop()
+            component.append(node)
+            strategics[node] += int(is_strategic[node])
+            if parent == -1:
+                continue
+            low[parent] = min(low[parent], low[node])
+            strategics[parent] += strategics[node]
+            if low[node] > order[parent]:
+                bridges.append([min(parent, node), max(parent, node)])
+            if low[node] >= order[parent]:
+                separated.append((parent, node))
+
+        children = sum(1 for parent, node in separated if parent == root)
+        total = strategics[root]
+        for parent, node in separated:
+            if parent == root and children < 2:
+                continue
+            articulation_points.add(parent)
+            if 0 < strategics[node] < total - int(is_strategic[parent]):
+                chokepoints.add(parent)
+
+    return (np.array(sorted(articulation_points), dtype=np.int32), np.array(sorted(bridges), dtype=np.int32).reshape(-1, 2),
+            np.array(sorted(chokepoints), dtype=np.int32))
+
+
+def get_betweenness(strategic_nodes, strategic_distances, strategic_counts):
+    # the shortest paths between the pairs of strategic nodes that pass each node (the strategic nodes of the pair are not counted)
+    betweenness = np.zeros(strategic_distances.shape[1])
+    distances = strategic_distances.astype(np.int64)
+    for s in range(len(strategic_nodes)):
+        for t in range(s + 1, len(strategic_nodes)):
+            target = distances[s, strategic_nodes[t]]
+            if target <= 0:
+                continue
+            on_path = (distances[s] > 0) & (distances[t] > 0) & (distances[s] + distances[t] == target)
+            betweenness[on_path] += strategic_counts[s, on_path] * strategic_counts[t, on_path] / strategic_counts[s, strategic_nodes[t]]
+    return betweenness
+
+
+def analyze_map(map_json, key=None):
+    # compute the analysis of a map (the fields of a map file as lists or numpy arrays)
+    number_of_nodes = map_json['number_of_nodes']
+    indptr, indices = get_csr(number_of_nodes, map_json['list_of_edges'])
+    strategic_nodes = np.asarray(map_json['strategic_nodes'], dtype=np.int32)
+    strategic_scores = np.asarray(map_json['scores_of_strategic_nodes'], dtype=np.int32)
+
+    if number_of_nodes <= MAXIMUM_ALL_PAIRS:
+        distances, _ = bfs(indptr, indices, np.arange(number_of_nodes))
+        ring_order, ring_starts = get_rings(distances)
+    else:
+        distances = np.zeros((0, 0), dtype=np.int16)
+        ring_order, ring_starts = np.zeros((0, 0), dtype=np.int32), np.zeros((0, 0), dtype=np.int32)
+
+    is_strategic = np.zeros(number_of_nodes, dtype=bool)
+    is_strategic[strategic_nodes] = True
+    articulation_points, bridges, chokepoints = get_cut_nodes(indptr, indices, is_strategic)
+
+    strategic_distances, strategic_counts = bfs(indptr, indices, strategic_nodes, count_paths=True)
+    reachable = strategic_distances >= 0
+    # the unreachable nodes (distance -1) are skipped, so there is no division by zero
+    strategic_closeness = np.divide(np.broadcast_to(strategic_scores[:, None], strategic_distances.shape), 1.0 + strategic_distances,
+                                    out=np.zeros(strategic_distances.shape), where=reachable).sum(axis=0)
+    strategic_betweenness = get_betweenness(strategic_nodes, strategic_distances, strategic_counts)
+
+    fields = {'indptr': indptr, 'indices': indices, 'distances': distances, 'ring_order': ring_order, 'ring_starts': ring_starts,
+              'articulation_points': articulation_points, 'bridges': bridges, 'chokepoints': chokepoints,
+              'strategic_nodes': strategic_nodes, 'strategic_scores': strategic_scores, 'strategic_distances': strategic_distances,
+              'strategic_closeness': strategic_closeness, 'strategic_betweenness': strategic_betweenness}
+    return MapAnalysis(key, number_of_nodes, fields)
+
+
+def get_cache_path(map_file):
+    # the map_cache folder next to the maps folder
+    return os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(map_file))), 'map_cache')
+
+
+def load_map_analysis(map_file, cache_path=None):
+    # load the analysis of the map file from the cache, or compute and save it if it's not in the cache
+    with open(map_file, 'rb') as json_file:
+        content = json_file.read()
+    key = map_hash(content)
+    path = os.path.join(cache_path or get_cache_path(map_file), f'{key}-v{VERSION}')
+    if os.path.exists(os.path.join(path, 'meta.json')):
+        return MapAnalysis.load(path)
+
+    analysis = analyze_map(load_map(map_file).to_dict(), key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    analysis.save(path)
+    return MapAnalysis.load(path)
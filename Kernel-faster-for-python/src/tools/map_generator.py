@@ -0,0 +1,132 @@
+'''
+a generator of random maps in the format of the maps folder, for testing the kernel and the bots on larger maps than the bundled ones
+(they are ~42 nodes with ~85 edges, the average degree is ~4)
+the generated maps are connected and have no duplicate edges or self-loops, the same arguments always give the same map
+
+topologies:
+## grid: the nodes in rows of ceil(sqrt(number_of_nodes)) nodes, each node is connected to its right and down neighbors
+## planar: the grid with a random diagonal in each cell (a planar triangulation), the edges out of a random spanning tree are
+##         removed at random until the average degree is ~4, so it looks like the bundled maps: regions with a few ways between them
+## small_world: the Watts-Strogatz model, a ring that each node is connected to the next two nodes,
+##              the edges to the second next node are rewired to a random node with the probability of rewire
+
+usage: python -m src.tools.map_generator 10000 planar maps/planar10000.json [seed]
+'''
+
+import json
+import sys
+
+import numpy as np
+
+
+TOPOLOGIES = ['grid', 'planar', 'small_world']
+AVERAGE_DEGREE = 4 # the average degree of the planar maps (the bundled maps have ~4)
+REWIRE = 0.1 # the probability of rewiring an edge of the small_world maps
+
+
+def grid_edges(number_of_nodes):
+    # the right and down edges of the grid, and the number of columns
+    columns = int(np.ceil(np.sqrt(number_of_nodes)))
+    nodes = np.arange(number_of_nodes)
+    right = nodes[(nodes % columns < columns - 1) & (nodes + 1 < number_of_nodes)]
+    down = nodes[nodes + columns < number_of_nodes]
+    edges = np.concatenate([np.stack([right, right + 1], axis=1), np.stack([down, down + columns], axis=1)])
+    return edges, columns
+
+
+def spanning_tree(number_of_nodes, edges):
+    # a boolean mask of the edges of a spanning tree (Kruskal on the edges in their order, the union-find halves the paths)
+    parents = list(range(number_of_nodes))
+
+    def find(node):
+        while parents[node] != node:
+            parents[node] = parents[parents[node]]
+            node = parents[node]
+        return node
+
+    in_tree = np.zeros(len(edges), dtype=bool)
+    for i, (u, v) in enumerate(edges.tolist()):
+        root_u, root_v = find(u), find(v)
+        if root_u != root_v:
+            parents[root_u] = root_v
+            in_tree[i] = True
+    return in_tree
+
+
+def planar_edges(number_of_nodes, rng):
+    edges, columns = grid_edges(number_of_nodes)
+
+    # the cells that all their four corners exist: a (top left), a + 1, a + columns and a + columns + 1
+    corners = np.arange(number_of_nodes)
+    corners = corners[(corners % columns < columns - 1) & (corners + columns + 1 < number_of_nodes)]
+    flip = rng.random(len(corners)) < 0.5
+    diagonals = np.where(flip[:, None], np.stack([corners + 1, corners + columns], axis=1),
+                         np.stack([corners, corners + columns + 1], axis=1))
+    edges = np.concatenate([edges, diagonals])
+    edges = edges[rng.permutation(len(edges))]
+
+    in_tree = spanning_tree(number_of_nodes, edges)
+    extra = len(edges) - in_tree.sum()
+    keep = min(max(number_of_nodes * AVERAGE_DEGREE // 2 - in_tree.sum(), 0), extra)
+    keep_extra = np.zeros(extra, dtype=bool)
+    keep_extra[rng.choice(extra, keep, replace=False)] = True
+    in_tree[~in_tree] = keep_extra
+    return edges[in_tree]
+
+
+def small_world_edges(number_of_nodes, rng):
+    nodes = np.arange(number_of_nodes)
+    ring = np.stack([nodes, (nodes + 1) % number_of_nodes], axis=1)
+    second = np.stack([nodes, (nodes + 2) % number_of_nodes], axis=1)
+    rewired = rng.random(number_of_nodes) < REWIRE
+    second[rewired, 1] = rng.integers(0, number_of_nodes, rewired.sum())
+    return np.concatenate([ring, second])
+
+
+def unique_edges(number_of_nodes, edges):
+    # drop the self-loops and the duplicate edges (in both directions), the edges are sorted as [smaller id, larger id]
+    edges = np.sort(edges, axis=1)
+    edges = edges[edges[:, 0] != edges[:, 1]]
+    keys = np.unique(edges[:, 0].astype(np.int64) * number_of_nodes + edges[:, 1])
+    return np.stack([keys // number_of_nodes, keys % number_of_nodes], axis=1)
+
+
+def generate_map(number_of_nodes, topology='planar', seed=0, number_of_strategic_nodes=6):
+    # return a random map as a dictionary in the format of the map files
+    # the strategic nodes are random nodes with random scores from 1 to 6 like the bundled maps
+    if topology not in TOPOLOGIES:
+        raise ValueError(f"topology {topology!r} is not valid it should be one of " + ', '.join(TOPOLOGIES))
+    if number_of_nodes < max(number_of_strategic_nodes, 3):
+        raise ValueError(f"number_of_nodes should be at least {max(number_of_strategic_nodes, 3)}")
+
+    rng = np.random.default_rng(seed)
+    if topology == 'grid':
+        edges, _ = grid_edges(number_of_nodes)
+    elif topology == 'planar':
+        edges = planar_edges(number_of_nodes, rng)
+    else:
+        edges = small_world_edges(number_of_nodes, rng)
+    edges = unique_edges(number_of_nodes, edges)
+
+    strategic_nodes = rng.choice(number_of_nodes, number_of_strategic_nodes, replace=False)
+    scores = rng.integers(1, 7, number_of_strategic_nodes)
+    return {
+        'number_of_nodes': int(number_of_nodes),
+        'number_of_edges': len(edges),
+        'list_of_edges': edges.tolist(),
+        'strategic_nodes': strategic_nodes.tolist(),
+        'scores_of_strategic_nodes': scores.tolist(),
+    }
+
+
+def save_map(map_json, path):
+    with open(path, 'w') as map_file:
+        json.dump(map_json, map_file)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 4:
+        print(__doc__.strip().splitlines()[-1])
+        sys.exit(1)
+    seed = int(sys.argv[4]) if len(sys.argv) > 4 else 0
+    save_map(generate_map(int(sys.argv[1]), sys.argv[2], seed), sys.argv[3])
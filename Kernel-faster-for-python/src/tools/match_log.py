@@ -0,0 +1,130 @@
+'''
+write the log of a match as JSON Lines while the match runs (one record in each line)
+and read it back as the log dictionary of the game (the schema of the json log files)
+
+the records are:
+## ["initialize", [player_id, node_id]]: a troop that is put in the initialize phase
+## ["turn", turn_number, {...}]: the log of a turn (nodes_owner, troop_count, add_troop, attack, fortify, fort)
+##     it's a keyframe: it has the owner, troops and fort troops of all the nodes
+## ["delta", turn_number, {...}]: the log of a turn between two keyframes (see log_keyframe_interval in the config)
+##     changes: node_id: [owner, number_of_troops] of the nodes that changed since the beginning of the last turn
+##     fort_changes: node_id: number_of_fort_troops of the nodes that changed in the turn (or fort for all the nodes)
+##     and add_troop, attack and fortify like the turn records
+##     the turn and delta records also have metrics if metrics is true in the config (see src/tools/metrics.py)
+## ["metrics", {...}]: the metrics of all the API calls of the match (if metrics is true in the config)
+## ["score", [score, ...]]: the scores at the end of the match
+
+usage: python -m src.tools.match_log log/<name>.jsonl
+converts the streaming log to the json log (log/<name>.json)
+'''
+
+import bisect
+import json
+import sys
+
+
+class MatchLogWriter:
+    def __init__(self, path) -> None:
+        self.path = path
+        self.file = open(path, 'w')
+
+    def write(self, record):
+        # write the record in a line, the line is flushed so the log is kept if the match crashes
+        self.file.write(json.dumps(record, separators=(',', ':')) + '\n')
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def apply_turn(board, record_type, data):
+    # update the board ([nodes_owner, troop_count, fort]) with a turn or delta record
+    # and return the turn in the schema of the json log
+    if record_type == 'turn':
+        board[:] = [list(data['nodes_owner']), list(data['troop_count']), list(data['fort'])]
+        return data
+
+    nodes_owner, troop_count, fort = board
+    for node_id, (owner, troops) in data['changes'].items():
+        nodes_owner[int(node_id)] = owner
+        troop_count[int(node_id)] = troops
+    # the turn starts with the owner and troops of the board and ends with its fort troops
+    turn = {"nodes_owner": list(nodes_owner), "troop_count": list(troop_count),
+            "add_troop": data['add_troop'], "attack": data['attack'], "fortify": data['fortify']}
+    if 'fort' in data:
+        fort[:] = data['fort']
+    else:
+        for node_id, fort_troops in data['fort_changes'].items():
+            fort[int(node_id)] = fort_troops
+    turn["fort"] = list(fort)
+    if 'metrics' in data:
+        turn["metrics"] = data['metrics']
+    return turn
+
+
+def load_match_log(path):
+    # read a streaming log and return the log dictionary of the game
+    log = {"initialize": [], "turns": {}}
+    board = []
+    with open(path, 'r') as log_file:
+        for line in log_file:
+            # the last line of a crashed match can be incomplete
+            if not line.endswith('\n'):
+                break
+            record = json.loads(line)
+            if record[0] == 'initialize':
+                log['initialize'].append(record[1])
+            elif record[0] in ['turn', 'delta']:
+                log['turns']['turn'+str(record[1])] = apply_turn(board, record[0], record[2])
+            elif record[0] == 'metrics':
+                log['metrics'] = record[1]
+            elif record[0] == 'score':
+                log['score'] = record[1]
+    return log
+
+
+class MatchLogReader:
+    # read any turn of a streaming log without reading the whole log
+    # the offsets of the turns are found once, then a turn is built from its last keyframe (at most log_keyframe_interval records)
+    def __init__(self, path) -> None:
+        self.file = open(path, 'rb')
+        self.offsets = {} # turn_number: the offset of its record in the file
+        self.keyframes = [] # the turn numbers of the keyframes (sorted)
+        offset = 0
+        for line in self.file:
+            if not line.endswith(b'\n'):
+                break
+            if line.startswith(b'["turn",') or line.startswith(b'["delta",'):
+                turn_number = int(line.split(b',', 2)[1])
+                self.offsets[turn_number] = offset
+                if line.startswith(b'["turn",'):
+                    self.keyframes.append(turn_number)
+            offset += len(line)
+
+    def read_record(self, turn_number):
+        self.file.seek(self.offsets[turn_number])
+        return json.loads(self.file.readline())
+
+    def turn_numbers(self):
+        return sorted(self.offsets)
+
+    def get_turn(self, turn_number):
+        # return the turn in the schema of the json log
+        if turn_number not in self.offsets:
+            raise KeyError('turn' + str(turn_number) + ' is not in the log')
+        keyframe = self.keyframes[bisect.bisect_right(self.keyframes, turn_number) - 1]
+        board = []
+        for number in range(keyframe, turn_number + 1):
+            if number in self.offsets:
+                record = self.read_record(number)
+                turn = apply_turn(board, record[0], record[2])
+        return turn
+
+    def close(self):
+        self.file.close()
+
+
+if __name__ == '__main__':
+    for path in sys.argv[1:]:
+        with open(path.rsplit('.', 1)[0] + '.json', 'w') as json_file:
+            json.dump(load_match_log(path), json_file)
@@ -0,0 +1,217 @@
+'''
+read the match logs of the log folder (the json logs and the streaming jsonl logs) without loading them
+the log files are memory-mapped and indexed once: the offset of each turn is saved
+and the board of a turn is built only when it's asked for (as numpy arrays)
+
+usage: python -m src.tools.replay <log folder> <query> [--map maps/map1.json]
+queries:
+## summary: the number of games and turns, the wins and the mean score of each player
+## strategic: the mean number of strategic nodes of each player in each turn (needs --map)
+## troops: the mean number of troops of each player in each turn
+the games are read one by one, so the memory doesn't grow with the number of games
+'''
+
+import argparse
+import bisect
+import json
+import mmap
+import os
+import re
+
+import numpy as np
+
+
+class Replay:
+    # a log of a match, the boards of its turns are built lazily
+    # the board of a turn is: the owner and troops of the nodes at the beginning of the turn
+    # and the fort troops of the nodes at the end of the turn (like the json log)
+    def __init__(self, path) -> None:
+        self.path = path
+        with open(path, 'rb') as log_file:
+            self.map = mmap.mmap(log_file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.streaming = path.endswith('.jsonl')
+        self.offsets = {} # turn_number: (start, end) of its record in the file
+        self.keyframes = [] # the turn numbers that have the whole board (sorted)
+        self.score = None
+        self.cache = None # (turn_number, board) of the last built board, so the next turn is built from it
+        if self.streaming:
+            self.index_streaming()
+        else:
+            self.index_json()
+        self.turn_numbers = sorted(self.offsets)
+        self.number_of_nodes = len(self.read_turn(self.keyframes[0])['nodes_owner']) if self.keyframes else 0
+
+    def index_streaming(self):
+        # find the records of the turns in the jsonl log
+        start = 0
+        size = len(self.map)
+        while start < size:
+            end = self.map.find(b'\n', start)
+            # the last line of a crashed match can be incomplete
+            if end == -1:
+                break
+            prefix = self.map[start:start + 16]
+            if prefix.startswith(b'["turn",') or prefix.startswith(b'["delta",'):
+                turn_number = int(prefix.split(b',', 2)[1])
+                self.offsets[turn_number] = (start, end)
+                if prefix.startswith(b'["turn",'):
+                    self.keyframes.append(turn_number)
+            elif prefix.startswith(b'["score",'):
+                self.score = json.loads(self.map[start:end])[1]
+            start = end + 1
+
+    def index_json(self):
+        # find the turns in the json log, all of them have the whole board
+        # the keys of the turns are like "turn12": {...}, the next key is the end of each turn
+        starts = [(int(match.group(1)), match.end() - 1) for match in re.finditer(rb'"turn(\d+)": ?\{', self.map)]
+        score = self.map.rfind(b'"score"')
+        for i, (turn_number, start) in enumerate(starts):
+            end = starts[i + 1][1] if i + 1 < len(starts) else (score if score != -1 else len(self.map))
+            self.offsets[turn_number] = (start, end)
+            self.keyframes.append(turn_number)
+        if score != -1:
+            self.score = json.JSONDecoder().raw_decode(self.map[score:].decode().split(':', 1)[1].strip())[0]
+
+    def read_turn(self, turn_number):
+        # return the record of the turn (a turn of the json log or a delta)
+        start, end = self.offsets[turn_number]
+        if self.streaming:
+            return json.loads(self.map[start:end])[2]
+        return json.JSONDecoder().raw_decode(self.map[start:end].decode())[0]
+
+    def board(self, turn_number):
+        # return the owners, troops and fort troops of the nodes in the turn as numpy arrays
+        # it reads at most the records from the last keyframe (log_keyframe_interval records)
+        if turn_number not in self.offsets:
+            raise KeyError('turn' + str(turn_number) + ' is not in ' + self.path)
+        keyframe = self.keyframes[bisect.bisect_right(self.keyframes, turn_number) - 1]
+        # continue from the cached board if it's between the keyframe and the turn
+        if self.cache is not None and keyframe <= self.cache[0] <= turn_number:
+            board = self.cache[1]
+            first = bisect.bisect_right(self.turn_numbers, self.cache[0])
+        else:
+            board = None
+            first = bisect.bisect_left(self.turn_numbers, keyframe)
+
+        for number in self.turn_numbers[first:bisect.bisect_right(self.turn_numbers, turn_number)]:
+            board = self.apply(board, self.read_turn(number))
+        self.cache = (turn_number, board)
+        return tuple(array.copy() for array in board)
+
+    def apply(self, board, data):
+        # return the board of a turn from the board of the last turn and the record of the turn
+        if 'nodes_owner' in data:
+            return [np.array(data['nodes_owner'], dtype=np.int32),
+                    np.array(data['troop_count'], dtype=np.int32),
+                    np.array(data['fort'], dtype=np.int32)]
+        owners, troops, forts = [array.copy() for array in board]
+        if data['changes']:
+            node_ids = np.fromiter(map(int, data['changes']), dtype=np.int64, count=len(data['changes']))
+            values = np.array(list(data['changes'].values()), dtype=np.int32)
+            owners[node_ids] = values[:, 0]
+            troops[node_ids] = values[:, 1]
+        if 'fort' in data:
+            forts[:] = data['fort']
+        else:
+            for node_id, fort_troops in data['fort_changes'].items():
+                forts[int(node_id)] = fort_troops
+        return [owners, troops, forts]
+
+    def turns(self):
+        # yield (turn_number, record of the turn, owners, troops, fort troops) for all the turns in order
+        board = None
+        for turn_number in self.turn_numbers:
+            data = self.read_turn(turn_number)
+            board = self.apply(board, data)
+            yield (turn_number, data, *board)
+
+    def boards(self):
+        # yield (turn_number, owners, troops, fort troops) for all the turns in order
+        for turn_number, data, owners, troops, forts in self.turns():
+            yield (turn_number, owners, troops, forts)
+
+    def close(self):
+        self.map.close()
+
+
+class ReplayIndex:
+    # the index of the logs of a folder: the turns, number of nodes and score of each game
+    # the games are opened one by one when they are read
+    def __init__(self, path) -> None:
+        self.games = [] # {'path', 'first_turn', 'last_turn', 'number_of_nodes', 'score'} for each game
+        for name in sorted(os.listdir(path)):
+            if not (name.endswith('.json') or name.endswith('.jsonl')):
+                continue
+            game_path = os.path.join(path, name)
+            if os.path.getsize(game_path) == 0:
+                continue
+            replay = Replay(game_path)
+            if replay.turn_numbers:
+                self.games.append({'path': game_path, 'first_turn': replay.turn_numbers[0], 'last_turn': replay.turn_numbers[-1],
+                                   'number_of_nodes': replay.number_of_nodes, 'score': replay.score})
+            replay.close()
+
+    def replays(self):
+        # yield the Replay of each game, the last one is closed before the next one is opened
+        for game in self.games:
+            replay = Replay(game['path'])
+            yield replay
+            replay.close()
+
+
+def summary(index):
+    number_of_players = max((len(game['score']) for game in index.games if game['score'] is not None), default=0)
+    wins = np.zeros(number_of_players, dtype=np.int64)
+    scores = np.zeros(number_of_players)
+    finished = 0
+    for game in index.games:
+        if game['score'] is None:
+            continue
+        finished += 1
+        wins[int(np.argmax(game['score']))] += 1
+        scores += game['score']
+    turns = sum(game['last_turn'] - game['first_turn'] + 1 for game in index.games)
+    print(f"games: {len(index.games)} (finished: {finished})  turns: {turns}")
+    for player_id in range(number_of_players):
+        print(f"player {player_id}: wins: {wins[player_id]}  mean score: {scores[player_id] / max(finished, 1):.1f}")
+
+
+def per_turn(index, value, number_of_players=3):
+    # print the mean of value(owners, troops, forts, player_id) in each turn over the games that have the turn
+    sums = {} # turn_number: the sum of the values of each player
+    counts = {} # turn_number: the number of games
+    for replay in index.replays():
+        for turn_number, owners, troops, forts in replay.boards():
+            if turn_number not in sums:
+                sums[turn_number] = np.zeros(number_of_players)
+                counts[turn_number] = 0
+            for player_id in range(number_of_players):
+                sums[turn_number][player_id] += value(owners, troops, forts, player_id)
+            counts[turn_number] += 1
+    print('turn  games  ' + '  '.join(f'player {player_id:<3}' for player_id in range(number_of_players)))
+    for turn_number in sorted(sums):
+        means = sums[turn_number] / counts[turn_number]
+        print(f"{turn_number:4}  {counts[turn_number]:5}  " + '  '.join(f'{mean:10.2f}' for mean in means))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='query the match logs of a folder')
+    parser.add_argument('path', type=str, help='the folder of the logs')
+    parser.add_argument('query', type=str, choices=['summary', 'strategic', 'troops'], help='the query')
+    parser.add_argument('--map', type=str, help='the map of the games (for the strategic query)')
+    parser.add_argument('--players', type=int, default=3, help='the number of players')
+    args = parser.parse_args()
+
+    index = ReplayIndex(args.path)
+    if not index.games:
+        print('there is no log in', args.path)
+    elif args.query == 'summary':
+        summary(index)
+    elif args.query == 'strategic':
+        if args.map is None:
+            parser.error('the strategic query needs the map of the games (--map)')
+        with open(args.map, 'r') as map_file:
+            strategic_nodes = np.array(json.load(map_file)['strategic_nodes'])
+        per_turn(index, lambda owners, troops, forts, player_id: np.count_nonzero(owners[strategic_nodes] == player_id), args.players)
+    elif args.query == 'troops':
+        per_turn(index, lambda owners, troops, forts, player_id: troops[owners == player_id].sum(), args.players)
@@ -0,0 +1,47 @@
+# Description: measure the received bytes and the time of the board APIs (get_owners, get_troops_count and
+# get_number_of_fort_troops) over a full match with and without the ETag / If-None-Match cache of the client
+# run it from the Kernel-web-server-version directory: python benchmarks/bench_etag.py
+
+import time
+import harness
+
+
+def measure_board_requests(client_class):
+    # wrap the board APIs of the client to measure their time
+    timings = {'calls': 0, 'seconds': 0.0}
+
+    def timed(method):
+        def wrapper(self, *args, **kwargs):
+            start = time.perf_counter()
+            output = method(self, *args, **kwargs)
+            timings['seconds'] += time.perf_counter() - start
+            timings['calls'] += 1
+            return output
+        return wrapper
+
+    for name in ['get_owners', 'get_number_of_troops', 'get_number_of_fort_troops']:
+        setattr(client_class, name, timed(getattr(client_class, name)))
+    return timings
+
+
+if __name__ == '__main__':
+    client_class = harness.load_client()
+    timings = measure_board_requests(client_class)
+    app, main_game = harness.create_app(debug=False, debug_dice=False)
+    port = harness.serve(app)
+
+    results = {}
+    for use_etag in [False, True]:
+        harness.reset_game(main_game, main_game.config)
+        clients = harness.login_clients(main_game, port, client_class)
+        for client in clients:
+            client.use_etag = use_etag
+        timings.update(calls=0, seconds=0.0)
+        match_time = harness.play_match(main_game, clients, seed=1)
+        stats = {key: sum(client.etag_stats[key] for client in clients) for key in clients[0].etag_stats}
+        results[use_etag] = (match_time, dict(timings), stats)
+
+    for use_etag, (match_time, timing, stats) in results.items():
+        print(f"use_etag={use_etag!s:5}  match: {match_time:6.2f} s  board requests: {timing['calls']:6}"
+              f"  board time: {timing['seconds']:6.2f} s ({timing['seconds'] / timing['calls'] * 1e3:.3f} ms/request)"
+              f"  304 responses: {stats['not_modified']:6}  saved bytes: {stats['saved_bytes']}")
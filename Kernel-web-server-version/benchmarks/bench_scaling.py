@@ -0,0 +1,99 @@
+# Description: the time, the memory and the size of the responses of the read APIs of the web kernel
+# on generated maps of growing size (src/tools/map_generator.py)
+# the nodes are owned by the three players in three blocks of ids and the APIs are requested by player 0 in its attack state,
+# get_reachable starts from the first node of player 0
+# the time is of the requests over http, the memory is the peak of the python allocations (tracemalloc) of the same request with
+# the test client of flask, because the server of werkzeug allocates a 10 MB buffer in some requests that would hide the memory of the API
+# the full matches and the find_path / find_reachable / attack steps without http are in bench_scaling.py of the faster kernel
+# run it from the Kernel-web-server-version directory:
+# python benchmarks/bench_scaling.py [--sizes 100,1000,10000,100000] [--topologies grid,planar,small_world]
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+import requests
+import harness
+from src.tools.map_generator import generate_map, save_map
+
+
+# the read APIs of the kernel: (method, arguments)
+READ_APIS = {'get_owners': ('GET', {}), 'get_troops_count': ('GET', {}), 'get_state': ('GET', {}), 'get_turn_number': ('GET', {}),
+             'get_adj': ('GET', {}), 'get_player_id': ('GET', {}), 'get_strategic_nodes': ('GET', {}),
+             'get_number_of_troops_to_put': ('GET', {}), 'get_number_of_fort_troops': ('GET', {}), 'get_reachable': ('POST', {}),
+             'get_changes': ('GET', {'since': 0}), 'get_map_analysis': ('GET', {})}
+
+
+def measure(func, repeat=1):
+    # the time of a call (the average of repeat calls), the peak of the memory of a call and the output of the last call
+    start = time.perf_counter()
+    for _ in range(repeat):
+        output = func()
+    seconds = (time.perf_counter() - start) / repeat
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak, output
+
+
+def own_nodes(main_game):
+    # the nodes are owned by the players in three blocks of ids, it's the attack state of player 0
+    number_of_players = main_game.config['number_of_players']
+    for player_id in range(number_of_players):
+        main_game.add_player(player_id)
+    for node_id, node in main_game.nodes.items():
+        player = main_game.players[node_id * number_of_players // len(main_game.nodes)]
+        node.owner = player
+        player.nodes.append(node)
+        node.number_of_troops = 2
+    main_game.turn_number = number_of_players * main_game.config['initial_troop'] + 1
+    main_game.game_state = 2
+    main_game.state = 2
+    main_game.player_turn = main_game.players[0]
+
+
+def requester(session, base_url, token, name, node_id):
+    # a request of the API, session is a requests.Session (over http) or the test client of the app
+    method, arguments = READ_APIS[name]
+    url = f'{base_url}/{name}'
+    if method == 'POST':
+        return lambda: session.post(url, headers={'x-access-token': token}, data={'node_id': node_id})
+    if isinstance(session, requests.Session):
+        return lambda: session.get(url, headers={'x-access-token': token}, params=arguments)
+    return lambda: session.get(url, headers={'x-access-token': token}, query_string=arguments)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='the read APIs of the web kernel on growing maps')
+    parser.add_argument('--sizes', type=str, default='100,1000,10000,100000', help='the numbers of nodes, separated by commas')
+    parser.add_argument('--topologies', type=str, default='grid,planar,small_world', help='the topologies of src/tools/map_generator.py')
+    parser.add_argument('--repeat', type=int, default=5, help='the number of the timed requests of each API')
+    args = parser.parse_args()
+
+    client_class = harness.load_client()
+    app, main_game = harness.create_app(debug=False, debug_dice=False)
+    port = harness.serve(app)
+    session = requests.Session()
+    test_client = app.test_client()
+    with tempfile.TemporaryDirectory() as temporary_path:
+        # the maps are in a maps folder, so their analyses are saved in the temporary folder too (see get_cache_path)
+        os.makedirs(os.path.join(temporary_path, 'maps'))
+        for topology in args.topologies.split(','):
+            for number_of_nodes in [int(size) for size in args.sizes.split(',')]:
+                map_file = os.path.join(temporary_path, 'maps', f'{topology}{number_of_nodes}.json')
+                save_map(generate_map(number_of_nodes, topology), map_file)
+                seconds, memory, _ = measure(lambda: harness.reset_game(main_game, main_game.config, map_file))
+                print(f"{topology} {number_of_nodes} nodes:\n    {'read_map':28}{seconds * 1000:12.3f} ms{memory / 2 ** 20:12.2f} MB", flush=True)
+
+                clients = harness.login_clients(main_game, port, client_class)
+                own_nodes(main_game)
+                # the analysis of the map is computed and saved in the first request, the measured requests read it from the cache
+                # the memory is measured before the requests over http, the server can still be reading the socket after a response
+                test_client.get('/get_map_analysis', headers={'x-access-token': clients[0].token})
+                memories = {name: measure(requester(test_client, '', clients[0].token, name, 0))[1] for name in READ_APIS}
+                for name in READ_APIS:
+                    seconds, _, response = measure(requester(session, f'http://127.0.0.1:{port}', clients[0].token, name, 0), args.repeat)
+                    print(f"    {name:28}{seconds * 1000:12.3f} ms{memories[name] / 2 ** 20:12.2f} MB{len(response.content) / 2 ** 10:12.1f} KB"
+                          f"  {response.status_code}", flush=True)
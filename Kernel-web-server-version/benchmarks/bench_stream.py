@@ -0,0 +1,74 @@
+# Description: measure the number of requests and the time of a full match when the clients
+# read the board from a mirror of the stream API instead of polling the board APIs
+# the boards read from the mirrors are also checked against the game state of the server
+# run it from the Kernel-web-server-version directory: python benchmarks/bench_stream.py
+
+import importlib.util
+import os
+import threading
+import time
+import harness
+
+
+def load_mirror():
+    # load the BoardMirror class of the client (src/mirror.py in the root of the repository)
+    path = os.path.join(os.path.dirname(harness.file_path), 'src', 'mirror.py')
+    spec = importlib.util.spec_from_file_location('client_mirror', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.BoardMirror
+
+
+def checked_bot(main_game, mismatches):
+    # the polling bot, but the board that is read by the client is compared with the board of the server
+    def bot(game, rng, initializing):
+        # the server sends the version in the /turn request, the benchmark starts the turns itself
+        game.known_version = main_game.version
+        get_owners = game.get_owners
+
+        def checked_get_owners():
+            owners = get_owners()
+            expected = {str(i): node.owner.id if node.owner is not None else -1 for i, node in main_game.nodes.items()}
+            if owners != expected:
+                mismatches.append(main_game.version)
+            return owners
+
+        game.get_owners = checked_get_owners
+        harness.polling_bot(game, rng, initializing)
+        del game.get_owners
+
+    return bot
+
+
+if __name__ == '__main__':
+    client_class = harness.load_client()
+    mirror_class = load_mirror()
+    app, main_game = harness.create_app(debug=False, debug_dice=False)
+
+    requests_count = {'count': 0}
+
+    @app.before_request
+    def count_requests():
+        requests_count['count'] += 1
+
+    port = harness.serve(app)
+
+    results = {}
+    for use_stream in [False, True]:
+        harness.reset_game(main_game, main_game.config)
+        clients = harness.login_clients(main_game, port, client_class)
+        if use_stream:
+            for player_id, client in enumerate(clients):
+                client.mirror = mirror_class(player_id)
+                threading.Thread(target=client.mirror.listen, args=('127.0.0.1', port, client.token), daemon=True).start()
+            while not all(client.mirror.connected for client in clients):
+                time.sleep(0.01)
+
+        mismatches = []
+        requests_count['count'] = 0
+        match_time = harness.play_match(main_game, clients, checked_bot(main_game, mismatches), seed=1)
+        # the stream requests are still open, so they are not counted
+        results[use_stream] = (match_time, requests_count['count'] - len(clients) * use_stream, len(mismatches))
+
+    for use_stream, (match_time, count, mismatches) in results.items():
+        print(f"use_stream={use_stream!s:5}  match: {match_time:6.2f} s  requests: {count:6}  mismatched boards: {mismatches}")
@@ -0,0 +1,43 @@
+# Description: measure the per-request overhead of the token_required decorator
+# with and without the verified-token cache
+# run it from the Kernel-web-server-version directory: python benchmarks/bench_token_cache.py
+
+import os
+import sys
+import timeit
+
+file_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# go to the kernel path address so the src package can be imported
+os.chdir(file_path)
+sys.path.insert(0, file_path)
+
+from flask import Flask
+import jwt
+
+
+app = Flask(__name__)
+app.config['SECRET_KEY'] = 'your-secret-key'
+app.config['main_game'] = object()
+
+with app.app_context():
+    import src.tools.check_token as check_token
+
+    @check_token.token_required
+    def endpoint(player_id):
+        return player_id
+
+    token = jwt.encode({'player_id': 0}, app.config['SECRET_KEY'], 'HS256')
+
+    def uncached_request():
+        check_token.verified_tokens.clear()
+        return endpoint()
+
+    number = 20000
+    with app.test_request_context(headers={'x-access-token': token}):
+        uncached = min(timeit.repeat(uncached_request, number=number, repeat=5)) / number
+        cached = min(timeit.repeat(endpoint, number=number, repeat=5)) / number
+
+    print(f"token_required without cache: {uncached * 1e6:8.2f} us/request")
+    print(f"token_required with cache:    {cached * 1e6:8.2f} us/request")
+    print(f"saved per request:            {(uncached - cached) * 1e6:8.2f} us ({uncached / cached:.1f}x)")
@@ -0,0 +1,57 @@
+# Description: measure the payload size, the decode time and the request time of the board APIs
+# (get_owners, get_troops_count and get_number_of_fort_troops) in the json, array and binary formats
+# the json format is decoded like the client and main.py do (eval and converting the keys to int)
+# run it from the Kernel-web-server-version directory: python benchmarks/bench_wire_format.py
+
+import importlib.util
+import os
+import time
+import timeit
+import requests
+import harness
+
+
+def load_client_module():
+    path = os.path.join(os.path.dirname(harness.file_path), 'src', 'game.py')
+    spec = importlib.util.spec_from_file_location('client_game', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def decode_json(content):
+    return {int(key): value for key, value in eval(content.decode()).items()}
+
+
+if __name__ == '__main__':
+    client_module = load_client_module()
+    map_name = 'map1.json'
+    app, main_game = harness.create_app(map_name, debug=False, debug_dice=False)
+    port = harness.serve(app)
+    clients = harness.login_clients(main_game, port, client_module.Game)
+    # play a part of a match so the board is not empty
+    harness.play_match(main_game, clients, seed=1, number_of_turns=150)
+
+    number = 300
+    headers = {'x-access-token': clients[0].token}
+    print(f"{map_name}: {len(main_game.nodes)} nodes, numpy: {client_module.np is not None}")
+    for api in ['get_owners', 'get_troops_count', 'get_number_of_fort_troops']:
+        for board_format in ['json', 'array', 'binary']:
+            url = f'http://127.0.0.1:{port}/{api}'
+            params = {'format': board_format}
+            response = requests.get(url, headers=headers, params=params)
+            content, dtype = response.content, response.headers.get('X-Board-Dtype', '<i4')
+            if board_format == 'json':
+                decode = lambda: decode_json(content)
+            else:
+                decode = lambda: client_module.decode_board(content, board_format, dtype)
+            decode_time = min(timeit.repeat(decode, number=2000, repeat=5)) / 2000
+
+            session = requests.Session()
+            start = time.perf_counter()
+            for _ in range(number):
+                session.get(url, headers=headers, params=params)
+            request_time = (time.perf_counter() - start) / number
+
+            print(f"  {api:26} {board_format:6}  payload: {len(content):5} bytes  decode: {decode_time * 1e6:7.2f} us"
+                  f"  request: {request_time * 1e3:6.3f} ms")
@@ -0,0 +1,137 @@
+# Description: check that the local rules of the bot (src/rules.py in the root of the repository) are the same as the kernel
+# random actions (valid and invalid) are sent to the kernel and applied to the rules in the same order,
+# the errors, the results of the attacks and the game state after each action should be the same
+# the dice of the attacks are the same because the rules use a copy of the random state of the kernel
+# run it from the Kernel-web-server-version directory: python benchmarks/check_rules.py [number of matches]
+
+import contextlib
+import importlib.util
+import io
+import os
+import random
+import sys
+import harness
+
+
+def load_rules():
+    path = os.path.join(os.path.dirname(harness.file_path), 'src', 'rules.py')
+    spec = importlib.util.spec_from_file_location('client_rules', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.Rules
+
+
+def make_rules(rules_class, main_game, player_id):
+    # the rules of the player at the beginning of the turn, built from the game of the kernel
+    nodes = main_game.nodes.values()
+    player = main_game.players[player_id]
+    return rules_class(player_id,
+                       {node.id: node.owner.id if node.owner is not None else -1 for node in nodes},
+                       {node.id: node.number_of_troops for node in nodes},
+                       {node.id: node.number_of_fort_troops for node in nodes},
+                       {node.id: [adj.id for adj in node.adj_main_map] for node in nodes},
+                       state=main_game.state, game_state=main_game.game_state,
+                       number_of_troops_to_put=player.number_of_troops_to_place,
+                       move_troop_done=main_game.move_troop_done, use_fort=player.use_fort,
+                       has_won_troop=main_game.has_won_troop, fort_coef=main_game.config['fort_coef'],
+                       troops_after_attack=main_game.config['number_of_troops_after_successful_attack'])
+
+
+def differences(rules, main_game, player_id):
+    # the differences between the rules and the game of the kernel
+    expected = make_rules(type(rules), main_game, player_id)
+    return [name for name in ['owners', 'troops', 'fort_troops', 'state', 'game_state', 'number_of_troops_to_put',
+                              'move_troop_done', 'use_fort', 'has_won_troop'] if getattr(rules, name) != getattr(expected, name)]
+
+
+def random_action(rng, rules):
+    # a random action, most of them are valid in the current state and some of them are not
+    node_ids = list(rules.owners)
+    mine = [i for i in node_ids if rules.owners[i] == rules.player_id] or node_ids
+    node = lambda: rng.choice(mine) if rng.random() < 0.8 else rng.choice(node_ids + [-1, len(node_ids)])
+    count = lambda node_id: rng.randint(-1, rules.troops.get(node_id, 0) + 1)
+
+    if rules.game_state == 1:
+        return rng.choice([('put_one_troop', (node(),)), ('next_state', ())])
+    name = rng.choices(['put_troop', 'attack', 'move_troop', 'fort', 'next_state', 'put_one_troop'],
+                       weights=[4, 4, 3, 1, 2, 1])[0]
+    if name == 'put_troop':
+        node_id = rng.choice(node_ids) if rng.random() < 0.3 else node()
+        return name, (node_id, rng.randint(-1, rules.number_of_troops_to_put + 1))
+    if name == 'attack':
+        source = node()
+        targets = rules.adjacents.get(source, [])
+        target = rng.choice(targets) if targets and rng.random() < 0.9 else rng.choice(node_ids)
+        return name, (source, target, rng.choice([-0.5, 0, 0.5, 1, 2]), rng.choice([0, 0.3, 0.5, 0.99, 1]))
+    if name == 'move_troop':
+        source = node()
+        return name, (source, node(), count(source))
+    if name == 'fort':
+        node_id = node()
+        return name, (node_id, count(node_id))
+    if name == 'next_state':
+        return name, ()
+    return name, (node(),)
+
+
+def check_match(rules_class, main_game, clients, seed, actions_per_turn=25):
+    # play a match with random actions and return the number of checked actions of each API and the mismatches
+    rng = random.Random(seed)
+    random.seed(seed)
+    checked = {} # name of the action: [number of accepted actions, number of rejected actions]
+    mismatches = []
+    while main_game.turn_number < main_game.config['number_of_turns']:
+        player_id = main_game.start_turn()
+        rules = make_rules(rules_class, main_game, player_id)
+        for _ in range(actions_per_turn):
+            name, args = random_action(rng, rules)
+            dice = random.getstate()
+            try:
+                # the client prints the errors of the kernel
+                with contextlib.redirect_stdout(io.StringIO()):
+                    output = getattr(clients[player_id], name)(*args)
+            except Exception as error:
+                output = {'error': str(error)}
+
+            if name == 'attack':
+                rng_copy = random.Random()
+                rng_copy.setstate(dice)
+                expected = rules.attack(*args, rng=rng_copy)
+            else:
+                expected = getattr(rules, name)(*args)
+
+            checked.setdefault(name, [0, 0])[output.get('error') is not None] += 1
+            different = differences(rules, main_game, player_id)
+            if output.get('error') != expected.get('error') or output.get('won') != expected.get('won') or different:
+                mismatches.append((main_game.turn_number, name, args, output, expected, different))
+                # continue from the state of the kernel
+                rules = make_rules(rules_class, main_game, player_id)
+        main_game.end_turn()
+    return checked, mismatches
+
+
+if __name__ == '__main__':
+    number_of_matches = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    client_class = harness.load_client()
+    rules_class = load_rules()
+    app, main_game = harness.create_app(debug=False, debug_dice=False)
+    port = harness.serve(app)
+
+    total_checked = {}
+    total_mismatches = []
+    for seed in range(number_of_matches):
+        harness.reset_game(main_game, main_game.config)
+        clients = harness.login_clients(main_game, port, client_class)
+        checked, mismatches = check_match(rules_class, main_game, clients, seed)
+        for name, counts in checked.items():
+            total = total_checked.setdefault(name, [0, 0])
+            total[0] += counts[0]
+            total[1] += counts[1]
+        total_mismatches += mismatches
+
+    for turn_number, name, args, output, expected, different in total_mismatches[:20]:
+        print(f"turn {turn_number}: {name}{args}  kernel: {output}  rules: {expected}  different: {different}")
+    for name, (accepted, rejected) in sorted(total_checked.items()):
+        print(f"{name:14} accepted: {accepted:6}  rejected: {rejected:6}")
+    print(f"{number_of_matches} matches, {sum(map(sum, total_checked.values()))} actions, {len(total_mismatches)} mismatches")
+    sys.exit(1 if total_mismatches else 0)
@@ -0,0 +1,181 @@
+# Description: helpers to run the web kernel in the benchmark process
+# the app is built like src/main.py does, but it's served on a free port in a background thread
+# and the turns are driven by the benchmark instead of the change_turn thread
+
+import importlib.util
+import importlib
+import logging
+import os
+import random
+import sys
+import threading
+import time
+
+file_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# go to the kernel path address so the src package and config.json can be found
+os.chdir(file_path)
+sys.path.insert(0, file_path)
+
+from flask import Flask, request, g
+import requests
+from werkzeug.serving import make_server
+from src.components.game import Game
+import src.tools.read_config as read_config
+from src.tools.debug_log import read_levels
+from src.tools.metrics import Metrics
+
+
+# the blueprints of the kernel (the name of the module and the blueprint are the same)
+BLUEPRINTS = ['index', 'login', 'ready', 'get_owners', 'get_troops_count', 'get_state', 'get_turn_number', 'get_adj',
+              'next_state', 'put_one_troop', 'put_troop', 'get_player_id', 'attack', 'move_troop',
+              'get_strategic_nodes', 'get_number_of_troops_to_put', 'get_reachable', 'get_number_of_fort_troops',
+              'fort', 'printer', 'get_changes', 'stream', 'metrics', 'get_map_analysis']
+
+
+def load_client():
+    # load the Game class of the client (src/game.py in the root of the repository)
+    # it can't be imported normally because the kernel also has a src package
+    path = os.path.join(os.path.dirname(file_path), 'src', 'game.py')
+    spec = importlib.util.spec_from_file_location('client_game', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.Game
+
+
+def create_app(map_name='map1.json', **config):
+    # build the flask app and the game like src/main.py
+    # config overrides the values of config.json
+    main_game = Game()
+    app = Flask('src.main')
+    app.app_context().push()
+    app.config['SECRET_KEY'] = 'your-secret-key'
+    app.config['main_game'] = main_game
+    app.config['config'] = {**read_config.read_config(), **config}
+    app.config['debug'] = app.config['config']['debug']
+    reset_game(main_game, app.config['config'], map_name)
+
+    from src.tools.check_token import token_required
+    from src.tools.check_player import check_player
+    from src.tools.check_version import check_version
+    app.config['token_required'] = token_required
+    app.config['check_player'] = check_player
+    app.config['check_version'] = check_version
+
+    for name in BLUEPRINTS:
+        module = importlib.import_module('src.blueprints.' + name)
+        app.register_blueprint(getattr(module, name))
+
+    @app.after_request
+    def add_state_version(response):
+        response.headers['X-State-Version'] = str(main_game.version)
+        return response
+
+    if app.config['config'].get('metrics', False):
+        @app.before_request
+        def start_metrics():
+            g.start_time = time.perf_counter()
+
+        @app.after_request
+        def record_metrics(response):
+            main_game.metrics.record(request.blueprint or request.path, g.get('player_id', -1),
+                                     time.perf_counter() - g.start_time, response.calculate_content_length() or 0)
+            return response
+
+    return app, main_game
+
+
+def reset_game(main_game, config, map_name='map1.json'):
+    # start a new game on the same game object (the blueprints keep a reference to it)
+    main_game.__init__()
+    main_game.read_map(os.path.join('maps', map_name))
+    main_game.config = config
+    main_game.debug = config['debug']
+    main_game.debug_log.levels.update(read_levels(config))
+    main_game.finish_func = lambda: None
+    if config.get('metrics', False):
+        main_game.metrics = Metrics()
+    if 'src.blueprints.login' in sys.modules:
+        sys.modules['src.blueprints.login'].player_id = 0
+
+
+def serve(app):
+    # serve the app on a free port in a daemon thread and return the port
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server.server_port
+
+
+def login_clients(main_game, port, client_class):
+    # login all the players and return their clients, the game is started without the ready API
+    # because the turns are driven by play_match instead of the change_turn thread
+    clients = []
+    for _ in range(main_game.config['number_of_players']):
+        response = requests.post(f'http://127.0.0.1:{port}/login', data={'token': 0}).json()
+        clients.append(client_class(response['token'], '127.0.0.1', port))
+    main_game.game_started = True
+    return clients
+
+
+def polling_bot(game, rng, initializing):
+    # a simple bot with the same request pattern as main.py: it reads the whole board
+    # at the beginning of the turn and after each action (like Nodes and Nodes.update)
+    def read_board():
+        return [{int(i): value for i, value in data.items()}
+                for data in [game.get_owners(), game.get_number_of_troops(), game.get_number_of_fort_troops()]]
+
+    player_id = game.get_player_id()['player_id']
+    owners, troops, forts = read_board()
+    mine = [i for i in owners if owners[i] == player_id]
+
+    if initializing:
+        empty = [i for i in owners if owners[i] == -1]
+        game.put_one_troop(rng.choice(empty or mine))
+        read_board()
+        return
+
+    if not mine:
+        return
+
+    # put troops in a few calls
+    reserve = game.get_number_of_troops_to_put()['number_of_troops']
+    while reserve > 0:
+        number = min(reserve, rng.randint(1, 3))
+        game.put_troop(rng.choice(mine), number)
+        reserve -= number
+        owners, troops, forts = read_board()
+    game.next_state()
+
+    # attack from the biggest node to its weakest enemy neighbor
+    adj = game.get_adj()
+    source = max(mine, key=lambda i: troops[i])
+    enemies = [i for i in adj[str(source)] if owners[i] not in [-1, player_id]]
+    if enemies and troops[source] > 2:
+        game.attack(source, min(enemies, key=lambda i: troops[i]), 1, 0.5)
+        owners, troops, forts = read_board()
+    game.next_state()
+
+    # move one troop to a random reachable node
+    mine = [i for i in owners if owners[i] == player_id]
+    source = max(mine, key=lambda i: troops[i])
+    reachable = game.get_reachable(source)['reachable']
+    if len(reachable) > 1 and troops[source] > 1:
+        game.move_troop(source, rng.choice([i for i in reachable if i != source]), 1)
+        read_board()
+    game.next_state()
+    game.next_state()
+
+
+def play_match(main_game, clients, bot=polling_bot, seed=0, number_of_turns=None):
+    # play a match with the same bot for all the players and return the spent time
+    rng = random.Random(seed)
+    random.seed(seed)
+    number_of_turns = number_of_turns or main_game.config['number_of_turns']
+
+    start = time.perf_counter()
+    while main_game.turn_number < number_of_turns:
+        player_id = main_game.start_turn()
+        bot(clients[player_id], rng, main_game.game_state == 1)
+        main_game.end_turn()
+    return time.perf_counter() - start
@@ -136,18 +136,16 @@ def attack_func(player_id):
         
         attacker_dice_list.sort(reverse=True)
         target_dice_list.sort(reverse=True)
-        if main_game.config['debug_dice']:
-            main_game.print(f'attacker troops: {attacker_troops} target troops: {target_troops}')
-            main_game.print(f"attacker dice: {attacker_dice_list}" + f" target dice: {target_dice_list}")
+        main_game.debug_log.log('dice', 1, 'attacker troops: {} target troops: {}', attacker_troops, target_troops)
+        main_game.debug_log.log('dice', 1, 'attacker dice: {} target dice: {}', attacker_dice_list, target_dice_list)
 
         for i in range(min(attacker_dice,target_dice)):
             if attacker_dice_list[i] > target_dice_list[i]:
                 target_troops -= 1
             else:
                 attacker_troops -= 1
-        if main_game.config['debug_dice']:
-            main_game.print(f"new attacker troops: {attacker_troops}" + f" new target troops: {target_troops}")
-            main_game.print(f'_________________________________________________________')
+        main_game.debug_log.log('dice', 1, 'new attacker troops: {} new target troops: {}', attacker_troops, target_troops)
+        main_game.debug_log.log('dice', 1, '_________________________________________________________')
 
     # check if the attacker won
     if target_troops <= 0:
@@ -196,8 +194,8 @@ def attack_func(player_id):
             "new_fort_troop": main_game.nodes[target_id].number_of_fort_troops
             }
     main_game.log_attack.append(log)
-    if main_game.debug:
-        main_game.print(f"player {player_id} attacked node {target_id} from node {attacking_id} with fraction {fraction}. successful: {target_troops <= 0}")
+    main_game.bump_version('troops', 'fort_troops', node_ids=[attacking_id, target_id])
+    main_game.debug_log.log('actions', 1, "player {} attacked node {} from node {} with fraction {}. successful: {}", player_id, target_id, attacking_id, fraction, target_troops <= 0)
 
     if target_troops <= 0:
         return jsonify({'message':'attack successful', 'won': 1}),200
@@ -73,8 +73,8 @@ def fort_func(player_id):
     # fortify the node
     main_game.nodes[node_id].number_of_troops -= troop_count
     main_game.nodes[node_id].number_of_fort_troops += main_game.config['fort_coef'] * troop_count
+    main_game.bump_version('troops', 'fort_troops', node_ids=[node_id])
 
-    if main_game.debug:
-        main_game.print(f"player {player_id} fortified node {node_id} with {troop_count} troops")
+    main_game.debug_log.log('actions', 1, "player {} fortified node {} with {} troops", player_id, node_id, troop_count)
 
     return jsonify({'success':'the fortification ability is applied successfully'}), 200
\ No newline at end of file
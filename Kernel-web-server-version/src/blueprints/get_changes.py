@@ -0,0 +1,41 @@
+from flask import Blueprint , jsonify , current_app 
+from flask import request
+
+
+get_changes = Blueprint('get_changes',__name__) 
+
+main_game = current_app.config['main_game']
+
+@get_changes.route('/get_changes',methods=['GET'])
+@current_app.config['token_required']
+@current_app.config['check_player']
+def get_changes_func(player_id):
+    # this API used to get the nodes that changed after the since version of the game state
+    # the query string of the request should be like this:
+    ## since: the version of the last response of this API (-1 to get all the nodes)
+    # each changed node is like this: node_id: [owner, number_of_troops, number_of_fort_troops]
+    # if the changes are not available anymore all the nodes are returned and full is 1
+
+    # check if the since is provided
+    if 'since' not in request.args:
+        return jsonify({'error':'since is not provided'}),400
+
+    # check if the since is integer
+    try:
+        since = int(request.args['since'])
+    except:
+        return jsonify({'error':'since is not valid it should be integer'}),400
+
+    version = main_game.version
+    changed_nodes = main_game.get_changes(since)
+    full = changed_nodes is None
+    if full:
+        changed_nodes = main_game.nodes.keys()
+
+    output_dict = {'version': version, 'full': int(full), 'changes': {}}
+    for node_id in changed_nodes:
+        node = main_game.nodes[node_id]
+        output_dict['changes'][str(node_id)] = [node.owner.id if node.owner is not None else -1,
+                                                node.number_of_troops,
+                                                node.number_of_fort_troops]
+    return jsonify(output_dict),200
@@ -0,0 +1,45 @@
+from flask import Blueprint , jsonify , current_app
+from flask import request
+from flask import make_response
+from src.tools.map_analysis import FIELDS
+import numpy as np
+import io
+
+
+get_map_analysis = Blueprint('get_map_analysis',__name__)
+
+main_game = current_app.config['main_game']
+
+# the formats of the analysis
+## json: an object of the fields as lists (the default)
+## npz: the fields as numpy arrays in the npz format (application/octet-stream)
+FORMATS = ['json', 'npz']
+
+@get_map_analysis.route('/get_map_analysis',methods=['GET'])
+@current_app.config['token_required']
+@current_app.config['check_player']
+def get_map_analysis_func(player_id):
+    # this API used to get the analysis of the map (see src/tools/map_analysis.py), it doesn't change during the game
+    # the query string of the request can have the format (json or npz)
+    # the ETag of the response is the hash of the map, if the client sends it in the If-None-Match header
+    # (it can send the hashes of all the analyses that it has saved) an empty response with 304 status code is returned
+
+    output_format = request.args.get('format', 'json')
+    if output_format not in FORMATS:
+        return jsonify({'error':'format is not valid it should be one of ' + ', '.join(FORMATS)}),400
+
+    analysis = main_game.get_map_analysis()
+    if request.if_none_match.contains(analysis.hash):
+        response = make_response('', 304)
+        response.set_etag(analysis.hash)
+        return response
+
+    if output_format == 'npz':
+        buffer = io.BytesIO()
+        np.savez(buffer, **{name: getattr(analysis, name) for name in FIELDS})
+        response = make_response(buffer.getvalue(), 200)
+        response.mimetype = 'application/octet-stream'
+    else:
+        response = make_response(jsonify(analysis.to_dict()), 200)
+    response.set_etag(analysis.hash)
+    return response
@@ -1,4 +1,5 @@
-from flask import Blueprint , jsonify , current_app 
+from flask import Blueprint , current_app 
+from src.tools.board_format import board_response
 
 
 get_number_of_fort_troops = Blueprint('get_number_of_fort_troops',__name__) 
@@ -8,9 +9,8 @@ main_game = current_app.config['main_game']
 @get_number_of_fort_troops.route('/get_number_of_fort_troops',methods=['GET'])
 @current_app.config['token_required']
 @current_app.config['check_player']
+@current_app.config['check_version']('fort_troops')
 def get_number_of_fort_troops_func(player_id):
     # this API used to get the number of fort troops on each node
-    output_dict = {}
-    for node in main_game.nodes.values():
-        output_dict[node.id]=node.number_of_fort_troops
-    return jsonify(output_dict), 200
\ No newline at end of file
+    # the format of the response can be chosen with the format query parameter (json, array or binary)
+    return board_response([node.number_of_fort_troops for node in main_game.nodes.values()])
@@ -1,4 +1,5 @@
-from flask import Blueprint , jsonify , current_app 
+from flask import Blueprint , current_app 
+from src.tools.board_format import board_response
 
 
 get_owners = Blueprint('get_owners',__name__) 
@@ -8,11 +9,7 @@ main_game = current_app.config['main_game']
 @get_owners.route('/get_owners',methods=['GET'])
 @current_app.config['token_required']
 @current_app.config['check_player']
+@current_app.config['check_version']('owner')
 def get_owners_func(player_id):
-    output_dict = {}
-    for node in main_game.nodes.values():
-        if node.owner!=None:
-             output_dict[node.id] = node.owner.id
-        else:
-             output_dict[node.id] = -1
-    return jsonify(output_dict),200
\ No newline at end of file
+    # the format of the response can be chosen with the format query parameter (json, array or binary)
+    return board_response([node.owner.id if node.owner is not None else -1 for node in main_game.nodes.values()])
@@ -1,4 +1,5 @@
-from flask import Blueprint , jsonify , current_app 
+from flask import Blueprint , current_app 
+from src.tools.board_format import board_response
 
 
 get_troops_count = Blueprint('get_troops_count',__name__) 
@@ -8,8 +9,7 @@ main_game = current_app.config['main_game']
 @get_troops_count.route('/get_troops_count',methods=['GET'])
 @current_app.config['token_required']
 @current_app.config['check_player']
+@current_app.config['check_version']('troops')
 def get_troops_count_func(player_id):
-    output_dict = {}
-    for node in main_game.nodes.values():
-        output_dict[node.id]=node.number_of_troops
-    return jsonify(output_dict), 200
\ No newline at end of file
+    # the format of the response can be chosen with the format query parameter (json, array or binary)
+    return board_response([node.number_of_troops for node in main_game.nodes.values()])
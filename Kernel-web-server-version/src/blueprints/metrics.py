@@ -0,0 +1,18 @@
+from flask import Blueprint , jsonify , current_app , Response
+
+
+metrics = Blueprint('metrics',__name__)
+
+main_game = current_app.config['main_game']
+
+@metrics.route('/metrics',methods=['GET'])
+def metrics_func():
+    # this API used to get the number of calls, the latency and the response size of the APIs for each player
+    # the response is in the text format of prometheus (see src/tools/metrics.py)
+    # it doesn't need a token so a prometheus server can read it
+
+    # check if the metrics are enabled in the config
+    if main_game.metrics is None:
+        return jsonify({'error':'metrics are disabled in the config'}),404
+
+    return Response(main_game.metrics.prometheus(), mimetype='text/plain; version=0.0.4'),200
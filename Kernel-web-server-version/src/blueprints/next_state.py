@@ -18,6 +18,7 @@ def next_state_func(player_id):
     '''
     if main_game.game_state != 2:
         main_game.state = 5
+        main_game.bump_version()
         output_dict={'game_state': main_game.state, 'message': 'success'}
         return jsonify(output_dict),200
         
@@ -26,8 +27,8 @@ def next_state_func(player_id):
         return jsonify(output_dict),400
     
     main_game.state += 1
-    if main_game.debug:
-        main_game.print("******* state changed to: " + str(main_game.state) + " *******") 
+    main_game.bump_version()
+    main_game.debug_log.log('actions', 1, "******* state changed to: {} *******", main_game.state)
 
     output_dict={'game_state': main_game.state, 'message': 'success'}
     return jsonify(output_dict),200
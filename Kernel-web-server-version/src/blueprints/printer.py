@@ -21,7 +21,6 @@ def printer_func(player_id):
     
     text = str(data['text'])
 
-    if main_game.debug:
-        main_game.print(text)
+    main_game.debug_log.log('actions', 1, '{}', text)
 
     return jsonify({'message':'printed successfully'}),200
@@ -56,10 +56,11 @@ def put_one_troop_func(player_id):
 
     # add the node id and player id to the log variable of the game
     main_game.log_initialize.append([player_id, node_id])
+    main_game.write_log(['initialize', [player_id, node_id]])
 
     # change the state to 4 so player just can put one troop in a turn
     main_game.state = 6
-    if main_game.debug:
-        main_game.print(f"player {player_id} put one troop on node {node_id}")
+    main_game.bump_version('troops', node_ids=[node_id])
+    main_game.debug_log.log('actions', 1, "player {} put one troop on node {}", player_id, node_id)
 
     return jsonify({'message':'troop added successfully'}),200
@@ -72,8 +72,8 @@ def put_troop_func(player_id):
 
     # add the node id and player id to the log variable of the game
     main_game.log_put_troop.append([node_id, number_of_troops])
+    main_game.bump_version('troops', node_ids=[node_id])
 
-    if main_game.debug:
-        main_game.print("player " + str(player_id) + " put " + str(number_of_troops) + " troops on node " + str(node_id))
+    main_game.debug_log.log('actions', 1, "player {} put {} troops on node {}", player_id, number_of_troops, node_id)
 
     return jsonify({'message':'troop added successfully'}),200
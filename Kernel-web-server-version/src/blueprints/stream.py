@@ -0,0 +1,42 @@
+from flask import Blueprint , Response , current_app 
+from flask import stream_with_context
+import queue
+import json
+
+
+stream = Blueprint('stream',__name__) 
+
+main_game = current_app.config['main_game']
+
+# the time between two keep-alive messages when there is no change in the game state (in seconds)
+KEEP_ALIVE = 5
+
+@stream.route('/stream',methods=['GET'])
+@current_app.config['token_required']
+def stream_func(player_id):
+    # this API sends the changes of the game state to the player as Server-Sent Events
+    # the first event includes all the nodes, the next events include the nodes that changed (put troop, attack, move troop, fort)
+    # and the turn and state of the game, so the player can keep a mirror of the game state without any request
+    # unlike the other APIs, the player can listen to this API when it's not its turn
+    events = main_game.state_stream.listen()
+
+    def generate():
+        try:
+            event = main_game.get_event()
+            while True:
+                if event is not None:
+                    yield f"id: {event['version']}\nevent: {event['action']}\ndata: {json.dumps(event)}\n\n"
+                try:
+                    event = events.get(timeout=KEEP_ALIVE)
+                except queue.Empty:
+                    event = None
+                    yield ": keep-alive\n\n"
+                    continue
+
+                # the events of the player were dropped because it was too slow, send the whole game state
+                if event is None:
+                    event = main_game.get_event()
+        finally:
+            main_game.state_stream.stop(events)
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream')
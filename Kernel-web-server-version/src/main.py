@@ -6,13 +6,16 @@
 # and add different APIs from blueprints to the server
 # it also has a function to kill the server
 
-from flask import Flask
+from flask import Flask, request, g
 from src.components.game import Game
 import src.tools.read_config as read_config
+from src.tools.debug_log import read_levels
+from src.tools.metrics import Metrics
 import os
 import requests
 import argparse
 import logging
+import time
 
 
 # define argument parser
@@ -84,13 +87,16 @@ main_game.finish_func = kill_backend
 # set the debug variable in the flask global variable
 app.config['debug'] = debug
 main_game.debug = debug
+main_game.debug_log.levels.update(read_levels(app.config['config']))
 
-# set the token_required and check_player functions in the flask global variable
+# set the token_required, check_player and check_version functions in the flask global variable
 from src.tools.check_token import token_required
 from src.tools.check_player import check_player
+from src.tools.check_version import check_version
 
 app.config['token_required'] = token_required
 app.config['check_player'] = check_player
+app.config['check_version'] = check_version
 
 
 # register the blueprints
@@ -116,6 +122,10 @@ from src.blueprints.get_reachable import get_reachable
 from src.blueprints.get_number_of_fort_troops import get_number_of_fort_troops
 from src.blueprints.fort import fort
 from src.blueprints.printer import printer
+from src.blueprints.get_changes import get_changes
+from src.blueprints.stream import stream
+from src.blueprints.metrics import metrics
+from src.blueprints.get_map_analysis import get_map_analysis
 
 ## a blueprint for the test server
 app.register_blueprint(index)
@@ -177,5 +187,40 @@ app.register_blueprint(fort)
 ## a blueprint for the print API
 app.register_blueprint(printer)
 
+## a blueprint for the get changes API
+app.register_blueprint(get_changes)
+
+## a blueprint for the stream API
+app.register_blueprint(stream)
+
+## a blueprint for the metrics API
+app.register_blueprint(metrics)
+
+## a blueprint for the get map analysis API
+app.register_blueprint(get_map_analysis)
+
+
+# add the version of the game state to all the responses
+# so the clients that listen to the stream API know which version they should wait for
+@app.after_request
+def add_state_version(response):
+    response.headers['X-State-Version'] = str(main_game.version)
+    return response
+
+# record the latency and the response size of each request if the metrics are enabled in the config
+# the hooks are not added otherwise, so there is no cost
+if main_game.config.get('metrics', False):
+    main_game.metrics = Metrics()
+
+    @app.before_request
+    def start_metrics():
+        g.start_time = time.perf_counter()
+
+    @app.after_request
+    def record_metrics(response):
+        main_game.metrics.record(request.blueprint or request.path, g.get('player_id', -1),
+                                 time.perf_counter() - g.start_time, response.calculate_content_length() or 0)
+        return response
+
 # run the server
 app.run(debug=False, host=app.config['config']['host'], port=app.config['config']['port'])
\ No newline at end of file
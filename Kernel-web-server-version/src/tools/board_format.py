@@ -0,0 +1,40 @@
+from flask import request
+from flask import jsonify
+from flask import make_response
+import struct
+
+
+# the formats of the board APIs (get_owners, get_troops_count and get_number_of_fort_troops)
+## json: an object of node_id: value (the default)
+## array: a json array, the value of the node i is at the index i
+## binary: the packed values (application/octet-stream), the value of the node i is at the index i
+##         they are little-endian int16 if all of them fit in it else int32, the X-Board-Dtype header is '<i2' or '<i4'
+FORMATS = ['json', 'array', 'binary']
+
+
+def board_format():
+    # return the format that the client asked for with the format query parameter
+    # or with the Accept header (application/octet-stream for binary)
+    # return None if the format is not valid
+    if 'format' in request.args:
+        output_format = request.args['format']
+        return output_format if output_format in FORMATS else None
+    if request.accept_mimetypes.best_match(['application/json', 'application/octet-stream']) == 'application/octet-stream':
+        return 'binary'
+    return 'json'
+
+
+def board_response(values):
+    # make the response of a board API from the values of the nodes (ordered by node id)
+    output_format = board_format()
+    if output_format is None:
+        return jsonify({'error':'format is not valid it should be one of ' + ', '.join(FORMATS)}),400
+    if output_format == 'array':
+        return jsonify(values),200
+    if output_format == 'binary':
+        dtype = '<i2' if all(-32768 <= value <= 32767 for value in values) else '<i4'
+        response = make_response(struct.pack(f'<{len(values)}' + ('h' if dtype == '<i2' else 'i'), *values), 200)
+        response.mimetype = 'application/octet-stream'
+        response.headers['X-Board-Dtype'] = dtype
+        return response
+    return jsonify(dict(enumerate(values))),200
@@ -1,10 +1,61 @@
 from functools import wraps
+from collections import OrderedDict
 from flask import current_app
 from flask import request
 from flask import jsonify
+from flask import g
+import threading
 import jwt
 
 
+# tokens are issued once in the login API and never change, so the signature of each token
+# only needs to be verified once. the cache maps token string -> player_id
+MAX_VERIFIED_TOKENS = 64 # the cache is bounded, the oldest token is dropped first
+verified_tokens = OrderedDict()
+verified_for = None # (secret key, game) that the cached tokens were verified for
+cache_lock = threading.Lock()
+
+
+def clear_token_cache():
+    # forget all the verified tokens (used when the game or the secret key is replaced)
+    global verified_for
+    with cache_lock:
+        verified_tokens.clear()
+        verified_for = None
+
+
+def verify_token(token):
+    # return the player_id of the token or None if the token is invalid
+    global verified_for
+
+    # invalidate the cache if the game was reset or the secret key was changed
+    # the check, the clear and the new owner are done under one lock so another thread can't clear the cache between them
+    owner = (current_app.config['SECRET_KEY'], current_app.config.get('main_game'))
+    with cache_lock:
+        if verified_for is None or verified_for[0] != owner[0] or verified_for[1] is not owner[1]:
+            verified_tokens.clear()
+            verified_for = owner
+
+    player_id = verified_tokens.get(token)
+    if player_id is not None:
+        return player_id
+
+    # decode the token to obtain the player_id
+    try:
+        data = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=['HS256'])
+        player_id = data['player_id']
+    except:
+        return None
+    if player_id is None:
+        return None
+
+    with cache_lock:
+        verified_tokens[token] = player_id
+        if len(verified_tokens) > MAX_VERIFIED_TOKENS:
+            verified_tokens.popitem(last=False)
+    return player_id
+
+
 def token_required(func):
     """
     This function is used as a decorator to check the token
@@ -24,15 +75,14 @@ def token_required(func):
             return jsonify(output_dict), 401
 
         # check if the token is valid and contains the player_id
-        try:
-           # decode the token to obtain user public_id
-            data = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=['HS256'])
-            if data['player_id'] == None:
-                raise Exception()     
-        except:
+        player_id = verify_token(token)
+        if player_id is None:
             output_dict['error'] = 'Token is invalid!'
             return jsonify(output_dict), 401
-        
+
+        # save the player_id for the metrics of the request
+        g.player_id = player_id
+
         # call the function with the player_id
-        return func(data['player_id'])
+        return func(player_id)
     return decorator
@@ -0,0 +1,39 @@
+from functools import wraps
+from flask import current_app
+from flask import request
+from flask import make_response
+from src.tools.board_format import board_format
+import uuid
+
+main_game = current_app.config['main_game']
+
+# the version of the game restarts from zero in each run of the server
+# so the ETag also includes an id of the run to make it unique
+server_run_id = uuid.uuid4().hex[:8]
+
+
+def check_version(field):
+    # this decorator adds the version of the last change of the field ('owner', 'troops' or 'fort_troops')
+    # of the nodes as ETag to the response
+    # if the client sends the same ETag in the If-None-Match header, the field is not changed
+    # since its last request, so an empty response with 304 status code is returned
+    def wrapper(func):
+        @wraps(func)
+        def decorator(player_id):
+            # the format of the response is a part of the ETag, so a cached response of another format is not reused
+            etag = server_run_id + '-' + str(main_game.field_versions[field]) + '-' + str(board_format())
+
+            if request.if_none_match.contains(etag):
+                response = make_response('', 304)
+                response.set_etag(etag)
+                return response
+
+            response = make_response(func(player_id))
+            if response.status_code == 200:
+                response.set_etag(etag)
+                response.vary.add('Accept')
+            return response
+
+        return decorator
+
+    return wrapper
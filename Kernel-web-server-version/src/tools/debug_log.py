@@ -0,0 +1,75 @@
+'''
+a buffer of a fixed size for the debug logs of the game
+the records are saved with their arguments in a preallocated buffer and they are formatted only when
+the buffer is written in the debug_log folder (when it's full and at the end of the game), it's not a ring buffer:
+a full buffer is written to the file and emptied, so no record is dropped
+each record has a category and a level, the records with a higher level than the level of their category are ignored
+'''
+
+import datetime
+import os
+import threading
+
+
+# the categories of the debug logs
+## turns: the start and end of the turns (level 2: the nodes at the beginning of each turn)
+## actions: the actions of the players (put troop, attack, move troop, fort, next state) and the printer API
+## dice: the dice of the attacks
+## game: the end of the game and the errors of the requests to the players
+CATEGORIES = ['turns', 'actions', 'dice', 'game']
+
+
+def read_levels(config):
+    # return the level of each category from the config
+    # debug and debug_dice turn on all the logs like before,
+    # the debug_levels dictionary (category: level, 0 is off) can change the level of each category
+    levels = dict.fromkeys(CATEGORIES, 2 if config['debug'] else 0)
+    if not config['debug'] or not config['debug_dice']:
+        levels['dice'] = 0
+    levels.update(config.get('debug_levels', {}))
+    return levels
+
+
+class DebugLog:
+    def __init__(self, levels=None, size=50000) -> None:
+        self.levels = dict.fromkeys(CATEGORIES, 0) # category: the maximum level of the saved records
+        self.size = size # the number of records that are kept before writing them in the file
+        self.records = [None] * size # (text, args) of each record
+        self.count = 0 # the number of records in the buffer
+        self.path = None # the file of the debug log, it is created at the first write
+        self.lock = threading.Lock()
+        if levels is not None:
+            self.levels.update(levels)
+
+    def enabled(self, category, level=1):
+        # return True if the records of the category with this level are saved
+        return level <= self.levels[category]
+
+    def log(self, category, level, text, *args):
+        # save a record, the text is formatted with the args (text.format(*args)) when it's written
+        # the args shouldn't be changed after this call
+        if level > self.levels[category]:
+            return
+        with self.lock:
+            self.records[self.count] = (text, args)
+            self.count += 1
+            if self.count == self.size:
+                self.write()
+
+    def flush(self):
+        # write the records in the file
+        with self.lock:
+            self.write()
+
+    def write(self):
+        if self.count == 0:
+            return
+        if self.path is None:
+            # make debug_log folder if it does not exist
+            if not os.path.exists("debug_log"):
+                os.makedirs("debug_log")
+            self.path = "debug_log/" + datetime.datetime.now().strftime("%Y-%m-%d-%H-%M-%S") + ".txt"
+        with open(self.path, "a") as debug_log_file:
+            debug_log_file.writelines((text.format(*args) if args else text) + "\n" for text, args in self.records[:self.count])
+        self.records[:self.count] = [None] * self.count
+        self.count = 0
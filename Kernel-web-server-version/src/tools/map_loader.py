@@ -0,0 +1,180 @@
+'''
+the loader of the map files: the map is checked in one pass of numpy over all the edges and the adjacency is built in the CSR format
+the map files are json files (the format of the maps folder) or npz files of the same fields as numpy arrays, the npz format is
+faster to load for the large maps (most of the time of a large json map is parsing the json), a json map is compiled to it with
+python -m src.tools.map_loader maps/map1.json maps/map1.npz
+
+the checks (all the problems of a map are reported together in the ValueError):
+## the fields exist and number_of_nodes is a positive integer
+## list_of_edges is a list of [node_id, node_id] pairs of integers and number_of_edges (if it exists) is its length
+## the node ids of the edges are in the range 0 to number_of_nodes - 1
+## there are no self-loops and no duplicate edges ([u, v] and [v, u] are the same edge)
+## strategic_nodes and scores_of_strategic_nodes have the same length, the strategic nodes are in the range and not repeated
+## the scores are positive integers (the score of the end of the game is divided by them)
+'''
+
+import contextlib
+import gc
+import itertools
+import json
+import sys
+
+import numpy as np
+
+
+FIELDS = ['number_of_nodes', 'list_of_edges', 'strategic_nodes', 'scores_of_strategic_nodes']
+MAXIMUM_SHOWN = 5 # the number of the wrong edges or nodes that are shown in an error
+
+
+class Map:
+    def __init__(self, number_of_nodes, edges, strategic_nodes, scores) -> None:
+        self.number_of_nodes = number_of_nodes
+        self.edges = edges # the edges as an array of [node_id, node_id] rows in the order of the map file
+        self.strategic_nodes = strategic_nodes
+        self.scores = scores # the scores of the strategic nodes
+        # the adjacent nodes of the node i are indices[indptr[i]:indptr[i + 1]],
+        # in the order of the edges of the map file (like appending each edge to the lists of its two nodes)
+        self.indptr, self.indices = get_adjacency(number_of_nodes, edges)
+
+    def to_dict(self):
+        # the fields of the map file as numpy arrays
+        return {'number_of_nodes': self.number_of_nodes, 'number_of_edges': len(self.edges), 'list_of_edges': self.edges,
+                'strategic_nodes': self.strategic_nodes, 'scores_of_strategic_nodes': self.scores}
+
+    def save(self, path):
+        # save the map in the npz format
+        np.savez(path, **self.to_dict())
+
+
+def get_adjacency(number_of_nodes, edges):
+    # the adjacency in the CSR format, each edge [u, v] is v in the list of u and u in the list of v
+    # the stable sort keeps the order of the edges in the list of each node
+    sources = edges.reshape(-1)
+    targets = edges[:, ::-1].reshape(-1)
+    order = np.argsort(sources, kind='stable')
+    indptr = np.zeros(number_of_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=number_of_nodes), out=indptr[1:])
+    return indptr, targets[order]
+
+
+def show(label, rows, items):
+    # the first wrong rows with their items, like "list_of_edges[84] = [1, 44], list_of_edges[85] = [3, 44] and 2 more"
+    shown = ', '.join(f'{label}[{row}] = {item}' for row, item in zip(rows[:MAXIMUM_SHOWN].tolist(), items[rows[:MAXIMUM_SHOWN]].tolist()))
+    return shown + (f' and {len(rows) - MAXIMUM_SHOWN} more' if len(rows) > MAXIMUM_SHOWN else '')
+
+
+def as_integers(value, ndim):
+    # value as an array of integers with ndim dimensions (the rows of list_of_edges are pairs), None if it's not one
+    if ndim == 2 and isinstance(value, list):
+        # the list of pairs is flattened first, numpy is much slower on a list of small lists
+        try:
+            if value and set(map(len, value)) != {2}:
+                return None
+        except TypeError:
+            return None
+        value = np.array(list(itertools.chain.from_iterable(value))).reshape(-1, 2)
+    try:
+        array = np.asarray(value)
+    except ValueError:
+        # the lists of different lengths
+        return None
+    if array.size == 0:
+        return np.zeros((0, 2) if ndim == 2 else 0, dtype=np.int64)
+    if array.dtype.kind not in 'iu' or array.ndim != ndim or (ndim == 2 and array.shape[1] != 2):
+        return None
+    return array.astype(np.int64)
+
+
+def validate_map(map_json, name='the map'):
+    # check the map (the fields of a map file) and return it as a Map, raise a ValueError of all the problems of the map
+    errors = [f'{field} is missing' for field in FIELDS if field not in map_json]
+    number_of_nodes = np.asarray(map_json.get('number_of_nodes', 0))
+    if 'number_of_nodes' in map_json and (number_of_nodes.ndim != 0 or number_of_nodes.dtype.kind not in 'iu' or number_of_nodes <= 0):
+        errors.append(f"number_of_nodes should be a positive integer, it is {map_json['number_of_nodes']!r}")
+    if errors:
+        raise ValueError(f'{name} is not valid:\n  ' + '\n  '.join(errors))
+    number_of_nodes = int(number_of_nodes)
+
+    edges = as_integers(map_json['list_of_edges'], 2)
+    if edges is None:
+        errors.append('list_of_edges should be a list of [node_id, node_id] pairs of integers')
+    else:
+        if 'number_of_edges' in map_json and np.asarray(map_json['number_of_edges']).tolist() != len(edges):
+            errors.append(f"number_of_edges is {np.asarray(map_json['number_of_edges']).tolist()!r} but list_of_edges has {len(edges)} edges")
+        out_of_range = ((edges < 0) | (edges >= number_of_nodes)).any(axis=1)
+        if out_of_range.any():
+            errors.append(f'{out_of_range.sum()} edges have node ids out of the range 0 to {number_of_nodes - 1}: '
+                          + show('list_of_edges', np.flatnonzero(out_of_range), edges))
+        self_loops = np.flatnonzero(edges[:, 0] == edges[:, 1])
+        if len(self_loops):
+            errors.append(f'{len(self_loops)} edges are self-loops: ' + show('list_of_edges', self_loops, edges))
+
+        # the edges that are repeated after their first time, [u, v] is the same edge as [v, u]
+        rows = np.flatnonzero(~out_of_range)
+        keys = edges[rows].min(axis=1) * number_of_nodes + edges[rows].max(axis=1)
+        order = np.argsort(keys, kind='stable')
+        repeated = np.sort(rows[order[1:][keys[order[1:]] == keys[order[:-1]]]])
+        if len(repeated):
+            errors.append(f'{len(repeated)} edges are duplicates of earlier edges: ' + show('list_of_edges', repeated, edges))
+
+    strategic_nodes = as_integers(map_json['strategic_nodes'], 1)
+    scores = as_integers(map_json['scores_of_strategic_nodes'], 1)
+    if strategic_nodes is None:
+        errors.append('strategic_nodes should be a list of integers')
+    else:
+        out_of_range = np.flatnonzero((strategic_nodes < 0) | (strategic_nodes >= number_of_nodes))
+        if len(out_of_range):
+            errors.append(f'{len(out_of_range)} strategic nodes are out of the range 0 to {number_of_nodes - 1}: '
+                          + show('strategic_nodes', out_of_range, strategic_nodes))
+        _, first = np.unique(strategic_nodes, return_index=True)
+        repeated = np.setdiff1d(np.arange(len(strategic_nodes)), first)
+        if len(repeated):
+            errors.append(f'{len(repeated)} strategic nodes are repeated: ' + show('strategic_nodes', repeated, strategic_nodes))
+    if scores is None:
+        errors.append('scores_of_strategic_nodes should be a list of integers')
+    else:
+        not_positive = np.flatnonzero(scores <= 0)
+        if len(not_positive):
+            errors.append(f'{len(not_positive)} scores of strategic nodes are not positive: '
+                          + show('scores_of_strategic_nodes', not_positive, scores))
+    if strategic_nodes is not None and scores is not None and len(strategic_nodes) != len(scores):
+        errors.append(f'there are {len(strategic_nodes)} strategic_nodes but {len(scores)} scores_of_strategic_nodes')
+
+    if errors:
+        raise ValueError(f'{name} is not valid:\n  ' + '\n  '.join(errors))
+    return Map(number_of_nodes, edges.astype(np.int32), strategic_nodes.astype(np.int32), scores.astype(np.int32))
+
+
+@contextlib.contextmanager
+def paused_gc():
+    # pause the garbage collector, it scans the new objects again and again while millions of them are made
+    # (the lists of a large json map or the nodes of the game), none of them are garbage
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def load_map(map_file):
+    # load and check a map file (json or npz)
+    if map_file.endswith('.npz'):
+        with np.load(map_file) as npz_file:
+            map_json = {field: npz_file[field] for field in npz_file.files}
+    else:
+        with open(map_file) as json_file, paused_gc():
+            map_json = json.load(json_file)
+    return validate_map(map_json, map_file)
+
+
+if __name__ == '__main__':
+    # check a map file and save it in the npz format if a second path is given
+    if len(sys.argv) < 2:
+        print('usage: python -m src.tools.map_loader <map file> [<npz file>]')
+        sys.exit(1)
+    map_data = load_map(sys.argv[1])
+    print(f'{sys.argv[1]}: {map_data.number_of_nodes} nodes, {len(map_data.edges)} edges, {len(map_data.strategic_nodes)} strategic nodes')
+    if len(sys.argv) > 2:
+        map_data.save(sys.argv[2])
@@ -0,0 +1,92 @@
+'''
+the number of calls, the latency and the response size of the APIs for each player
+the metrics are recorded only if metrics is true in the config (main_game.metrics is None otherwise)
+
+## totals: for each (api, player_id): the number of calls, the total time, the total response size
+##     and the last samples of the latency for the percentiles (p50, p90, p99)
+## turns: the same for the calls of the current turn, they are saved in the log of the turn at the end of it
+##     as "metrics": {api: {player_id: {"count", "total", "p50", "p90", "p99", "bytes"}}}
+the totals are saved in the log at the end of the game (the "metrics" key of the log)
+'''
+
+import math
+import threading
+
+
+QUANTILES = [0.5, 0.9, 0.99]
+
+
+def quantile(samples, q):
+    # the nearest-rank percentile of the sorted samples
+    return samples[max(math.ceil(q * len(samples)) - 1, 0)]
+
+
+def describe(count, total, samples, size):
+    # the times are rounded to nanoseconds to keep the log small
+    samples = sorted(samples)
+    return {"count": count, "total": round(total, 9), "p50": round(quantile(samples, 0.5), 9),
+            "p90": round(quantile(samples, 0.9), 9), "p99": round(quantile(samples, 0.99), 9), "bytes": size}
+
+
+class Metrics:
+    def __init__(self, size=1000) -> None:
+        self.size = size # the number of latency samples that are kept for each (api, player_id)
+        self.totals = {} # (api, player_id): [count, total time, total response size, samples]
+        self.turn = {} # (api, player_id): [latencies, total response size] of the calls in the current turn
+        self.lock = threading.Lock()
+
+    def record(self, api, player_id, seconds, size=0):
+        # this function is called after each call of an API, so it should be fast
+        key = (api, player_id)
+        with self.lock:
+            total = self.totals.get(key)
+            if total is None:
+                total = self.totals[key] = [0, 0.0, 0, []]
+            # the samples are a ring of the last calls
+            if total[0] < self.size:
+                total[3].append(seconds)
+            else:
+                total[3][total[0] % self.size] = seconds
+            total[0] += 1
+            total[1] += seconds
+            total[2] += size
+
+            turn = self.turn.get(key)
+            if turn is None:
+                turn = self.turn[key] = [[], 0]
+            turn[0].append(seconds)
+            turn[1] += size
+
+    def pop_turn(self):
+        # return the metrics of the calls since the last pop_turn (the current turn) and start a new turn
+        with self.lock:
+            turn, self.turn = self.turn, {}
+        output = {}
+        for (api, player_id), (latencies, size) in turn.items():
+            output.setdefault(api, {})[str(player_id)] = describe(len(latencies), sum(latencies), latencies, size)
+        return output
+
+    def summary(self):
+        # return the metrics of all the calls
+        with self.lock:
+            totals = [(key, total[:3] + [list(total[3])]) for key, total in self.totals.items()]
+        output = {}
+        for (api, player_id), (count, seconds, size, samples) in totals:
+            output.setdefault(api, {})[str(player_id)] = describe(count, seconds, samples, size)
+        return output
+
+    def prometheus(self):
+        # return the metrics in the text format of prometheus
+        lines = ['# HELP kernel_api_latency_seconds the latency of the API calls',
+                 '# TYPE kernel_api_latency_seconds summary']
+        sizes = ['# HELP kernel_api_response_bytes_total the total size of the responses of the API calls',
+                 '# TYPE kernel_api_response_bytes_total counter']
+        for api, players in sorted(self.summary().items()):
+            for player_id, metrics in sorted(players.items()):
+                labels = f'api="{api}",player="{player_id}"'
+                for q in QUANTILES:
+                    lines.append(f'kernel_api_latency_seconds{{{labels},quantile="{q}"}} {metrics["p" + str(round(q * 100))]:.9f}')
+                lines.append(f'kernel_api_latency_seconds_sum{{{labels}}} {metrics["total"]:.9f}')
+                lines.append(f'kernel_api_latency_seconds_count{{{labels}}} {metrics["count"]}')
+                sizes.append(f'kernel_api_response_bytes_total{{{labels}}} {metrics["bytes"]}')
+        return '\n'.join(lines + sizes) + '\n'
@@ -0,0 +1,37 @@
+'''
+send the changes of the game state to the clients that listen to the stream API
+'''
+
+import queue
+import threading
+
+
+class StateStream:
+    def __init__(self, max_events=10000) -> None:
+        self.listeners = [] # a queue of events for each client that listens to the stream
+        self.max_events = max_events # the maximum number of events that wait for a slow client
+        self.lock = threading.Lock()
+
+    def listen(self):
+        # add a new listener and return its queue of events
+        events = queue.Queue(maxsize=self.max_events)
+        with self.lock:
+            self.listeners.append(events)
+        return events
+
+    def stop(self, events):
+        # remove the listener of the queue
+        with self.lock:
+            if events in self.listeners:
+                self.listeners.remove(events)
+
+    def publish(self, event):
+        # add the event to the queue of all the listeners
+        for events in list(self.listeners):
+            try:
+                events.put_nowait(event)
+            except queue.Full:
+                # the client is too slow, drop its events and send it the whole game state instead
+                with events.mutex:
+                    events.queue.clear()
+                events.put_nowait(None)
@@ -19,15 +19,15 @@ def change_turn(main_game):
         # add the turn number to the logs 
         if main_game.debug:
             print("start turn:", main_game.turn_number)
-            main_game.print("----------------------------- start turn: " + str(main_game.turn_number)+"----------------------------")
-            main_game.print("player: "+str(player_id)+ ' -- start time '+ datetime.datetime.now().strftime("%H:%M:%S"))
-            # print the owner and number of troops of each node at the beginning of the turn
+        main_game.debug_log.log('turns', 1, "----------------------------- start turn: {}----------------------------", main_game.turn_number)
+        main_game.debug_log.log('turns', 1, "player: {} -- start time {:%H:%M:%S}", player_id, datetime.datetime.now())
+        # print the owner and number of troops of each node at the beginning of the turn
+        if main_game.debug_log.enabled('turns', 2):
             for i in main_game.nodes.values():
-                main_game.print(f"node {i.id}: owner: {i.owner.id if i.owner is not None else -1}, number of troops: {i.number_of_troops} , number of fort troops: {i.number_of_fort_troops}")
+                main_game.debug_log.log('turns', 2, "node {}: owner: {}, number of troops: {} , number of fort troops: {}", i.id, i.owner.id if i.owner is not None else -1, i.number_of_troops, i.number_of_fort_troops)
 
         # show number of troops that the player did not put on the map
-        if main_game.debug:
-            main_game.print(f"player {player_id} has {main_game.player_turn.number_of_troops_to_place} troops to put on the map")
+        main_game.debug_log.log('turns', 1, "player {} has {} troops to put on the map", player_id, main_game.player_turn.number_of_troops_to_place)
         # request the player to play
         resp = start_turn_request(player_id, main_game)
 
@@ -48,8 +48,7 @@ def change_turn(main_game):
 
         # announce the end of the turn to the player
         end_turn_request(player_id, main_game)
-        if main_game.debug:
-            main_game.print("end turn: "+ datetime.datetime.now().strftime("%H:%M:%S"))
+        main_game.debug_log.log('turns', 1, "end turn: {:%H:%M:%S}", datetime.datetime.now())
         # check if the game is finished
         check_finish(main_game)
 
@@ -38,16 +38,14 @@ def check_finish(main_game):
     # check if there is a player with enough strategic nodes to win    
     for i in range(len(players_strategic_nodes_count)):
         if players_strategic_nodes_count[i] >= int(main_game.config["number_of_strategic_nodes_to_win"]):
-            if main_game.debug:
-                main_game.print("player won because of having enough strategic nodes")
+            main_game.debug_log.log('game', 1, "player won because of having enough strategic nodes")
             scores = calculate_score(main_game)
             scores[i] += sum(scores)
             game_finished(main_game, scores)
             return
     # check if the game is finished
     if main_game.turn_number >= int(main_game.config["number_of_turns"]):
-        if main_game.debug:
-            main_game.print("game finished because of number of turns")
+        main_game.debug_log.log('game', 1, "game finished because of number of turns")
         scores = calculate_score(main_game)
         game_finished(main_game, scores)
         return
@@ -58,12 +56,21 @@ def game_finished(main_game, score):
     if not os.path.exists("log"):
         os.makedirs("log")
 
+    # add the metrics of the API calls to the log file
+    if main_game.metrics is not None:
+        main_game.log["metrics"] = main_game.metrics.summary()
+        main_game.write_log(['metrics', main_game.log["metrics"]])
+
     # add score the the log file 
     main_game.log["score"] = score
     
-    # generate and save the main_game.log file into a json file in the log folder
-    with open("log/" + datetime.datetime.now().strftime("%Y-%m-%d-%H-%M-%S") + ".json", "w") as log_file:
-        json.dump(main_game.log, log_file)
+    # the streaming log already has the turns, so just the score is added to it
+    # otherwise generate and save the main_game.log file into a json file in the log folder
+    if main_game.write_log(['score', score]):
+        main_game.log_writer.close()
+    else:
+        with open("log/" + datetime.datetime.now().strftime("%Y-%m-%d-%H-%M-%S") + ".json", "w") as log_file:
+            json.dump(main_game.log, log_file)
     
     # generate and save an export from main_game object and save in the result log folder 
     # generate export 
@@ -85,11 +92,7 @@ def game_finished(main_game, score):
         json.dump(export, result_log_file)
 
 
-    # write debug_logs in the text file in the debug_log folder
-    if main_game.debug:
-        # make debug_log folder if it does not exist
-        if not os.path.exists("debug_log"):
-            os.makedirs("debug_log")
-        with open("debug_log/" + datetime.datetime.now().strftime("%Y-%m-%d-%H-%M-%S") + ".txt", "w") as debug_log_file:
-            debug_log_file.write(main_game.debug_logs)
+    # write the rest of the debug logs in the text file in the debug_log folder
+    # debug_levels can turn on the logs without debug, and nothing is written if the buffer is empty
+    main_game.debug_log.flush()
     main_game.finish_func()
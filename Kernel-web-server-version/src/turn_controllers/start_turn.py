@@ -22,22 +22,22 @@ def start_turn_request(player_id: int, main_game) -> None:
     else:
         url = f'http://{ip}:{port}/turn'
 
-    headers = {'x-access-token': token}
+    # the version of the game state is sent so the player can wait for its mirror of the stream API to reach it
+    # and the time of the turn is sent so the player can send its actions before the turn ends
+    turn_time = main_game.config["init_time"] if main_game.game_state == 1 else main_game.config["turn_time"]
+    headers = {'x-access-token': token, 'x-state-version': str(main_game.version), 'x-turn-time': str(turn_time)}
     try:
         response = requests.get(url, headers=headers, timeout=main_game.config["timeout"])
         if response.status_code != 200:
             if 'error' not in response:
                 print("Unknown error")
-                if main_game.debug:
-                    main_game.print("Unknown error")
+                main_game.debug_log.log('game', 1, "Unknown error")
             else:
                 print(response['error'])
-                if main_game.debug:
-                    main_game.print(response['error'])
+                main_game.debug_log.log('game', 1, '{}', response['error'])
     except:
         print(f"player{player_id} didn't response")
-        if main_game.debug:
-            main_game.print(f"player{player_id} didn't respond")
+        main_game.debug_log.log('game', 1, "player{} didn't respond", player_id)
         return -1
     
 
@@ -63,16 +63,13 @@ def end_turn_request(player_id, main_game):
         if response.status_code != 200:
             if 'error' not in response:
                 print("Unknown error")
-                if main_game.debug:
-                    main_game.print("Unknown error")
+                main_game.debug_log.log('game', 1, "Unknown error")
             else:
                 print(response['error'])
-                if main_game.debug:
-                    main_game.print(response['error'])
+                main_game.debug_log.log('game', 1, '{}', response['error'])
     except:
         print(f"player{player_id} didn't response")
-        if main_game.debug:
-            main_game.print(f"player{player_id} didn't response")
+        main_game.debug_log.log('game', 1, "player{} didn't response", player_id)
         return -1
     
 
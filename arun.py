@@ -1,5 +1,7 @@
 import os
+import runpy
 import shutil
+import sys
 
 filename = 'main.py'
 path = r"Kernel-faster-for-python"
@@ -12,6 +14,13 @@ for player in players:
 
 print(f"All {filename} file(s) are copied! \n")
 
-os.system(f"python {os.path.join(path, 'run.py')}")
+# the modules that main.py imports from the src folder of the bot are found by adding it to the src package of the kernel
+# (like install_bot of benchmarks/match.py), so run.py of the kernel runs in this process
+sys.path.insert(0, os.path.abspath(path))
+import src
+bot_src = os.path.abspath('src')
+if bot_src not in src.__path__:
+	src.__path__.append(bot_src)
+runpy.run_path(os.path.join(path, 'run.py'), run_name='__main__')
 
 input("Press enter to exit...")
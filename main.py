@@ -1,17 +1,26 @@
 from collections import OrderedDict
 from typing import Dict, List
 from src import game
+from src.profiler import Profiler
+from src.rules import Rules
+from src.simulator import Simulator
+from src.planner import AttackPlanner
+from src.allocation import allocate_troops
+from src.threat import ThreatMap, get_edges
+from src.opponents import OpponentModel
+from src.graph import get_map_graph
+from src.parameters import Parameters
 import numpy as np
 import itertools
+import os
 import operator
 import random
 import copy
+import time
 
 
-MAXIMUM_INITIAL_ORDINARY_NODES = 10
-MINIMUM_STRATEGY_TROOPS = 4
-BOUNDARY_TROOPS = 2  # in first main phase turn, it increases by one (=3)
-ORDINARY_TROOPS_AFTER_FORTRESS = 2
+PARAMETERS = Parameters.load(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'parameters.json'))  # the tuning constants
+BOUNDARY_TROOPS = PARAMETERS.boundary_troops  # in first main phase turn, it increases by one
 ATTACK_FLAG = True  # one turn defend, another turn attack
 ATTACK_NODE = None
 ATTACK_DEST = None
@@ -25,6 +34,20 @@ FORT_NODE = None
 MAIN_NODE = None
 MAIN_NODE_FORMER = None  # the original main node
 MAP : Dict[int, Dict[int, List[int]]] = dict()  # {node: {level: [related neighbors]}}
+MAP_ANALYSIS = None  # the analysis of the map from the kernel (see get_map_analysis), False if the kernel doesn't have it
+
+INIT_TIME = 0.7  # init_time and turn_time of the kernel, used if the client doesn't get the time of the turn from the kernel
+TURN_TIME = 1.5
+SAFETY_MARGIN = 0.2  # the actions are sent this many seconds before the deadline of the turn
+
+THREAT_MAP = None  # ((version of the nodes, updates of the opponent model), ThreatMap) of the last get_threat_map
+EDGES = None  # the edges of the map for the threat maps (see get_map_edges)
+MAP_GRAPH = None  # the MapGraph of the map (see get_graph)
+OPPONENTS = None  # the OpponentModel of the other players, it's updated at the beginning and the end of my turns
+
+PROFILE = False  # time the phases and helpers of the turns, the report is saved in the profile folder at the end of the match
+PROFILE_CPROFILE = False  # also run cProfile in each turn (it makes the turns slower)
+PROFILER = Profiler(PROFILE, PROFILE_CPROFILE, budgets={'initializer': INIT_TIME, 'turn': TURN_TIME})
 
 
 class Node:
@@ -64,10 +87,16 @@ class Node:
 
 
 class Nodes:
-    __slots__ = ['game', 'strategic_nodes', 'fort_troops', 'troops_count', 'adjacents', 'owners', 'nodes', 'name']
+    __slots__ = ['game', 'strategic_nodes', 'fort_troops', 'troops_count', 'adjacents', 'owners', 'nodes', 'name', 'version']
 
-    def __init__(self, game, strategic_nodes=None, fort_troops=None, troops_count=None, owners=None, adjacents=None, nodes=None, name=None):
+    def __init__(self, game, strategic_nodes=None, fort_troops=None, troops_count=None, owners=None, adjacents=None, nodes=None, name=None, version=None):
         self.game = game
+        if (owners is None) and (troops_count is None) and (fort_troops is None) and (version is None):
+            if (changes := get_changes(self.game, -1)) is not None:
+                owners, troops_count, fort_troops = split_changes(changes['changes'])
+                version = changes['version']
+
+        self.version = version  # the version of the game state that the nodes are updated to
         self.strategic_nodes = strategic_nodes if strategic_nodes is not None else Nodes.get_strategic_nodes_dict(self.game)
         self.fort_troops = fort_troops if fort_troops is not None else keys_to_int(self.game.get_number_of_fort_troops())
         self.troops_count = troops_count if troops_count is not None else keys_to_int(self.game.get_number_of_troops())
@@ -146,6 +175,10 @@ class Nodes:
         return total_paths
 
     def shortest_path(self, start, stop, player_id=None):
+        # the path is read from the distances of the map analysis if the kernel has it and the path can pass any node
+        if (player_id is None) and (analysis := get_map_analysis(self.game)) is not None and len(analysis['distances']):
+            return get_path(analysis, start, stop)
+
         paths = self.find_paths(start, stop, player_id=player_id)
         if paths:
             return min(paths, key=len)
@@ -171,6 +204,23 @@ class Nodes:
         })
 
     def update(self, owner=True, troops=True, fort_troops=True):
+        """ Apply the changes of the nodes since the last update in place, or fetch the whole data if the changes are not available """
+
+        if (changes := get_changes(self.game, self.version if self.version is not None else -1)) is not None:
+            nodes = {node.node_id: node for node in self.nodes}
+            for node_id, (owner_, troops_, fort_troops_) in changes['changes'].items():
+                self.owners[node_id] = owner_
+                self.troops_count[node_id] = troops_
+                self.fort_troops[node_id] = fort_troops_
+                if node_id in nodes:
+                    nodes[node_id].owner = owner_
+                    nodes[node_id].troops = troops_
+                    nodes[node_id].fort_troops = fort_troops_
+
+            self.version = changes['version']
+            return
+
+        self.version = None
         new_data = {
             'owner': keys_to_int(self.game.get_owners()) if owner else None,
             'troops': keys_to_int(self.game.get_number_of_troops()) if troops else None,
@@ -186,7 +236,7 @@ class Nodes:
                     self.owners = values
                 elif param == 'troops':
                     self.troops_count = values
-                elif param == 'fort-troops':
+                elif param == 'fort_troops':
                     self.fort_troops = values
 
     def copy(self):
@@ -198,14 +248,19 @@ class Nodes:
             for key in self.__slots__
         }
 
-    def get_weights(self, node_id, points=3):
+    @PROFILER.timed
+    def get_weights(self, node_id, points=3, stop_time=None):
         ''' 
         calculate the density of enemies from boundary nodes due to <node_id>
         weight = sum(number-of-enemies * 1/level)
+        if the time is up (stop_time), the weights of the rest of the boundary nodes are not calculated
         '''
 
         weights = {}  # node: weight
         for node in self.get_boundaries(node_id).nodes:
+            if (stop_time is not None) and weights and time_is_up(stop_time):
+                break
+
             weight = 0
             level = 1
             checked_nodes = set()
@@ -238,6 +293,13 @@ class Nodes:
         return f"{self.name if self.name else 'Nodes'}(length={len(self)})"
 
 
+def set_parameters(**values):
+    """ Change the tuning constants before the match (the self-play harness gives each player its own parameters) """
+
+    global BOUNDARY_TROOPS
+    PARAMETERS.update(values)
+    BOUNDARY_TROOPS = PARAMETERS.boundary_troops
+
 def initialize_player_id(game):
     global PLAYER_ID
     PLAYER_ID = game.get_player_id()['player_id']
@@ -245,6 +307,14 @@ def initialize_player_id(game):
 def initialize_map(game, level):
     global MAP
 
+    if (analysis := get_map_analysis(game)) is not None and len(analysis['distances']):
+        # the rings are read from the map analysis of the kernel
+        for node_id in range(analysis['number_of_nodes']):
+            rings = MAP.setdefault(node_id, {})
+            for ring_level in range(len(rings), level + 1):
+                rings[ring_level] = get_ring(analysis, node_id, ring_level)
+        return
+
     adjacents = keys_to_int(game.get_adj())
     for node_id in adjacents:
         if level == 1:
@@ -260,6 +330,61 @@ def initialize_map(game, level):
             neighbors -= set(MAP[node_id][level-1] + MAP[node_id][level-2])
             MAP[node_id][level] = list(neighbors)
 
+def get_map_analysis(game):
+    """ Return the analysis of the map (the distances, rings and cut nodes of src/tools/map_analysis.py of the kernel), or None if the kernel doesn't have it """
+
+    global MAP_ANALYSIS
+    if MAP_ANALYSIS is None:
+        try:
+            MAP_ANALYSIS = game.get_map_analysis() or False
+        except Exception:
+            MAP_ANALYSIS = False
+    return MAP_ANALYSIS or None
+
+def get_ring(analysis, node_id, level):
+    # the nodes at the distance level of the node ([] if the level is farther than all the nodes)
+    starts = analysis['ring_starts'][node_id]
+    if level >= len(starts) - 1:
+        return []
+    return analysis['ring_order'][node_id, starts[level]:starts[level + 1]].tolist()
+
+def get_path(analysis, start, stop):
+    # a shortest path from start to stop, each step goes back to an adjacent node that is one edge closer to start ([] if there is no path)
+    distances = analysis['distances'][start]
+    if distances[stop] < 0:
+        return []
+    indptr, indices = analysis['indptr'], analysis['indices']
+    path = [stop]
+    while path[-1] != start:
+        adjacents = indices[indptr[path[-1]]:indptr[path[-1] + 1]]
+        path.append(int(adjacents[distances[adjacents] == distances[path[-1]] - 1][0]))
+    return path[::-1]
+
+def get_changes(game, since):
+    """ Return the changed nodes since the version (keys are converted to integer), or None if the changes are not available """
+
+    try:
+        changes = game.get_changes(since)
+    except Exception:
+        return None
+
+    if not changes:
+        return None
+
+    changes['changes'] = keys_to_int(changes['changes'])
+    return changes
+
+def split_changes(changes):
+    """ Split the changed nodes ({node: [owner, troops, fort-troops]}) into owners, troops and fort-troops dicts """
+
+    owners, troops, fort_troops = {}, {}, {}
+    for node_id, (owner, troops_, fort_troops_) in changes.items():
+        owners[node_id] = owner
+        troops[node_id] = troops_
+        fort_troops[node_id] = fort_troops_
+
+    return owners, troops, fort_troops
+
 def conditional_getter(objects, function=None, **conditions):
     if function:
         objects = list(filter(function, objects))
@@ -295,10 +420,12 @@ def get_reserved_troops(game):
     return game.get_number_of_troops_to_put()['number_of_troops']
 
 
+@PROFILER.turn('initializer')
 def initializer(game: game.Game):
     """ Handle the initialization phase """
 
     global FORT_NODE, MAIN_NODE, MAIN_NODE_FORMER
+    stop_time = get_stop_time(game, INIT_TIME)
 
     turn = game.get_turn_number()['turn_number']
     player_turn = get_player_turn(turn)
@@ -312,278 +439,583 @@ def initializer(game: game.Game):
     print(f'Global Turn:  {turn:<6} Player Turn:  {player_turn:<6} Player ID: {PLAYER_ID}')
 
     nodes = Nodes(game, name='EntireNodes')
+    # the initializer is called while the player has troops to put
+    rules = get_rules(nodes, state=1, game_state=1, number_of_troops_to_put=1)
 
     if FORT_NODE is None:
         FORT_NODE = nodes.sort(key='score')(is_strategic=True, is_empty=True)[0].node_id
-        print(game.put_one_troop(FORT_NODE))
+        print(send(game, rules, 'put_one_troop', FORT_NODE))
         return
 
     if MAIN_NODE is None:
-        strategic_nodes = nodes(is_strategic=True, is_empty=True)
-        for node in strategic_nodes:
+        # the paths are found while there is time, the closest node of the checked nodes is chosen
+        strategic_nodes = []
+        for node in nodes(is_strategic=True, is_empty=True):
+            if strategic_nodes and time_is_up(stop_time):
+                break
             node.path = nodes.shortest_path(FORT_NODE, node.node_id)
+            strategic_nodes.append(node)
         MAIN_NODE = min(strategic_nodes, key=lambda node: len(node.path)).node_id
         MAIN_NODE_FORMER = MAIN_NODE
-        print(game.put_one_troop(MAIN_NODE))
+        print(send(game, rules, 'put_one_troop', MAIN_NODE))
         return
 
-    if len(nodes.filter(is_mine=True, is_strategic=False)) < MAXIMUM_INITIAL_ORDINARY_NODES:
+    if len(nodes.filter(is_mine=True, is_strategic=False)) < PARAMETERS.maximum_initial_ordinary_nodes:
         for neighbors in MAP[MAIN_NODE].values():
             for node in nodes.by_ids(neighbors):
                 if node.is_empty:
-                    print(game.put_one_troop(node.node_id))
+                    print(send(game, rules, 'put_one_troop', node.node_id))
                     return
 
     for node in nodes.by_ids(MAP[FORT_NODE][1]):
         if node.is_empty:
-            print(game.put_one_troop(node.node_id))
+            print(send(game, rules, 'put_one_troop', node.node_id))
             return
 
     for node in nodes.get_boundaries(MAIN_NODE)():
         if node.troops < BOUNDARY_TROOPS:
-            print(game.put_one_troop(node.node_id))
+            print(send(game, rules, 'put_one_troop', node.node_id))
             return
 
     for node in nodes(is_strategic=True, is_mine=True):
-        if node.troops < MINIMUM_STRATEGY_TROOPS:
-            print(game.put_one_troop(node.node_id))
+        if node.troops < PARAMETERS.minimum_strategy_troops:
+            print(send(game, rules, 'put_one_troop', node.node_id))
             return
 
-    print(game.put_one_troop(FORT_NODE))
+    print(send(game, rules, 'put_one_troop', FORT_NODE))
     return
 
 
+@PROFILER.turn('turn')
 def turn(game):
     """ Handle the main phase """
 
     global BOUNDARY_TROOPS, MAIN_NODE, FORT_FLAG, ATTACK_FLAG, ATTACK_NODE, ATTACK_DEST
     ATTACK_FLAG = not ATTACK_FLAG
+    stop_time = get_stop_time(game, TURN_TIME)
 
     turn = game.get_turn_number()['turn_number']
     player_turn = get_player_turn(turn)
     print(f'Global Turn:  {turn:<6} Player Turn:  {player_turn:<6} Player ID: {PLAYER_ID}')
 
-    nodes = Nodes(game, name='EntireNodes')
+    nodes = get_turn_nodes(game)
+    try:
+        if player_turn == INITIAL_TURNS+1:
+            BOUNDARY_TROOPS += 1
 
-    if player_turn == INITIAL_TURNS+1:
-        BOUNDARY_TROOPS += 1
+        if nodes.owners[MAIN_NODE] == PLAYER_ID:
+            MAIN_NODE = MAIN_NODE_FORMER
+        else:
+            new_node_id = None
+            for campus in [MAIN_NODE_FORMER, FORT_NODE]:
+                for neighbors in MAP[campus].values():
+                    for neighbor in nodes.by_ids(neighbors):
+                        if neighbor.is_mine:
+                            new_node_id = neighbor.node_id
+
+            if new_node_id is None:
+                new_node_id = nodes.filter(is_mine=True).sort('troops')()[0].node_id
+
+            if new_node_id is not None:
+                MAIN_NODE = nodes.get_integrated(new_node_id).sort('troops')()[0].node_id
+            else:
+                return
+
+
+        # put-troop state ----------------------------------
+        PROFILER.phase('put')
+        plan = TurnPlan(game, nodes, stop_time)
+        try:
+            plan_put_troops(plan)
+        except Exception as error:
+            # the plan is valid after each put, so the troops that are planned so far are sent
+            print('put-troop planning stopped:', error)
+        plan.flush()
+
+        to_state(game, 2)
+        nodes.update()
+        rules = get_rules(nodes, state=2)
+
+
+        # attack state -------------------------------------
+        PROFILER.phase('attack')
+        if ATTACK_FLAG:
+            if PARAMETERS.attack_planner:
+                rules = plan_attacks(game, nodes, rules, turn, stop_time)
+
+            elif ATTACK_NODE is not None:
+                while not time_is_up(stop_time):
+                    attack_node = nodes.by_id(ATTACK_NODE)
+                    if attack_node.troops < 3:
+                        break
+
+                    if ATTACK_DEST is None:
+                        if player_turn >= INITIAL_TURNS+MAIN_TURNS-5:  # last turns
+                            strategy_dest = nodes.filter(is_strategic=True, is_enemy=True, is_forted=False).sort(key='troops')()[0]
+                            path = nodes.shortest_path(ATTACK_NODE, strategy_dest.node_id)
+                            if len(path) <= 2:
+                                break
+
+                            ATTACK_DEST = path[1]
 
-    if nodes.owners[MAIN_NODE] == PLAYER_ID:
-        MAIN_NODE = MAIN_NODE_FORMER
-    else:
-        new_node_id = None
-        for campus in [MAIN_NODE_FORMER, FORT_NODE]:
-            for neighbors in MAP[campus].values():
-                for neighbor in nodes.by_ids(neighbors):
-                    if neighbor.is_mine:
-                        new_node_id = neighbor.node_id
-
-        if new_node_id is None:
-            new_node_id = nodes.filter(is_mine=True).sort('troops')()[0].node_id
-
-        if new_node_id is not None:
-            MAIN_NODE = nodes.get_integrated(new_node_id).sort('troops')()[0].node_id
+                        else:
+                            neighbors = list(filter(lambda node: node.is_enemy, nodes.by_ids(attack_node.adjacents)))
+                            if neighbors:
+                                ATTACK_DEST = min(neighbors, key=lambda node: node.troops).node_id
+                            else:
+                                break
+
+                    response = send(game, rules, 'attack', ATTACK_NODE, ATTACK_DEST, PARAMETERS.attack_fraction, PARAMETERS.attack_move_fraction)
+                    print(response)
+                    if response is None:
+                        break
+
+                    # the result of the dice is known by the kernel, so the nodes are updated after each attack
+                    nodes.update()
+                    rules = get_rules(nodes, state=2)
+                    if attack_node.is_strategic or response['won']==0:
+                        break
+
+                    ATTACK_NODE = ATTACK_DEST
+                    ATTACK_DEST = None
+
+            ATTACK_NODE = None
+            ATTACK_DEST = None
+
+        to_state(game, 3)
+        rules.state = 3
+
+
+        # move-troop state ---------------------------------
+        PROFILER.phase('move')
+        if ATTACK_FLAG and not time_is_up(stop_time):
+            for node in nodes.get_boundaries(MAIN_NODE)(function=lambda n: n.troops<BOUNDARY_TROOPS):
+                put_troops = BOUNDARY_TROOPS - node.troops
+                mine_neighbors = list(filter(lambda node: node.is_mine, nodes.by_ids(node.adjacents)))
+                if mine_neighbors:
+                    origin_node = random.choice(mine_neighbors)
+                    if origin_node.troops >= 3:
+                        response = send(game, rules, 'move_troop', origin_node.node_id, node.node_id, min(put_troops, origin_node.troops))
+                        if response is None:
+                            continue
+                        print(response)
+                        nodes.update(owner=False, fort_troops=False)
+                        break
+
+        to_state(game, 4)
+        rules.state = 4
+
+
+        # fort state ---------------------------------------
+        PROFILER.phase('fort')
+        if FORT_FLAG or time_is_up(stop_time):
+            fort_node = None
+        elif PARAMETERS.fort_planner:
+            fort_node = choose_fort_node(nodes, rules)
         else:
-            return
+            fort_node = nodes.by_id(FORT_NODE)
+        if (fort_node is not None) and fort_node.is_mine:
+            response = send(game, rules, 'fort', fort_node.node_id, fort_node.troops - PARAMETERS.ordinary_troops_after_fortress)
+            if response is not None:
+                print(response)
+                FORT_FLAG = True
 
+        to_state(game, 5)
+    finally:
+        # the board at the end of my turn, the next changes are the actions of the other players
+        # it's synced after an early return or an error too, otherwise my actions would be read as the actions of the other players
+        nodes.update()
+        OPPONENTS.sync(nodes.owners, nodes.troops_count, nodes.fort_troops, nodes.version)
 
-    # put-troop state ----------------------------------
-    put_empty_strategics(game, nodes)
-    nodes.update()
+    print('-'*50)
 
-    if ATTACK_FLAG:
-        put_troop_attacker(game, nodes)
-    else:
-        put_troop_defender(game, nodes)
 
-    to_state(game, 2)
-    nodes.update()
+def to_state(game, state):
+    if game.get_state()['state'] == state-1:
+        game.next_state()
 
+def get_rules(nodes, state, game_state=2, number_of_troops_to_put=0):
+    """ Return the local rules of the kernel for the current nodes, to check the actions before sending them """
 
-    # attack state -------------------------------------
-    if ATTACK_FLAG:
-        if ATTACK_NODE is not None:
-            while True:
-                attack_node = nodes.by_id(ATTACK_NODE)
-                if attack_node.troops < 3:
-                    break
+    return Rules(PLAYER_ID, nodes.owners, nodes.troops_count, nodes.fort_troops, nodes.adjacents,
+                 state=state, game_state=game_state, number_of_troops_to_put=number_of_troops_to_put)
 
-                if ATTACK_DEST is None:
-                    if player_turn >= INITIAL_TURNS+MAIN_TURNS-5:  # last turns
-                        strategy_dest = nodes.filter(is_strategic=True, is_enemy=True, is_forted=False).sort(key='troops')()[0]
-                        path = nodes.shortest_path(ATTACK_NODE, strategy_dest)
-                        if len(path) <= 2:
-                            break
+def send(game, rules, action, *args):
+    """ Send the action if the local rules accept it (the action is applied to the rules too), return None if they reject it """
 
-                        ATTACK_DEST = path[1].node_id
+    error = getattr(rules, 'check_' + action)(*args)
+    if error is not None:
+        print(f"{action}{args} is not sent: {error}")
+        return None
 
-                    else:
-                        neighbors = list(filter(lambda node: node.is_enemy, nodes.by_ids(attack_node.adjacents)))
-                        if neighbors:
-                            ATTACK_DEST = min(neighbors, key=lambda node: node.troops).node_id
-                        else:
-                            break
+    response = getattr(game, action)(*args)
+    # the result of an attack depends on the dice of the kernel, so the caller updates the nodes after it
+    if action != 'attack':
+        getattr(rules, action)(*args)
+    return response
 
-                response = game.attack(ATTACK_NODE, ATTACK_DEST, .95, .9)
-                print(response)
-                if attack_node.is_strategic or response['won']==0:
-                    break
+def get_simulator(nodes, turn_number):
+    """ Return the simulator of the current nodes for the searches of the turn """
 
-                ATTACK_NODE = ATTACK_DEST
-                ATTACK_DEST = None
+    return Simulator(nodes.owners, nodes.troops_count, nodes.fort_troops, nodes.adjacents, dict(nodes.strategic_nodes),
+                     PLAYER_ID, turn_number, PLAYERS)
 
-        ATTACK_NODE = None
-        ATTACK_DEST = None
+@PROFILER.timed
+def plan_attacks(game, nodes, rules, turn_number, stop_time):
+    """ Attack while the tree search finds a good attack and there is time, the search is repeated after each attack with its result """
 
-    to_state(game, 3)
+    edges = get_map_edges(nodes)
+    while not time_is_up(stop_time):
+        simulator = get_simulator(nodes, turn_number)
+        planner = AttackPlanner(simulator, min(time.perf_counter() + PARAMETERS.attack_search_time, stop_time),
+                                edges=edges, risk=PARAMETERS.attack_risk,
+                                weights=OPPONENTS.attack_weights() if OPPONENTS is not None else None)
+        action = planner.search()
+        if action is None:
+            break
 
+        print(f'attack plan: {planner.best_line()} ({planner.iterations} iterations)')
+        response = send(game, rules, 'attack', *action)
+        print(response)
+        if response is None:
+            break
 
-    # move-troop state ---------------------------------
-    if ATTACK_FLAG:
-        for node in nodes.get_boundaries(MAIN_NODE)(function=lambda n: n.troops<BOUNDARY_TROOPS):
-            put_troops = BOUNDARY_TROOPS - node.troops
-            mine_neighbors = list(filter(lambda node: node.is_mine, nodes.by_ids(node.adjacents)))
-            if mine_neighbors:
-                origin_node = random.choice(mine_neighbors)
-                if origin_node.troops >= 3:
-                    print(game.move_troop(origin_node.node_id, node.node_id, min(put_troops, origin_node.troops)))
-                    nodes.update(owner=False, fort_troops=False)
-                    break
+        nodes.update()
+        rules = get_rules(nodes, state=2)
 
-    to_state(game, 4)
+    return rules
 
+def get_turn_nodes(game):
+    """ Return the nodes at the beginning of my turn, the changes since the end of my last turn are read by the opponent model """
 
-    # fort state ---------------------------------------
-    fort_node = nodes.by_id(FORT_NODE)
-    if (not FORT_FLAG) and fort_node.is_mine:
-        print(game.fort(fort_node.node_id, fort_node.troops - ORDINARY_TROOPS_AFTER_FORTRESS))
-        FORT_FLAG = True
+    global OPPONENTS
+    if OPPONENTS is not None and OPPONENTS.version is not None:
+        if (changes := get_changes(game, OPPONENTS.version)) is not None:
+            OPPONENTS.observe(changes['changes'], changes['version'])
+            return Nodes(game, owners=dict(OPPONENTS.owners), troops_count=dict(OPPONENTS.troops), fort_troops=dict(OPPONENTS.fort_troops),
+                         adjacents=OPPONENTS.adjacents, version=changes['version'], name='EntireNodes')
 
-    to_state(game, 5)
+    nodes = Nodes(game, name='EntireNodes')
+    if OPPONENTS is None:
+        OPPONENTS = OpponentModel(PLAYER_ID, nodes.adjacents, PLAYERS)
+        OPPONENTS.sync(nodes.owners, nodes.troops_count, nodes.fort_troops, nodes.version)
+    else:
+        OPPONENTS.observe_board(nodes.owners, nodes.troops_count, nodes.fort_troops, nodes.version)
+    return nodes
 
-    print('-'*50)
+def get_map_edges(nodes):
+    """ Return the edges of the map for the threat maps, the map doesn't change in a match so they are built once """
 
+    global EDGES
+    if EDGES is None:
+        EDGES = get_edges(nodes.adjacents)
 
-def to_state(game, state):
-    if game.get_state()['state'] == state-1:
-        game.next_state()
+    return EDGES
+
+def get_graph(nodes):
+    """ Return the MapGraph of the map from the map analysis of the kernel (or from the adjacents without it), it's built once """
+
+    global MAP_GRAPH
+    if MAP_GRAPH is None:
+        MAP_GRAPH = get_map_graph(nodes.adjacents, list(nodes.strategic_nodes), get_map_analysis(nodes.game))
+
+    return MAP_GRAPH
+
+def get_threat_map(nodes):
+    """
+        Return the threat map of the nodes, it's computed once for each version of the game state (the version changes with each action)
+        and of the attack weights of the opponent model (they change with each of its updates), the local puts of TurnPlan reset it
+    """
+
+    global THREAT_MAP
+    key = (nodes.version, OPPONENTS.updates if OPPONENTS is not None else None)
+    if THREAT_MAP is None or nodes.version is None or THREAT_MAP[0] != key:
+        simulator = get_simulator(nodes, 0)
+        reinforcements = [simulator.calculate_number_of_troops(player_id) for player_id in range(PLAYERS)]
+        threat_map = ThreatMap(simulator.owners, simulator.troops, simulator.fort_troops,
+                               get_map_edges(nodes), PLAYER_ID, reinforcements,
+                               OPPONENTS.attack_weights() if OPPONENTS is not None else None)
+        THREAT_MAP = (key, threat_map)
 
-def is_state(game, state):
-    if game.get_state()['state'] == state:
+    return THREAT_MAP[1]
+
+def get_stop_time(game, turn_time):
+    """ Return the time (time.perf_counter) that the actions of the turn should be sent before """
+
+    # the client sets the deadline of the turn from the request of the kernel, otherwise the turn time is assumed
+    deadline = getattr(game, 'deadline', None)
+    if deadline is None:
+        deadline = time.perf_counter() + turn_time
+
+    return deadline - SAFETY_MARGIN
+
+def time_is_up(stop_time):
+    return time.perf_counter() >= stop_time
+
+
+class TurnPlan:
+    """
+    The troops to put in the put-troop state of the turn.
+    They are planned on the local nodes (so the plan is valid after each step) and sent together by flush.
+    The planning stops when the time is up, then the planned troops are sent before the deadline.
+    """
+
+    def __init__(self, game, nodes, stop_time):
+        self.game = game
+        self.nodes = nodes
+        self.stop_time = stop_time
+        self.reserved_troops = get_reserved_troops(game)
+        self.rules = get_rules(nodes, state=1, number_of_troops_to_put=self.reserved_troops)
+        self.actions = []  # [(node_id, number_of_troops)] in order
+        self.finished = False  # no more troops are planned (there is no troop left or the time is up)
+        self.timed_out = False
+
+    def put(self, node_id, number_of_troops):
+        """ Plan to put troops on one of my nodes or an empty node, the invalid puts are ignored """
+
+        error = self.rules.check_put_troop(node_id, number_of_troops)
+        if error is not None:
+            print(f"can't put {number_of_troops} troops on node {node_id} ({self.reserved_troops} troops left): {error}")
+            return False
+
+        global THREAT_MAP
+        self.rules.put_troop(node_id, number_of_troops)
+        # the troops of the nodes change without a new version, so the threat map of the nodes is made again
+        THREAT_MAP = None
+        node = self.nodes.by_id(node_id)
+        node.owner = PLAYER_ID
+        node.troops += number_of_troops
+        self.nodes.owners[node_id] = PLAYER_ID
+        self.nodes.troops_count[node_id] = node.troops
+        self.reserved_troops -= number_of_troops
+        self.actions.append((node_id, number_of_troops))
         return True
 
-def check_boundary_troops(game, nodes, node_id):
-    for node in nodes.get_boundaries(node_id)(function=lambda node: node.troops<BOUNDARY_TROOPS):
+    def finish(self):
+        self.finished = True
+
+    def is_open(self):
+        """ Return True if the plan can be refined: there are troops to put and there is time """
+
+        if time_is_up(self.stop_time):
+            self.timed_out = True
+            self.finished = True
+        return not self.finished
+
+    def flush(self):
+        """ Send the planned troops (one request for each node), the errors are printed so the next puts are still sent """
+
+        puts = {}
+        for node_id, number_of_troops in self.actions:
+            puts[node_id] = puts.get(node_id, 0) + number_of_troops
+
+        for node_id, number_of_troops in puts.items():
+            try:
+                print(self.game.put_troop(node_id, number_of_troops))
+            except Exception as error:
+                print(f"put_troop({node_id}, {number_of_troops}) failed: {error}")
+        self.actions = []
+
+
+def plan_put_troops(plan):
+    put_empty_strategics(plan)
+
+    if plan.is_open():
+        if ATTACK_FLAG:
+            put_troop_attacker(plan)
+        else:
+            put_troop_defender(plan)
+
+    # the planning was stopped by the deadline, so the rest of the troops are put on the main node
+    if plan.timed_out and plan.reserved_troops >= 1 and plan.nodes.by_id(MAIN_NODE).is_mine:
+        plan.put(MAIN_NODE, plan.reserved_troops)
+
+@PROFILER.timed
+def check_boundary_troops(plan, node_id):
+    for node in plan.nodes.get_boundaries(node_id)(function=lambda node: node.troops<BOUNDARY_TROOPS):
         put_troops = BOUNDARY_TROOPS - node.troops
-        if (reserved_troops := get_reserved_troops(game)) >= 1:
-            print(game.put_troop(node.node_id, min(put_troops, reserved_troops)))
+        if plan.reserved_troops >= 1:
+            plan.put(node.node_id, min(put_troops, plan.reserved_troops))
         else:
-            to_state(game, 2)
+            plan.finish()
             break
 
-        nodes.update(owner=False, fort_troops=False)
-
-def check_tortoise_defense(game, nodes, node_id):
+@PROFILER.timed
+def check_tortoise_defense(plan, node_id):
     for level in range(30, 0, -1):
-        for neighbor in nodes.by_ids(MAP[node_id][level]):
+        for neighbor in plan.nodes.by_ids(MAP[node_id][level]):
             if neighbor.is_mine:
-                put_troops = int(level*1.5)+1 - neighbor.troops
+                put_troops = int(level*PARAMETERS.tortoise_factor)+1 - neighbor.troops
                 if put_troops >= 1:
-                    if (reserved_troops := get_reserved_troops(game)) >= 1:
-                        print(game.put_troop(neighbor.node_id, min(put_troops, reserved_troops)))
+                    if plan.reserved_troops >= 1:
+                        plan.put(neighbor.node_id, min(put_troops, plan.reserved_troops))
                     else:
-                        to_state(game, 2)
+                        plan.finish()
                         return
 
-                    nodes.update(owner=False, fort_troops=False)
-
-def check_dense_enemies(game, nodes, node_id):
-    node_weight = nodes.get_weights(node_id)
+@PROFILER.timed
+def check_dense_enemies(plan, node_id):
+    node_weight = plan.nodes.get_weights(node_id, stop_time=plan.stop_time)
     weights_ = list(node_weight.values())
     nodes_ = list(node_weight.keys())
     weights_mean = np.mean(weights_)
     qualified_weights = list(filter(lambda x: x >= weights_mean, weights_))
 
-    reserved_troops = get_reserved_troops(game)
+    reserved_troops = plan.reserved_troops
     nodes_count = len(qualified_weights)
     if nodes_count > reserved_troops:
         nodes_count = reserved_troops
     node_troops = reserved_troops // nodes_count
 
     for node_id in sorted(nodes_, key=lambda node: node_weight[node], reverse=True)[:nodes_count]:
-        print(game.put_troop(node_id, node_troops))
-
-    nodes.update(owner=False, fort_troops=False)
+        plan.put(node_id, node_troops)
 
-def put_empty_strategics(game, nodes):
-    for node in nodes(is_strategic=True, is_empty=True):
-        if (reserved_troops := get_reserved_troops(game)) >= 1:
-            print(game.put_troop(node.node_id, min(MINIMUM_STRATEGY_TROOPS, reserved_troops)))
-            nodes.update(fort_troops=False)
+def put_empty_strategics(plan):
+    for node in plan.nodes(is_strategic=True, is_empty=True):
+        if plan.reserved_troops >= 1:
+            plan.put(node.node_id, min(PARAMETERS.minimum_strategy_troops, plan.reserved_troops))
         else:
-            to_state(game, 2)
+            plan.finish()
             return
 
-def put_empty_nodes(game, nodes, node_id):
-    empty_nodes = nodes(is_empty=True)
-    for node in empty_nodes:
-        node.path = nodes.shortest_path(node_id, node.node_id)
+@PROFILER.timed
+def put_empty_nodes(plan, node_id):
+    # the paths are found while there is time, the nodes without a path are skipped
+    empty_nodes = []
+    for node in plan.nodes(is_empty=True):
+        if time_is_up(plan.stop_time):
+            break
+        node.path = plan.nodes.shortest_path(node_id, node.node_id)
+        empty_nodes.append(node)
     for node in sorted(empty_nodes, key=lambda node: len(node.path)):
-        if (reserved_troops := get_reserved_troops(game)) >= 1:
-            print(game.put_troop(node.node_id, min(1, reserved_troops)))
-            nodes.update(fort_troops=False)
+        if plan.reserved_troops >= 1:
+            plan.put(node.node_id, min(1, plan.reserved_troops))
         else:
-            to_state(game, 2)
+            plan.finish()
             return
 
 
-def put_troop_defender(game, nodes):
-    check_boundary_troops(game, nodes, MAIN_NODE)
-
-    if is_state(game, 1):
-        check_boundary_troops(game, nodes, FORT_NODE)
-
-    if is_state(game, 1):
-        check_tortoise_defense(game, nodes, MAIN_NODE)
-
-    if is_state(game, 1):
-        check_dense_enemies(game, nodes, MAIN_NODE)
-
-    if is_state(game, 1):
-        put_empty_nodes(game, nodes, MAIN_NODE)
-
-def put_troop_attacker(game, nodes):
-    check_loose_strategics(game, nodes)
-
-    if is_state(game, 1):
-        check_low_enemies(game, nodes, FORT_NODE)
+def put_troop_defender(plan):
+    if PARAMETERS.put_allocator:
+        put_troop_allocator(plan)
+        return
 
-def check_loose_strategics(game, nodes):
+    check_boundary_troops(plan, MAIN_NODE)
+
+    if plan.is_open():
+        check_boundary_troops(plan, FORT_NODE)
+
+    if plan.is_open():
+        check_tortoise_defense(plan, MAIN_NODE)
+
+    if plan.is_open():
+        check_dense_enemies(plan, MAIN_NODE)
+
+    if plan.is_open():
+        put_empty_nodes(plan, MAIN_NODE)
+
+@PROFILER.timed
+def put_troop_allocator(plan):
+    """ Put all the troops at once where they add the most to the expected score, the rest is put on the main node """
+
+    nodes = plan.nodes
+    # the troops that each enemy gets at the beginning of its turn
+    # the strongest enemy of each node
+    strengths = get_threat_map(nodes).strengths.max(axis=0)
+
+    troops, threats, values = {}, {}, {}
+    for node in nodes(function=lambda node: node.is_mine or node.is_empty):
+        troops[node.node_id] = node.troops + node.fort_troops if node.is_mine else 0
+        threats[node.node_id] = int(strengths[node.node_id])
+        values[node.node_id] = get_node_value(node)
+
+    # the border nodes also hold the territory behind them
+    if PARAMETERS.territory_weight:
+        for node_id, value in get_territory_values(nodes, values).items():
+            values[node_id] += PARAMETERS.territory_weight * value
+
+    for node_id, number_of_troops in allocate_troops(plan.reserved_troops, troops, threats, values).items():
+        plan.put(node_id, number_of_troops)
+
+    if plan.reserved_troops >= 1 and nodes.by_id(MAIN_NODE).is_mine:
+        plan.put(MAIN_NODE, plan.reserved_troops)
+    plan.finish()
+
+def get_node_value(node):
+    # the score of a node at the end of the match (check_finish)
+    return 1000 + (3000 // node.score if node.is_strategic else 0)
+
+@PROFILER.timed
+def get_territory_values(nodes, values):
+    """
+        Return the value of my nodes that each of my nodes defends besides itself: the nodes that the enemies can only reach through it,
+        or its share of the nodes behind the smallest cut between the enemies and my main and strategic nodes (the larger of them)
+    """
+
+    graph = get_graph(nodes)
+    defended = graph.defended_values(nodes.owners, PLAYER_ID, values)
+    territory = {node_id: value - values[node_id] for node_id, value in defended.items() if value > values[node_id]}
+    core = [MAIN_NODE] + [node.node_id for node in nodes(is_strategic=True, is_mine=True)]
+    for node_id, value in graph.cut_values(nodes.owners, PLAYER_ID, core, values).items():
+        territory[node_id] = max(territory.get(node_id, 0), value)
+    return territory
+
+@PROFILER.timed
+def choose_fort_node(nodes, rules):
+    """
+        Return my node that the fort saves the most strategic value on: the value of my strategic nodes that it defends
+        (itself or the strategic nodes that the enemies can only reach through it) times the drop of its capture probability
+        in the next turns of the enemies, or the fort node of the initialize phase if the fort doesn't save any of them
+    """
+
+    keep = PARAMETERS.ordinary_troops_after_fortress
+    candidates = nodes(is_mine=True, function=lambda node: node.troops > keep)
+    if not candidates:
+        return None
+
+    graph = get_graph(nodes)
+    values = {node.node_id: get_node_value(node) for node in nodes(is_mine=True, is_strategic=True)}
+    defended = graph.defended_values(nodes.owners, PLAYER_ID, values)
+    threat_map = get_threat_map(nodes)
+    fortified = threat_map.defense.copy()
+    for node in candidates:
+        fortified[node.node_id] = keep + node.fort_troops + rules.fort_coef * (node.troops - keep)
+    saved = (threat_map.capture_probability() - threat_map.capture_probability(fortified)) * [defended.get(node_id, 0) for node_id in range(len(fortified))]
+
+    # the betweenness breaks the ties
+    best = max(candidates, key=lambda node: (saved[node.node_id], graph.betweenness[node.node_id]))
+    return best if saved[best.node_id] > 0 else nodes.by_id(FORT_NODE)
+
+def put_troop_attacker(plan):
+    check_loose_strategics(plan)
+
+    if plan.is_open():
+        check_low_enemies(plan, FORT_NODE)
+
+def check_loose_strategics(plan):
     global ATTACK_NODE, ATTACK_DEST
 
-    for node in nodes.filter(is_strategic=True, is_enemy=True).sort(key='score')():
-        for adj in nodes.by_ids(node.adjacents):
+    for node in plan.nodes.filter(is_strategic=True, is_enemy=True).sort(key='score')():
+        for adj in plan.nodes.by_ids(node.adjacents):
             if adj.is_empty:
-                reserved_troops = get_reserved_troops(game)
                 ATTACK_NODE = adj.node_id
                 ATTACK_DEST = node.node_id
-                print(game.put_troop(ATTACK_NODE, reserved_troops))
+                plan.put(ATTACK_NODE, plan.reserved_troops)
 
-                to_state(game, 3)
+                plan.finish()
                 return ATTACK_NODE
 
-def check_low_enemies(game, nodes, node_id):
+def check_low_enemies(plan, node_id):
     global ATTACK_NODE
 
-    node_weight = nodes.get_weights(node_id)
+    node_weight = plan.nodes.get_weights(node_id, stop_time=plan.stop_time)
     weight_node = invert_dict(node_weight)
 
     least_weight = min(node_weight.values())
     least_node = weight_node[least_weight]
     ATTACK_NODE = least_node
 
-    reserved_troops = get_reserved_troops(game)
-    print(game.put_troop(ATTACK_NODE, reserved_troops-2))
-    to_state(game, 3)
+    plan.put(ATTACK_NODE, plan.reserved_troops-2)
+    plan.finish()
 
     return ATTACK_NODE
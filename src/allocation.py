@@ -0,0 +1,62 @@
+import heapq
+from src.simulator import win_probability
+
+
+MAXIMUM_STEP = 20  # the most troops that are given to a node at once, see best_step
+
+
+def hold_probability(troops, threat):
+    """ The probability that a node with troops (normal and fort troops) is not captured by an attack of threat troops """
+
+    if troops <= 0:
+        return 0.0
+    if threat < 2:
+        return 1.0
+    return 1 - win_probability(threat, troops)
+
+def best_step(troops, threat, value, reserve):
+    """
+        returns (the gain of each troop, the number of troops) of the best step for the node:
+        the number of troops (up to the reserve) that adds the most value for each troop,
+        the hold probability grows slowly for the first troops against a large threat, so one troop at a time would look useless
+    """
+    base = hold_probability(troops, threat)
+    best = (0.0, 1)
+    for step in range(1, min(reserve, MAXIMUM_STEP) + 1):
+        gain = value * (hold_probability(troops + step, threat) - base) / step
+        if gain > best[0]:
+            best = (gain, step)
+    return best
+
+def allocate_troops(reserve, troops, threats, values):
+    """
+        puts the reserve troops on the nodes one step at a time, each step goes to the node where it adds the most expected value
+        (value of the node * the increase of its hold probability), the best steps of the nodes are kept in a heap
+        troops, threats and values are dicts of the candidate nodes: node_id: troops, the troops that can attack the node, the value
+        returns {node_id: number_of_troops}, the troops that don't add any value are not allocated
+    """
+    allocation = {}
+    heap = []
+    for node_id in troops:
+        gain, step = best_step(troops[node_id], threats[node_id], values[node_id], reserve)
+        if gain > 0:
+            heap.append((-gain, step, node_id))
+    heapq.heapify(heap)
+
+    while heap and reserve > 0:
+        gain, step, node_id = heapq.heappop(heap)
+        current = troops[node_id] + allocation.get(node_id, 0)
+        # the step was found with a larger reserve
+        if step > reserve:
+            gain, step = best_step(current, threats[node_id], values[node_id], reserve)
+            if gain > 0:
+                heapq.heappush(heap, (-gain, step, node_id))
+            continue
+
+        allocation[node_id] = allocation.get(node_id, 0) + step
+        reserve -= step
+        gain, step = best_step(current + step, threats[node_id], values[node_id], reserve)
+        if gain > 0 and reserve > 0:
+            heapq.heappush(heap, (-gain, step, node_id))
+
+    return allocation
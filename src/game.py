@@ -1,4 +1,31 @@
 import requests
+import array
+import json
+import sys
+import io
+import os
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def decode_board(content, board_format='binary', dtype='<i4'):
+    """
+        decodes the response of a board API in the array or binary format
+        dtype is the X-Board-Dtype header of the binary format: '<i2' (int16) or '<i4' (int32)
+        returns an array that the value of the node i is at the index i (a numpy array if numpy is installed)
+    """
+    if board_format == 'array':
+        values = json.loads(content)
+        return np.array(values, dtype=np.int32) if np is not None else array.array('i', values)
+    if np is not None:
+        return np.frombuffer(content, dtype=dtype)
+    values = array.array('h' if dtype == '<i2' else 'i', content)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
 
 class Game:
     def __init__(self, token, server_ip, server_port) -> None:
@@ -6,11 +33,37 @@ class Game:
         self.server_ip = server_ip
         self.server_port = server_port
         self.my_turn = False
+        self.use_etag = True # send If-None-Match for the board APIs and reuse the last payload if nothing changed
+        self.etag_cache = {} # api: (etag, payload, size of the payload in bytes)
+        self.etag_stats = {'requests': 0, 'not_modified': 0, 'saved_bytes': 0}
+        self.mirror = None # a BoardMirror that listens to the stream API, the board is read from it instead of the server
+        self.mirror_timeout = 0.05 # the time to wait for the mirror to receive the last change (in seconds)
+        self.known_version = 0 # the last version of the game state that the server reported
+        self.deadline = None # the time (time.perf_counter) that the kernel ends the current turn, it's set at the start of each turn
     
-    def handel_output(self, response):
+    def use_mirror(self):
+        """
+            returns True if the mirror has the last known version of the game state
+        """
+        return self.mirror is not None and self.mirror.wait_for(self.known_version, self.mirror_timeout)
+
+    def handel_output(self, response, api=None, board_format=None):
         code = response.status_code
+        if 'X-State-Version' in response.headers:
+            self.known_version = max(self.known_version, int(response.headers['X-State-Version']))
+        if code == 304 and api in self.etag_cache:
+            # the game state is not changed since the last request of this api
+            self.etag_stats['not_modified'] += 1
+            self.etag_stats['saved_bytes'] += self.etag_cache[api][2]
+            return self.etag_cache[api][1]
         if 200<=code<300:
-            return eval(response.text)
+            if board_format is None:
+                output = eval(response.text)
+            else:
+                output = decode_board(response.content, board_format, response.headers.get('X-Board-Dtype', '<i4'))
+            if api is not None and 'ETag' in response.headers:
+                self.etag_cache[api] = (response.headers['ETag'], output, len(response.content))
+            return output
         if 'error' in response.json():
             print(response.json()['error'])
             raise Exception(response.json()['error'])
@@ -18,6 +71,17 @@ class Game:
             print("unknown error")
             raise Exception("unknown error")
         
+    def etag_headers(self, api):
+        """
+            returns the headers of a request to the api with the ETag of its last response
+            the returned payload of these APIs is shared between calls, so it shouldn't be modified
+        """
+        headers = {'x-access-token': self.token}
+        if self.use_etag and api in self.etag_cache:
+            headers['If-None-Match'] = self.etag_cache[api][0]
+        self.etag_stats['requests'] += 1
+        return headers
+
     def printer(self, text):
         """
             this API used for debug
@@ -38,12 +102,14 @@ class Game:
             node_id: str
             owner_id: int
         """
+        if self.use_mirror():
+            return self.mirror.get_owners()
         try:
-            resp = requests.request('GET', f'http://{self.server_ip}:{self.server_port}/get_owners', headers={'x-access-token': self.token})
+            resp = requests.request('GET', f'http://{self.server_ip}:{self.server_port}/get_owners', headers=self.etag_headers('get_owners'))
         except:
             print("can't make request")
             return
-        return self.handel_output(resp)
+        return self.handel_output(resp, 'get_owners')
     
     def get_number_of_troops(self):
         """
@@ -51,12 +117,14 @@ class Game:
             node_id: str
             number_of_troops: int
         """
+        if self.use_mirror():
+            return self.mirror.get_number_of_troops()
         try:
-            resp = requests.request('GET', f'http://{self.server_ip}:{self.server_port}/get_troops_count', headers={'x-access-token': self.token})
+            resp = requests.request('GET', f'http://{self.server_ip}:{self.server_port}/get_troops_count', headers=self.etag_headers('get_troops_count'))
         except:
             print("can't make request")
             return
-        return self.handel_output(resp)
+        return self.handel_output(resp, 'get_troops_count')
     
     def get_state(self):
         """
@@ -67,6 +135,8 @@ class Game:
             4: fort 
             {'state': number_of_state}
         """
+        if self.use_mirror():
+            return self.mirror.get_state()
         try:
             resp = requests.request('GET', f'http://{self.server_ip}:{self.server_port}/get_state', headers={'x-access-token': self.token})
         except:
@@ -80,6 +150,8 @@ class Game:
             returns a dictionary containing the turn number
             {'turn_number': number_of_turn}
         """
+        if self.use_mirror():
+            return self.mirror.get_turn_number()
         try:
             resp = requests.request('GET', f'http://{self.server_ip}:{self.server_port}/get_turn_number', headers={'x-access-token': self.token})
         except:
@@ -204,6 +276,10 @@ class Game:
             returns the number of troops that the player can put in the put_troop state
             {"number_of_troops": number_of_troops}
         """
+        if self.use_mirror():
+            output = self.mirror.get_number_of_troops_to_put()
+            if output is not None:
+                return output
         try:
             resp = requests.request('GET', f'http://{self.server_ip}:{self.server_port}/get_number_of_troops_to_put', headers={'x-access-token': self.token})
         except:
@@ -233,12 +309,14 @@ class Game:
             node_id: str
             number_of_troops: int
         """
+        if self.use_mirror():
+            return self.mirror.get_number_of_fort_troops()
         try:
-            resp = requests.request('GET', f'http://{self.server_ip}:{self.server_port}/get_number_of_fort_troops', headers={'x-access-token': self.token})
+            resp = requests.request('GET', f'http://{self.server_ip}:{self.server_port}/get_number_of_fort_troops', headers=self.etag_headers('get_number_of_fort_troops'))
         except:
             print("can't make request")
             return
-        return self.handel_output(resp)
+        return self.handel_output(resp, 'get_number_of_fort_troops')
 
     def fort(self, node_id, troop_count):
         """
@@ -253,4 +331,80 @@ class Game:
         except:
             print("can't make request")
             return {}
-        return self.handel_output(resp)
\ No newline at end of file
+        return self.handel_output(resp)
+
+    def get_changes(self, since):
+        """
+            returns the nodes that changed after the since version of the game state (-1 for all the nodes)
+            {"version": version, "full": 0 or 1, "changes": {node_id: [owner, number_of_troops, number_of_fort_troops], ...}}
+            node_id: str
+            if full is 1 the changes are not available anymore and all the nodes are returned
+        """
+        if self.use_mirror():
+            return self.mirror.get_changes(since)
+        try:
+            resp = requests.request('GET', f'http://{self.server_ip}:{self.server_port}/get_changes', headers={'x-access-token': self.token}, params={'since': since})
+        except:
+            print("can't make request")
+            return
+        return self.handel_output(resp)
+
+    def get_board_array(self, api, board_format='binary'):
+        """
+            returns the values of a board API (get_owners, get_troops_count or get_number_of_fort_troops)
+            as an array that the value of the node i is at the index i (a numpy array if numpy is installed)
+            board_format: 'binary' (packed int32, the smallest response) or 'array' (json array)
+        """
+        key = api + ':' + board_format
+        try:
+            resp = requests.request('GET', f'http://{self.server_ip}:{self.server_port}/{api}', headers=self.etag_headers(key), params={'format': board_format})
+        except:
+            print("can't make request")
+            return
+        return self.handel_output(resp, key, board_format)
+
+    def get_map_analysis(self, cache_path='map_cache'):
+        """
+            returns the analysis of the map (see src/tools/map_analysis.py of the kernel) as a dictionary
+            {"hash": hash, "number_of_nodes": number_of_nodes, "indptr": array, "indices": array, "distances": array, ...}
+            the fields are numpy arrays if numpy is installed (they are lists otherwise)
+            the analysis is saved in the cache_path folder as <hash>.npz, the hashes of the saved analyses are sent
+            in the If-None-Match header so the server doesn't send the analysis of a map again
+        """
+        if np is None:
+            try:
+                resp = requests.request('GET', f'http://{self.server_ip}:{self.server_port}/get_map_analysis', headers={'x-access-token': self.token})
+            except:
+                print("can't make request")
+                return
+            return self.handel_output(resp)
+
+        headers = {'x-access-token': self.token}
+        if cache_path is not None and os.path.isdir(cache_path):
+            hashes = [name[:-len('.npz')] for name in os.listdir(cache_path) if name.endswith('.npz')]
+            if hashes:
+                headers['If-None-Match'] = ', '.join(f'"{key}"' for key in hashes)
+        try:
+            resp = requests.request('GET', f'http://{self.server_ip}:{self.server_port}/get_map_analysis', headers=headers, params={'format': 'npz'})
+        except:
+            print("can't make request")
+            return
+
+        if resp.status_code == 304:
+            key = resp.headers['ETag'].strip('"')
+            with open(os.path.join(cache_path, key + '.npz'), 'rb') as analysis_file:
+                content = analysis_file.read()
+        elif 200 <= resp.status_code < 300:
+            key = resp.headers['ETag'].strip('"')
+            content = resp.content
+            if cache_path is not None:
+                os.makedirs(cache_path, exist_ok=True)
+                with open(os.path.join(cache_path, f'{key}.npz.tmp-{os.getpid()}'), 'wb') as analysis_file:
+                    analysis_file.write(content)
+                os.replace(os.path.join(cache_path, f'{key}.npz.tmp-{os.getpid()}'), os.path.join(cache_path, key + '.npz'))
+        else:
+            return self.handel_output(resp)
+
+        with np.load(io.BytesIO(content)) as fields:
+            output = {name: fields[name] for name in fields.files}
+        return {'hash': key, 'number_of_nodes': len(output['indptr']) - 1, **output}
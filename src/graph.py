@@ -0,0 +1,227 @@
+from collections import deque
+
+
+SOURCE = -2  # the node that is added next to all the enemy nodes in defended_values
+
+
+def depth_first_search(adjacents, roots):
+    """
+        the DFS of Tarjan without recursion from each root that isn't visited yet, in O(nodes + edges)
+        returns order (node_id: the order that it's visited in), low (node_id: the smallest order that the subtree of the node reaches
+        with one edge that isn't in the tree), parents (node_id: the parent in the tree, None for the roots) and the nodes in post-order
+    """
+    order, low, parents, post_order = {}, {}, {}, []
+    for root in roots:
+        if root in order:
+            continue
+        order[root] = low[root] = len(order)
+        parents[root] = None
+        stack = [(root, iter(adjacents[root]))]
+        while stack:
+            node, neighbors = stack[-1]
+            for adjacent in neighbors:
+                if adjacent not in order:
+                    parents[adjacent] = node
+                    order[adjacent] = low[adjacent] = len(order)
+                    stack.append((adjacent, iter(adjacents[adjacent])))
+                    break
+                if adjacent != parents[node]:
+                    low[node] = min(low[node], order[adjacent])
+            else:
+                stack.pop()
+                post_order.append(node)
+                if parents[node] is not None:
+                    low[parents[node]] = min(low[parents[node]], low[node])
+
+    return order, low, parents, post_order
+
+def cut_nodes(adjacents):
+    """ Return the articulation points (the nodes that disconnect the map if they are removed) and the bridges (the edges that do it) """
+
+    order, low, parents, post_order = depth_first_search(adjacents, sorted(adjacents))
+    children = {}
+    articulation_points, bridges = set(), []
+    for node in post_order:
+        parent = parents[node]
+        if parent is None:
+            continue
+        children[parent] = children.get(parent, 0) + 1
+        if low[node] > order[parent]:
+            bridges.append(sorted([parent, node]))
+        # a root is an articulation point if it has more than one child
+        if low[node] >= order[parent] and parents[parent] is not None:
+            articulation_points.add(parent)
+
+    articulation_points |= {node for node, parent in parents.items() if parent is None and children.get(node, 0) > 1}
+    return sorted(articulation_points), sorted(bridges)
+
+def shortest_paths(adjacents, source):
+    # the distances and the numbers of the shortest paths from the source to the nodes that it reaches (BFS)
+    distances, counts = {source: 0}, {source: 1}
+    queue = deque([source])
+    while queue:
+        node = queue.popleft()
+        for adjacent in adjacents[node]:
+            if adjacent not in distances:
+                distances[adjacent] = distances[node] + 1
+                counts[adjacent] = 0
+                queue.append(adjacent)
+            if distances[adjacent] == distances[node] + 1:
+                counts[adjacent] += counts[node]
+    return distances, counts
+
+def strategic_betweenness(adjacents, strategic_nodes):
+    """
+        the betweenness like strategic_betweenness of the map analysis of the kernel: the fraction of the shortest paths between each
+        pair of strategic nodes that pass each node (the strategic nodes of the pair are not counted), from one BFS of each strategic node
+        in O(strategic nodes * (nodes + edges) + strategic nodes ** 2 * nodes)
+    """
+    betweenness = dict.fromkeys(adjacents, 0.0)
+    paths = [shortest_paths(adjacents, node) for node in strategic_nodes]
+    for s, (distances_s, counts_s) in enumerate(paths):
+        for t in range(s + 1, len(strategic_nodes)):
+            distances_t, counts_t = paths[t]
+            target = distances_s.get(strategic_nodes[t])
+            if not target:
+                continue
+            for node, distance in distances_s.items():
+                if 0 < distance < target and distances_t.get(node) == target - distance:
+                    betweenness[node] += counts_s[node] * counts_t[node] / counts_s[strategic_nodes[t]]
+    return betweenness
+
+
+class MapGraph:
+    """
+        the structure of the map for the placement of the fort and the border troops
+        the articulation points, the bridges and the betweenness only depend on the map, they come from the map analysis of the kernel
+        (see get_map_graph), the territory that the nodes defend depends on the owners, so it's computed in each turn
+    """
+    def __init__(self, adjacents, articulation_points, bridges, betweenness) -> None:
+        self.adjacents = adjacents  # node_id: [node_id, ...]
+        self.articulation_points = articulation_points
+        self.bridges = bridges
+        self.betweenness = betweenness  # node_id: betweenness
+
+    def defended_values(self, owners, player_id, values):
+        """
+            the value of the territory that each of my nodes defends: its own value and the value of my nodes that the enemies can only
+            reach through it, they are found with one DFS from a node next to all the enemy nodes: the subtree of a child c of the node v
+            (low[c] >= order[v]) is separated from the enemies by v
+            values is the value of each of my nodes, my nodes that the enemies can't reach defend their own value
+        """
+        adjacents = {node_id: (adjacents + [SOURCE] if owners[node_id] not in [-1, player_id] else adjacents)
+                     for node_id, adjacents in self.adjacents.items()}
+        adjacents[SOURCE] = [node_id for node_id in self.adjacents if owners[node_id] not in [-1, player_id]]
+        order, low, parents, post_order = depth_first_search(adjacents, [SOURCE])
+
+        mine = {node_id: value for node_id, value in values.items() if owners[node_id] == player_id}
+        subtree = {node_id: mine.get(node_id, 0) for node_id in post_order}
+        defended = dict(mine)
+        for node in post_order:
+            parent = parents[node]
+            if parent is None or parent == SOURCE:
+                continue
+            subtree[parent] += subtree[node]
+            if low[node] >= order[parent] and parent in mine:
+                defended[parent] += subtree[node]
+
+        return defended
+
+    def min_vertex_cut(self, sources, targets, cuttable):
+        """
+            the smallest set of the cuttable nodes that every path between the sources and the targets passes,
+            it's found with the max-flow of the map that each cuttable node has the capacity of one (in O(size of the cut * edges))
+            returns None if the sources and the targets can't be separated by the cuttable nodes
+        """
+        sources, targets = set(sources), set(targets)
+        infinity = len(self.adjacents) + 1
+        capacity = {'source': {}, 'target': {}}
+
+        def add_edge(u, v, c):
+            capacity.setdefault(u, {})
+            capacity.setdefault(v, {})
+            capacity[u][v] = capacity[u].get(v, 0) + c
+            capacity[v].setdefault(u, 0)
+
+        # each node is an edge from its in-node to its out-node
+        for node_id, adjacents in self.adjacents.items():
+            is_cuttable = node_id in cuttable and node_id not in sources and node_id not in targets
+            add_edge(('in', node_id), ('out', node_id), 1 if is_cuttable else infinity)
+            for adjacent in adjacents:
+                add_edge(('out', node_id), ('in', adjacent), infinity)
+        for node_id in sources:
+            add_edge('source', ('in', node_id), infinity)
+        for node_id in targets:
+            add_edge(('out', node_id), 'target', infinity)
+
+        flow = 0
+        while True:
+            parents = {'source': None}
+            queue = deque(['source'])
+            while queue and 'target' not in parents:
+                u = queue.popleft()
+                for v, c in capacity[u].items():
+                    if c > 0 and v not in parents:
+                        parents[v] = u
+                        queue.append(v)
+            if 'target' not in parents:
+                break
+
+            path = []
+            v = 'target'
+            while parents[v] is not None:
+                path.append((parents[v], v))
+                v = parents[v]
+            bottleneck = min(capacity[u][v] for u, v in path)
+            flow += bottleneck
+            if flow >= infinity:
+                return None
+            for u, v in path:
+                capacity[u][v] -= bottleneck
+                capacity[v][u] += bottleneck
+
+        # the cut nodes are reached from the sources in the residual map but their out-nodes are not
+        return sorted(node_id for node_id in self.adjacents if ('in', node_id) in parents and ('out', node_id) not in parents)
+
+    def cut_values(self, owners, player_id, core, values):
+        """
+            the smallest set of my nodes that separates the core (my most valuable nodes) from all the enemy nodes,
+            each of them defends an equal share of the value of my nodes behind the cut, returns {node_id: share} ({} if there is no cut)
+        """
+        enemies = [node_id for node_id, owner in owners.items() if owner not in [-1, player_id]]
+        core = [node_id for node_id in core if owners[node_id] == player_id]
+        mine = {node_id for node_id, owner in owners.items() if owner == player_id}
+        if not enemies or not core:
+            return {}
+        cut = self.min_vertex_cut(enemies, core, mine - set(core))
+        if not cut:
+            return {}
+
+        # my nodes that the core reaches without passing the cut
+        behind = set(core)
+        queue = deque(core)
+        while queue:
+            node_id = queue.popleft()
+            for adjacent in self.adjacents[node_id]:
+                if adjacent in mine and adjacent not in behind and adjacent not in cut:
+                    behind.add(adjacent)
+                    queue.append(adjacent)
+
+        share = sum(values.get(node_id, 0) for node_id in behind) / len(cut)
+        return {node_id: share for node_id in cut}
+
+
+def get_map_graph(adjacents, strategic_nodes, analysis=None):
+    """
+        return the MapGraph of the map, the adjacency, the articulation points, the bridges and the betweenness (of the shortest paths
+        between the strategic nodes) are read from analysis (the map analysis of the kernel, src/tools/map_analysis.py)
+        the kernels without the map analysis give None, then they are computed here from adjacents with the same definitions
+    """
+    if analysis is not None:
+        indptr, indices = analysis['indptr'], analysis['indices']
+        adjacents = {node_id: indices[indptr[node_id]:indptr[node_id + 1]].tolist() for node_id in range(len(indptr) - 1)}
+        return MapGraph(adjacents, analysis['articulation_points'].tolist(), analysis['bridges'].tolist(),
+                        dict(enumerate(analysis['strategic_betweenness'].tolist())))
+
+    articulation_points, bridges = cut_nodes(adjacents)
+    return MapGraph(adjacents, articulation_points, bridges, strategic_betweenness(adjacents, list(strategic_nodes)))
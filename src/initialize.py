@@ -3,14 +3,17 @@ import requests
 from flask import Flask
 import random
 from src.game import Game
+from src.mirror import BoardMirror
 from flask import request
 from functools import wraps
 from flask import jsonify
 from main import turn as player_turn
 from main import initializer as player_initializer
+from main import PROFILER as player_profiler
 import threading
 import os
 import logging
+import time
 
 # read config file from config.json
 config = json.load(open('config.json'))
@@ -52,6 +55,20 @@ except:
 # generate game object
 game = Game(token, server_ip, server_port)
 
+# keep a mirror of the game state with the stream API of the server (if the server has it)
+# so the board can be read without a request in each turn
+if config.get('use_stream', True):
+    game.mirror = BoardMirror(id)
+    threading.Thread(target=game.mirror.listen, args=(server_ip, server_port, token), daemon=True).start()
+
+
+# a function to set the deadline of the turn from the x-turn-time header
+def set_deadline(default_time):
+    # the kernel sends the time of the turn (its turn_time or init_time), the bot has to send its actions before it ends
+    # the time of the config is used if the kernel doesn't send it
+    turn_time = float(request.headers.get('x-turn-time', default_time))
+    game.deadline = time.perf_counter() + turn_time
+
 
 # a function to check the password in the x-access-token header
 def token_required(func):
@@ -79,6 +96,10 @@ def token_required(func):
         
 
 
+        # the server sends the version of the game state at the beginning of the turn
+        if 'x-state-version' in request.headers:
+            game.known_version = max(game.known_version, int(request.headers['x-state-version']))
+
         return func()
 
     return decorator
@@ -97,6 +118,7 @@ log.setLevel(logging.ERROR)
 def initializer():
     global turn_thread
     game.my_turn = True
+    set_deadline(config.get('init_time', 0.7))
     print('initializer started')
     turn_thread = threading.Thread(target=player_initializer, args=(game,))
     turn_thread.start()
@@ -107,6 +129,7 @@ def initializer():
 def turn():
     global turn_thread
     game.my_turn = True
+    set_deadline(config.get('turn_time', 1.5))
     print('turn started')
     turn_thread = threading.Thread(target=player_turn, args=(game,))
     turn_thread.start()
@@ -123,6 +146,8 @@ def end_turn():
 @token_required
 def shutdown():
     print('kill')
+    # save the profile of the bot before the process is killed
+    player_profiler.save()
     own_pid = os.getpid()
     os.kill(own_pid, 9)
     return 'ok'
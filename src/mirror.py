@@ -0,0 +1,103 @@
+import json
+import threading
+import time
+import requests
+
+class BoardMirror:
+    """
+        a copy of the game state that is kept up to date by the stream API of the server
+        the Game object reads the board from the mirror instead of making a request when the mirror is connected
+    """
+    def __init__(self, player_id=None) -> None:
+        self.player_id = player_id
+        self.connected = False # True while the stream is open
+        self.version = -1 # the version of the last applied event
+        self.full_version = 0 # the version of the last full event, the changes before it are unknown
+        self.owners = {} # node_id: owner_id
+        self.troops = {} # node_id: number_of_troops
+        self.forts = {} # node_id: number_of_fort_troops
+        self.node_versions = {} # node_id: the version of the last change of the node
+        self.turn_number = 0
+        self.state = 1
+        self.player_turn = -1
+        self.number_of_troops_to_put = 0
+        self.condition = threading.Condition()
+
+    def apply(self, event):
+        # apply an event of the stream API to the mirror
+        with self.condition:
+            version = event['version']
+            if event['full']:
+                self.owners, self.troops, self.forts, self.node_versions = {}, {}, {}, {}
+                self.full_version = version
+            elif version < self.version:
+                return
+            for node_id, (owner, troops, fort) in event['nodes'].items():
+                self.owners[node_id] = owner
+                self.troops[node_id] = troops
+                self.forts[node_id] = fort
+                self.node_versions[node_id] = version
+            self.version = version
+            self.turn_number = event['turn_number']
+            self.state = event['state']
+            self.player_turn = event['player_turn']
+            self.number_of_troops_to_put = event['number_of_troops_to_put']
+            self.connected = True
+            self.condition.notify_all()
+
+    def disconnect(self):
+        with self.condition:
+            self.connected = False
+
+    def wait_for(self, version, timeout):
+        # wait until the mirror has the given version of the game state
+        # returns False if the stream is closed or the version is not received in timeout seconds
+        with self.condition:
+            if not self.connected:
+                return False
+            return self.condition.wait_for(lambda: self.connected and self.version >= version, timeout)
+
+    def listen(self, server_ip, server_port, token):
+        # read the stream API forever and apply its events, reconnect if the connection is lost
+        while True:
+            try:
+                with requests.get(f'http://{server_ip}:{server_port}/stream', headers={'x-access-token': token}, stream=True) as resp:
+                    for line in resp.iter_lines(chunk_size=None, decode_unicode=True):
+                        if line.startswith('data:'):
+                            self.apply(json.loads(line[5:]))
+            except Exception:
+                pass
+            self.disconnect()
+            time.sleep(1)
+
+    def get_owners(self):
+        with self.condition:
+            return dict(self.owners)
+
+    def get_number_of_troops(self):
+        with self.condition:
+            return dict(self.troops)
+
+    def get_number_of_fort_troops(self):
+        with self.condition:
+            return dict(self.forts)
+
+    def get_state(self):
+        return {'state': self.state}
+
+    def get_turn_number(self):
+        return {'turn_number': self.turn_number}
+
+    def get_number_of_troops_to_put(self):
+        # the mirror only knows the number of troops of the player whose turn it is
+        if self.player_id is None or self.player_turn != self.player_id:
+            return None
+        return {'number_of_troops': self.number_of_troops_to_put}
+
+    def get_changes(self, since):
+        # same output as the get_changes API
+        with self.condition:
+            full = since < self.full_version
+            changes = {node_id: [self.owners[node_id], self.troops[node_id], self.forts[node_id]]
+                       for node_id, version in self.node_versions.items() if full or version > since}
+            return {'version': self.version, 'full': int(full), 'changes': changes}
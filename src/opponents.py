@@ -0,0 +1,132 @@
+class OpponentStats:
+    __slots__ = ['turns', 'attack_turns', 'captures', 'attacks_on', 'target_nodes', 'stacks', 'placed_troops', 'forts']
+
+    def __init__(self) -> None:
+        self.turns = 0  # the observed turns of the player
+        self.attack_turns = 0  # the observed turns that the player attacked in
+        self.captures = 0  # the nodes that the player captured from the other players
+        self.attacks_on = {}  # player_id: the attacks of the player on that player (captures and failed attacks on me)
+        self.target_nodes = {}  # node_id: the attacks of the player on that node
+        self.stacks = {}  # node_id: the troops that the player put or moved on that node
+        self.placed_troops = 0
+        self.forts = []  # [(node_id, number_of_fort_troops)] of the fortifications of the player
+
+
+class OpponentModel:
+    """
+        the actions of the other players, found from the changes of the board between the end of my turn and the beginning of my next turn
+        (the turns of all the other players), only the changed nodes are read so an update costs O(changed nodes)
+        a captured node is an attack of its new owner, an empty node that gets an owner and the troops that grow on a node are put troops,
+        my nodes that lose troops were attacked by a next enemy, and the fort troops that grow are a fortification
+        the predictions are the probabilities of the next actions of each player, with one imaginary observation of each kind as the prior
+    """
+    def __init__(self, player_id, adjacents, number_of_players=3) -> None:
+        self.player_id = player_id
+        self.adjacents = adjacents  # node_id: [node_id, ...]
+        self.number_of_players = number_of_players
+        self.stats = {player_id: OpponentStats() for player_id in range(number_of_players) if player_id != self.player_id}
+        # the board that the next changes are compared with
+        self.owners = None
+        self.troops = None
+        self.fort_troops = None
+        self.version = None
+        self.updates = 0  # the number of the syncs and observations, the predictions change with each of them
+
+    def sync(self, owners, troops, fort_troops, version=None):
+        """ Set the board without reading it as the actions of the other players (at the end of my turn) """
+
+        self.owners = dict(owners)
+        self.troops = dict(troops)
+        self.fort_troops = dict(fort_troops)
+        self.version = version
+        self.updates += 1
+
+    def observe_board(self, owners, troops, fort_troops, version=None):
+        """ Read the actions of the other players from a whole board (when the changes since the last version are not available) """
+
+        changes = {node_id: [owners[node_id], troops[node_id], fort_troops[node_id]] for node_id in owners
+                   if (owners[node_id], troops[node_id], fort_troops[node_id]) != (self.owners[node_id], self.troops[node_id], self.fort_troops[node_id])}
+        self.observe(changes, version)
+
+    def observe(self, changes, version=None):
+        """ Read the actions of the other players from the changed nodes ({node_id: [owner, troops, fort_troops]}) since the last board """
+
+        attackers = set()
+        for node_id, (owner, troops, fort_troops) in changes.items():
+            old_owner, old_troops, old_fort_troops = self.owners[node_id], self.troops[node_id], self.fort_troops[node_id]
+            if owner != old_owner and owner not in [-1, self.player_id]:
+                stats = self.stats[owner]
+                if old_owner == -1:
+                    stats.placed_troops += troops
+                    stats.stacks[node_id] = stats.stacks.get(node_id, 0) + troops
+                else:
+                    stats.captures += 1
+                    stats.attacks_on[old_owner] = stats.attacks_on.get(old_owner, 0) + 1
+                    stats.target_nodes[node_id] = stats.target_nodes.get(node_id, 0) + 1
+                    attackers.add(owner)
+
+            elif owner == old_owner and owner not in [-1, self.player_id]:
+                stats = self.stats[owner]
+                if troops > old_troops:
+                    stats.placed_troops += troops - old_troops
+                    stats.stacks[node_id] = stats.stacks.get(node_id, 0) + troops - old_troops
+                if fort_troops > old_fort_troops:
+                    stats.forts.append((node_id, fort_troops))
+
+            elif owner == old_owner == self.player_id and troops + fort_troops < old_troops + old_fort_troops:
+                # my nodes only change in the turns of the other players by their attacks
+                for attacker in self.neighbor_attackers(node_id, changes):
+                    stats = self.stats[attacker]
+                    stats.attacks_on[owner] = stats.attacks_on.get(owner, 0) + 1
+                    stats.target_nodes[node_id] = stats.target_nodes.get(node_id, 0) + 1
+                    attackers.add(attacker)
+
+            self.owners[node_id], self.troops[node_id], self.fort_troops[node_id] = owner, troops, fort_troops
+
+        for player_id, stats in self.stats.items():
+            stats.turns += 1
+            if player_id in attackers:
+                stats.attack_turns += 1
+        self.version = version
+        self.updates += 1
+
+    def neighbor_attackers(self, node_id, changes):
+        # the enemies next to the node that lost troops (the attacker loses troops too), or all the enemies next to it
+        neighbors = {self.owners[adj] for adj in self.adjacents[node_id]} - {-1, self.player_id}
+        losers = {changes[adj][0] for adj in self.adjacents[node_id]
+                  if adj in changes and changes[adj][0] in neighbors and changes[adj][1] < self.troops[adj]}
+        return losers or neighbors
+
+    def aggression(self, player_id):
+        """ The probability that the player attacks in its next turn """
+
+        stats = self.stats[player_id]
+        return (stats.attack_turns + 1) / (stats.turns + 2)
+
+    def target_probability(self, player_id, target_id):
+        """ The probability that an attack of the player is on the target player """
+
+        stats = self.stats[player_id]
+        return (stats.attacks_on.get(target_id, 0) + 1) / (sum(stats.attacks_on.values()) + self.number_of_players - 1)
+
+    def attack_weights(self):
+        """ The probability that each player attacks me in its next turn (1 for me) """
+
+        return [self.aggression(player_id) * self.target_probability(player_id, self.player_id) if player_id != self.player_id else 1.0
+                for player_id in range(self.number_of_players)]
+
+    def likely_stacks(self, player_id, count=3):
+        """ The nodes of the player that it puts the most troops on """
+
+        stats = self.stats[player_id]
+        nodes = [node_id for node_id in stats.stacks if self.owners.get(node_id) == player_id]
+        return sorted(nodes, key=lambda node_id: stats.stacks[node_id], reverse=True)[:count]
+
+    def has_used_fort(self, player_id):
+        return bool(self.stats[player_id].forts)
+
+    def summary(self):
+        return {player_id: {'turns': stats.turns, 'aggression': round(self.aggression(player_id), 3), 'captures': stats.captures,
+                            'attacks_on': dict(stats.attacks_on), 'likely_stacks': self.likely_stacks(player_id),
+                            'forts': list(stats.forts)}
+                for player_id, stats in self.stats.items()}
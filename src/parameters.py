@@ -0,0 +1,50 @@
+import json
+import os
+
+
+# the tuning constants of the bot and their default values
+DEFAULTS = {
+    'maximum_initial_ordinary_nodes': 10,  # the ordinary nodes that are taken around the main node in the initialize phase
+    'minimum_strategy_troops': 4,  # the troops of the strategic nodes in the initialize phase and of the empty strategic nodes that are taken
+    'boundary_troops': 2,  # the troops of the boundary nodes of the main node, it increases by one in the first turn of the main phase
+    'ordinary_troops_after_fortress': 2,  # the troops that are left on the fort node when it's fortified
+    'attack_fraction': 0.95,  # the fraction and move_fraction of the attacks of the ATTACK_NODE chain
+    'attack_move_fraction': 0.9,
+    'tortoise_factor': 1.5,  # the troops of the nodes around the main node in check_tortoise_defense: level * tortoise_factor + 1
+    'attack_planner': True,  # choose the attacks with the tree search of src/planner.py, otherwise the attacks follow ATTACK_NODE
+    'attack_search_time': 0.1,  # the time of the search before each attack (in seconds)
+    'attack_risk': 1.0,  # the weight of the value that the enemies are expected to capture after the attacks (0: the search ignores it)
+    'put_allocator': True,  # the defender puts the troops with the allocation of src/allocation.py, otherwise with the check_* heuristics
+    'territory_weight': 0,  # the weight of the territory that a node defends (src/graph.py) in the value of the node for the allocation
+    'fort_planner': True,  # fortify the node that the fort saves the most value on (src/graph.py), otherwise the fort node of the initialize phase
+}
+
+
+class Parameters:
+    """
+        the tuning constants of the bot, the defaults are changed by a json file (parameters.json next to main.py) or by update
+        the self-play harness of the faster kernel (benchmarks/selfplay.py) gives each seat its own parameters
+    """
+    def __init__(self, **values) -> None:
+        self.__dict__.update(DEFAULTS)
+        self.update(values)
+
+    def update(self, values):
+        for name, value in values.items():
+            if name not in DEFAULTS:
+                raise KeyError(f'{name} is not a parameter of the bot')
+            setattr(self, name, value)
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in DEFAULTS}
+
+    @staticmethod
+    def load(path):
+        # the default parameters if the file doesn't exist
+        if not os.path.exists(path):
+            return Parameters()
+        with open(path) as parameters_file:
+            return Parameters(**json.load(parameters_file))
+
+    def __repr__(self):
+        return f"Parameters({', '.join(f'{name}={value!r}' for name, value in self.to_dict().items())})"
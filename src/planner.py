@@ -0,0 +1,153 @@
+import math
+import random
+import time
+from src.simulator import is_fighting
+from src.threat import ThreatMap
+
+
+FRACTIONS = [0, 1]  # the fraction of the attack: the attack goes on while the attacker troops / the target troops is more than it
+MOVE_FRACTIONS = [0.5, 0.9]
+
+
+class SearchNode:
+    __slots__ = ['visits', 'value', 'children']
+
+    def __init__(self) -> None:
+        self.visits = 0
+        self.value = 0.0  # the sum of the values of the visits
+        self.children = {}  # action: SearchNode, the action None ends the attacks of the turn
+
+
+class AttackPlanner:
+    """
+        a Monte Carlo tree search over the attacks of the turn: (attacking_id, target_id, fraction, move_fraction)
+        the tree is open-loop: the dice of each visit are rolled again like the kernel, so an action of the tree is the same attack
+        with different results, and the attacks that are not possible after the rolls of a visit are skipped in that visit
+        the value of a line of attacks is the score of the player at the end of it (calculate_score and the strategic-node win rule of
+        check_finish) minus the best score of the other players, and minus risk times the value that the enemies are expected to capture
+        in their next turns (src/threat.py) if the edges of the map are given, weights is the probability of each enemy to attack the player
+        the search runs until stop_time or max_iterations, the best attack is the most visited one
+    """
+    def __init__(self, simulator, stop_time, max_iterations=5000, max_depth=6, stop_probability=0.3, exploration=1.0,
+                 strategic_nodes_to_win=4, edges=None, risk=1.0, weights=None, seed=None) -> None:
+        self.simulator = simulator
+        self.player_id = simulator.player_id
+        self.stop_time = stop_time  # time.perf_counter() that the search stops at
+        self.max_iterations = max_iterations
+        self.max_depth = max_depth  # the most attacks in a line
+        self.stop_probability = stop_probability  # the probability of ending a random rollout at each attack
+        self.exploration = exploration
+        self.strategic_nodes_to_win = strategic_nodes_to_win
+        self.edges = edges  # the edges of the map for the threat map (src/threat.py get_edges), they are built once for the turn
+        self.risk = risk
+        self.weights = weights  # the attack weights of the enemies for the threat map (src/opponents.py)
+        # the value of each node in the score (calculate_score without the troops)
+        self.values = [1000 + (3000 // score if score else 0) for score in simulator.scores]
+        self.rng = random.Random(seed)
+        self.root = SearchNode()
+        self.iterations = 0
+
+    def actions(self):
+        state = self.simulator
+        actions = []
+        for attacking_id, owner in enumerate(state.owners):
+            if owner != self.player_id or state.troops[attacking_id] < 2:
+                continue
+            for target_id in state.adjacents[attacking_id]:
+                if state.owners[target_id] not in [-1, self.player_id]:
+                    # the fractions that the loop of the attack in the kernel doesn't run for are not attacks
+                    target_troops = state.troops[target_id] + state.fort_troops[target_id]
+                    for fraction in FRACTIONS:
+                        if not is_fighting(state.troops[attacking_id], target_troops, fraction):
+                            continue
+                        for move_fraction in MOVE_FRACTIONS:
+                            actions.append((attacking_id, target_id, fraction, move_fraction))
+        return actions
+
+    def evaluate(self):
+        scores, strategic_nodes = self.simulator.calculate_score()
+        for player_id, count in enumerate(strategic_nodes):
+            if count >= self.strategic_nodes_to_win:
+                scores[player_id] += sum(scores)
+        value = scores[self.player_id] - max(score for player_id, score in enumerate(scores) if player_id != self.player_id)
+        if self.edges is not None and self.risk:
+            state = self.simulator
+            reinforcements = [state.calculate_number_of_troops(player_id) for player_id in range(state.number_of_players)]
+            threat_map = ThreatMap(state.owners, state.troops, state.fort_troops, self.edges, self.player_id, reinforcements, self.weights)
+            value -= self.risk * threat_map.expected_loss(self.values)
+        return value
+
+    def apply(self, action):
+        self.simulator.apply_attack(*action, rng=self.rng)
+
+    def select(self, node, actions):
+        # UCB1 on the values in thousands (the score of a node)
+        log_visits = math.log(node.visits)
+        def ucb(action):
+            child = node.children[action]
+            return child.value / child.visits / 1000 + self.exploration * math.sqrt(log_visits / child.visits)
+        return max(actions, key=ucb)
+
+    def rollout(self, depth):
+        while depth < self.max_depth and self.rng.random() >= self.stop_probability:
+            actions = self.actions()
+            if not actions:
+                break
+            self.apply(self.rng.choice(actions))
+            depth += 1
+
+    def iterate(self):
+        state = self.simulator
+        mark = state.mark()
+        path = [self.root]
+        node = self.root
+        depth = 0
+        while True:
+            actions = (self.actions() if depth < self.max_depth else []) + [None]
+            untried = [action for action in actions if action not in node.children]
+            if untried:
+                action = self.rng.choice(untried)
+                child = SearchNode()
+                node.children[action] = child
+                node = child
+                path.append(node)
+                if action is not None:
+                    self.apply(action)
+                    self.rollout(depth + 1)
+                break
+            action = self.select(node, actions)
+            node = node.children[action]
+            path.append(node)
+            if action is None:
+                break
+            self.apply(action)
+            depth += 1
+
+        value = self.evaluate()
+        for node in path:
+            node.visits += 1
+            node.value += value
+        state.undo(mark)
+        self.iterations += 1
+
+    def search(self):
+        """ Return the best attack or None if the best is to stop attacking """
+
+        while self.iterations < self.max_iterations and time.perf_counter() < self.stop_time:
+            self.iterate()
+        if not self.root.children:
+            return None
+        return max(self.root.children, key=lambda action: self.root.children[action].visits)
+
+    def best_line(self):
+        """ The most visited line of attacks of the tree (for the logs) """
+
+        line = []
+        node = self.root
+        while node.children:
+            action = max(node.children, key=lambda action: node.children[action].visits)
+            if action is None:
+                break
+            line.append(action)
+            node = node.children[action]
+        return line
@@ -0,0 +1,222 @@
+import atexit
+import cProfile
+import datetime
+import functools
+import io
+import json
+import os
+import pstats
+import threading
+import time
+
+
+# the methods of the game that make a request to the server (or call the kernel in the faster kernel)
+API_NAMES = ['get_owners', 'get_number_of_troops', 'get_state', 'get_turn_number', 'get_adj', 'next_state',
+             'put_one_troop', 'put_troop', 'get_player_id', 'attack', 'move_troop', 'get_strategic_nodes',
+             'get_number_of_troops_to_put', 'get_reachable', 'get_number_of_fort_troops', 'fort', 'get_changes',
+             'get_board_array', 'printer']
+
+
+class Profiler:
+    """
+        times the turns of the bot: each phase of a turn and each helper that is decorated with timed
+        the time of each part is split into the network time (waiting for the API calls of the game) and the local compute time
+        the turns are run in different threads by the client, so the running turn is kept for each thread
+        when it's disabled the decorators return the functions themselves, so there is no cost
+    """
+    def __init__(self, enabled=False, use_cprofile=False, budgets=None, path='profile') -> None:
+        self.enabled = enabled
+        self.use_cprofile = use_cprofile # run cProfile in each turn, the stats of each turn are saved in the profile folder
+        self.budgets = budgets if budgets is not None else {} # kind of the turn: the time limit of the kernel (in seconds)
+        self.path = path
+        self.start_time = datetime.datetime.now().strftime("%Y-%m-%d-%H-%M-%S")
+        self.player_id = None # the answer of get_player_id, the players of the faster kernel run in the same process
+        self.turns = [] # the record of each finished turn
+        self.local = threading.local() # the record of the running turn of the thread
+        self.stats = None # the cProfile stats of all the turns
+        self.instrumented = set() # the ids of the games that their API calls are timed
+        # the report is saved when the bot exits (the client also saves it before it's killed by the server)
+        if enabled:
+            atexit.register(self.save)
+
+    def turn(self, kind):
+        """
+            a decorator for the functions that play a turn (initializer and turn)
+            kind is the name of the turn in the report and the key of its budget
+        """
+        def decorator(func):
+            if not self.enabled:
+                return func
+
+            @functools.wraps(func)
+            def wrapper(game, *args, **kwargs):
+                self.instrument(game)
+                record = {'kind': kind, 'turn_number': None, 'start': time.time(), 'total': 0.0, 'network': 0.0,
+                          'phases': {}, 'helpers': {}, 'error': None}
+                self.local.record = record
+                self.local.phase = None
+                # the time before the first phase of the turn (reading the board)
+                self.phase('setup')
+                profile = cProfile.Profile() if self.use_cprofile else None
+                start = time.perf_counter()
+                if profile is not None:
+                    profile.enable()
+                try:
+                    return func(game, *args, **kwargs)
+                except Exception as error:
+                    record['error'] = repr(error)
+                    raise
+                finally:
+                    if profile is not None:
+                        profile.disable()
+                    self.phase(None)
+                    record['total'] = time.perf_counter() - start
+                    self.local.record = None
+                    self.turns.append(record)
+                    if profile is not None:
+                        self.save_profile(record, profile)
+            return wrapper
+        return decorator
+
+    def instrument(self, game):
+        # wrap the API methods of the game once to add their time to the network time of the running turn
+        if id(game) in self.instrumented:
+            return
+        self.instrumented.add(id(game))
+        for name in API_NAMES:
+            if hasattr(game, name):
+                setattr(game, name, self.timed_api(name, getattr(game, name)))
+
+    def timed_api(self, name, method):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                output = method(*args, **kwargs)
+            finally:
+                record = getattr(self.local, 'record', None)
+                if record is not None:
+                    record['network'] += time.perf_counter() - start
+            # the turn number of the record is the answer of the bot's first get_turn_number
+            if name == 'get_turn_number' and record is not None and record['turn_number'] is None and isinstance(output, dict):
+                record['turn_number'] = output.get('turn_number')
+            elif name == 'get_player_id' and record is not None and isinstance(output, dict):
+                self.player_id = output.get('player_id')
+            return output
+        return wrapper
+
+    def phase(self, name):
+        """
+            start a phase of the running turn (the previous phase ends), None ends the last phase
+        """
+        record = getattr(self.local, 'record', None)
+        if record is None:
+            return
+        now = time.perf_counter()
+        if self.local.phase is not None:
+            phase_name, start, network = self.local.phase
+            add_time(record['phases'], phase_name, now - start, record['network'] - network)
+        self.local.phase = (name, now, record['network']) if name is not None else None
+
+    def timed(self, func):
+        """
+            a decorator for the helpers of the turns, their time is added to the helpers of the running turn
+        """
+        if not self.enabled:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            record = getattr(self.local, 'record', None)
+            if record is None:
+                return func(*args, **kwargs)
+            start, network = time.perf_counter(), record['network']
+            try:
+                return func(*args, **kwargs)
+            finally:
+                add_time(record['helpers'], func.__name__, time.perf_counter() - start, record['network'] - network)
+        return wrapper
+
+    def name(self):
+        # the name of the files of the match
+        return self.start_time + (f'-player{self.player_id}' if self.player_id is not None else '')
+
+    def save_profile(self, record, profile):
+        # save the cProfile stats of the turn and add them to the stats of the match
+        folder = os.path.join(self.path, self.name())
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+        profile.dump_stats(os.path.join(folder, f"{record['kind']}{len(self.turns)}.prof"))
+        if self.stats is None:
+            self.stats = pstats.Stats(profile)
+        else:
+            self.stats.add(profile)
+
+    def report(self, slowest=10, functions=20):
+        """
+            returns the report of the match as text
+            the time of each kind of turn, phase and helper, the slowest turns and the turns that passed their budget
+        """
+        lines = [f"profile of {len(self.turns)} turns"]
+        header = f"{'':28}{'calls':>7}{'total s':>10}{'mean ms':>10}{'max ms':>10}{'network ms':>12}{'compute ms':>12}"
+
+        kinds = {}
+        for record in self.turns:
+            add_time(kinds, record['kind'], record['total'], record['network'])
+        lines += ['', 'turns', header] + [format_row(kind, *kinds[kind]) for kind in kinds]
+        for kind in kinds:
+            if kind in self.budgets:
+                over = [record for record in self.turns if record['kind'] == kind and record['total'] > self.budgets[kind]]
+                lines.append(f"{kind}: {len(over)} turns over the budget of {self.budgets[kind] * 1e3:.0f} ms")
+
+        for part in ['phases', 'helpers']:
+            totals = {}
+            for record in self.turns:
+                for name, (calls, total, maximum, network) in record[part].items():
+                    row = totals.setdefault(name, [0, 0.0, 0.0, 0.0])
+                    row[0] += calls
+                    row[1] += total
+                    row[2] = max(row[2], maximum)
+                    row[3] += network
+            lines += ['', part, header] + [format_row(name, *row) for name, row in totals.items()]
+
+        lines += ['', f'the {slowest} slowest turns']
+        for record in sorted(self.turns, key=lambda record: record['total'], reverse=True)[:slowest]:
+            phases = '  '.join(f"{name}: {row[1] * 1e3:.1f}" for name, row in record['phases'].items())
+            lines.append(f"{record['kind']} {record['turn_number']}: {record['total'] * 1e3:.1f} ms "
+                         f"(network {record['network'] * 1e3:.1f} ms)  {phases}" + (f"  error: {record['error']}" if record['error'] else ''))
+
+        if self.stats is not None:
+            stream = io.StringIO()
+            self.stats.stream = stream
+            self.stats.sort_stats('cumulative').print_stats(functions)
+            lines += ['', 'cProfile of all the turns', stream.getvalue()]
+        return '\n'.join(lines) + '\n'
+
+    def save(self):
+        """
+            saves the report (<time>-player<id>.txt) and the records of the turns (<time>-player<id>.json) in the profile folder
+        """
+        if not self.enabled or not self.turns:
+            return
+        if not os.path.exists(self.path):
+            os.makedirs(self.path)
+        with open(os.path.join(self.path, self.name() + '.txt'), 'w') as report_file:
+            report_file.write(self.report())
+        with open(os.path.join(self.path, self.name() + '.json'), 'w') as records_file:
+            json.dump(self.turns, records_file)
+
+
+def add_time(times, name, total, network):
+    # times is name: [calls, total time, maximum time, network time]
+    row = times.get(name)
+    if row is None:
+        row = times[name] = [0, 0.0, 0.0, 0.0]
+    row[0] += 1
+    row[1] += total
+    row[2] = max(row[2], total)
+    row[3] += network
+
+def format_row(name, calls, total, maximum, network):
+    return (f"{name:28}{calls:7}{total:10.3f}{total / calls * 1e3:10.2f}{maximum * 1e3:10.2f}"
+            f"{network / calls * 1e3:12.2f}{(total - network) / calls * 1e3:12.2f}")
@@ -0,0 +1,252 @@
+import random
+
+
+class Rules:
+    """
+        a local copy of the validation and the state changes of the kernel (the APIs of the web kernel)
+        the bot checks its actions with it before sending them, so the actions that the kernel rejects don't cost a request
+        each check_<api> returns the error of the kernel for the action or None if the kernel accepts it
+        and each <api> applies the action like the kernel (after checking it)
+        keep it in sync with the kernel: Kernel-web-server-version/benchmarks/check_rules.py runs the same actions in both
+    """
+    def __init__(self, player_id, owners, troops, fort_troops, adjacents, state=1, game_state=2, number_of_troops_to_put=0,
+                 move_troop_done=False, use_fort=False, has_won_troop=False, fort_coef=2, troops_after_attack=3) -> None:
+        self.player_id = player_id
+        self.owners = dict(owners) # node_id: owner_id (-1: no owner)
+        self.troops = dict(troops) # node_id: number_of_troops
+        self.fort_troops = dict(fort_troops) # node_id: number_of_fort_troops
+        self.adjacents = adjacents # node_id: [node_id, ...] in the order of the map
+        self.state = state # 1: put troop, 2: attack, 3: move troop, 4: fort, 5: the turn is finished
+        self.game_state = game_state # 1: initialize, 2: turns
+        self.number_of_troops_to_put = number_of_troops_to_put
+        self.move_troop_done = move_troop_done
+        self.use_fort = use_fort # the fortification ability can be used once in the game
+        self.has_won_troop = has_won_troop # the troops of a successful attack are given once in each turn
+        self.fort_coef = fort_coef # fort_coef and number_of_troops_after_successful_attack of the kernel config
+        self.troops_after_attack = troops_after_attack
+
+    def check_put_one_troop(self, node_id):
+        if self.state != 1:
+            return 'You can not put more than one troop in a turn'
+        if self.game_state != 1:
+            return 'The game is not in the initial troop putting state'
+        if self.number_of_troops_to_put <= 0:
+            return 'You have no more initial troops to put'
+        if node_id not in self.owners:
+            return 'node_id is not valid'
+        if self.owners[node_id] not in [-1, self.player_id]:
+            return 'This node is already owned by another player'
+        return None
+
+    def put_one_troop(self, node_id):
+        error = self.check_put_one_troop(node_id)
+        if error is not None:
+            return {'error': error}
+        self.owners[node_id] = self.player_id
+        self.troops[node_id] += 1
+        self.number_of_troops_to_put -= 1
+        # the kernel doesn't let the player do anything else in the turn
+        self.state = 6
+        return {'message': 'troop added successfully'}
+
+    def check_put_troop(self, node_id, number_of_troops):
+        if self.game_state != 2:
+            return 'The game is not in the turn state'
+        if self.state != 1:
+            return 'The game is not in the troop putting state'
+        if node_id not in self.owners:
+            return 'node_id is not valid'
+        if self.number_of_troops_to_put < number_of_troops:
+            return 'You do not have enough troops to place'
+        if self.owners[node_id] not in [-1, self.player_id]:
+            return 'This node is already owned by another player'
+        if number_of_troops <= 0:
+            return 'number_of_troops should be positive'
+        return None
+
+    def put_troop(self, node_id, number_of_troops):
+        error = self.check_put_troop(node_id, number_of_troops)
+        if error is not None:
+            # the kernel takes an empty node before it checks the number of troops
+            if error == 'number_of_troops should be positive' and self.owners[node_id] == -1:
+                self.owners[node_id] = self.player_id
+            return {'error': error}
+        self.owners[node_id] = self.player_id
+        self.troops[node_id] += number_of_troops
+        self.number_of_troops_to_put -= number_of_troops
+        return {'message': 'troop added successfully'}
+
+    def check_attack(self, attacking_id, target_id, fraction, move_fraction):
+        if self.game_state != 2:
+            return 'The game is not in the turn state'
+        if self.state != 2:
+            return 'The game is not in the attack state'
+        if attacking_id not in self.owners:
+            return 'attacking_id is not valid'
+        if self.owners[attacking_id] == -1:
+            return 'attacking_id does not have any owner'
+        if self.owners[attacking_id] != self.player_id:
+            return 'attacking_id is not owned by the player'
+        if target_id not in self.owners:
+            return 'target_id is not valid'
+        if self.owners[target_id] == -1:
+            return 'target_id does not have any owner'
+        if self.owners[target_id] == self.player_id:
+            return 'target_id is owned by the player'
+        if move_fraction <= 0 or move_fraction >= 1:
+            return 'move_fraction should be between 0 and 1'
+        if self.troops[attacking_id] < 2:
+            return 'attacking node does not have enough troops'
+        if fraction < 0:
+            return 'fraction should be positive'
+        if attacking_id not in self.adjacents[target_id]:
+            return 'attacking_id and target_id are not connected'
+        return None
+
+    def attack(self, attacking_id, target_id, fraction, move_fraction, rng=random):
+        """
+            rolls the dice like the kernel, the result is the same as the kernel if rng is in the same state as the random module of the kernel
+        """
+        error = self.check_attack(attacking_id, target_id, fraction, move_fraction)
+        if error is not None:
+            return {'error': error}
+
+        attacker_troops = self.troops[attacking_id]
+        normal_troops = self.troops[target_id]
+        fort_troops = self.fort_troops[target_id]
+        target_troops = normal_troops + fort_troops
+        while attacker_troops > 1 and target_troops > 0 and attacker_troops / target_troops > fraction:
+            attacker_dice = 3 if attacker_troops > 3 else attacker_troops - 1
+            target_dice = 2 if target_troops >= 2 else target_troops
+            attacker_dice_list = sorted([rng.randint(1, 6) for _ in range(attacker_dice)], reverse=True)
+            target_dice_list = sorted([rng.randint(1, 6) for _ in range(target_dice)], reverse=True)
+            for i in range(min(attacker_dice, target_dice)):
+                if attacker_dice_list[i] > target_dice_list[i]:
+                    target_troops -= 1
+                else:
+                    attacker_troops -= 1
+
+        if target_troops <= 0:
+            move_troops = max(int(attacker_troops * move_fraction), 1)
+            while attacker_troops - move_troops < 1:
+                move_troops -= 1
+            self.troops[attacking_id] = attacker_troops - move_troops
+            self.troops[target_id] = move_troops
+            self.fort_troops[target_id] = 0
+            self.owners[target_id] = self.player_id
+            if not self.has_won_troop:
+                self.number_of_troops_to_put += self.troops_after_attack
+                self.has_won_troop = True
+            return {'message': 'attack successful', 'won': 1}
+
+        if fort_troops > 0:
+            if target_troops <= normal_troops:
+                self.fort_troops[target_id] = 0
+                self.troops[target_id] = target_troops
+            else:
+                self.fort_troops[target_id] = target_troops - normal_troops
+        else:
+            self.troops[target_id] = target_troops
+        self.troops[attacking_id] = attacker_troops
+        return {'message': 'attack successful', 'won': 0}
+
+    def find_path(self, source, destination):
+        """
+            returns the path from source to destination through the nodes of the player (the same path as the kernel) or None
+            the kernel finds it with a recursive DFS, this is the same DFS with a stack
+        """
+        mark = {source}
+        path = [source]
+        stack = [iter(self.adjacents[source])]
+        if source == destination:
+            return path
+        while stack:
+            for node_id in stack[-1]:
+                if node_id not in mark and self.owners[node_id] == self.player_id:
+                    mark.add(node_id)
+                    path.append(node_id)
+                    if node_id == destination:
+                        return path
+                    stack.append(iter(self.adjacents[node_id]))
+                    break
+            else:
+                stack.pop()
+                path.pop()
+        return None
+
+    def check_move_troop(self, source, destination, troop_count):
+        if self.move_troop_done:
+            return 'move troop already happened in the current turn'
+        if self.game_state != 2:
+            return 'The game is not in the turn state'
+        if self.state != 3:
+            return 'The game is not in the move troop state'
+        if source not in self.owners:
+            return 'source is not valid'
+        if self.owners[source] == -1:
+            return 'source does not have any owner'
+        if self.owners[source] != self.player_id:
+            return 'source is not owned by the player'
+        if destination not in self.owners:
+            return 'destination is not valid'
+        if self.owners[destination] == -1:
+            return 'destination does not have any owner'
+        if self.owners[destination] != self.player_id:
+            return 'destination is not owned by the player'
+        if self.troops[source] <= troop_count:
+            return 'source node does not have enough troops'
+        if self.find_path(source, destination) is None:
+            return 'there is no path between source and destination'
+        if troop_count <= 0:
+            return 'troop_count should be positive'
+        if source == destination:
+            return 'source and destination should be different'
+        return None
+
+    def move_troop(self, source, destination, troop_count):
+        error = self.check_move_troop(source, destination, troop_count)
+        if error is not None:
+            return {'error': error}
+        self.troops[source] -= troop_count
+        self.troops[destination] += troop_count
+        self.move_troop_done = True
+        return {'message': 'troops moved successfully'}
+
+    def check_fort(self, node_id, troop_count):
+        if self.game_state != 2:
+            return 'The game is not in the turn state'
+        if self.state != 4:
+            return 'The game is not in the fort state'
+        if node_id not in self.owners:
+            return 'node_id is not valid'
+        if self.owners[node_id] == -1:
+            return 'This node has no owner'
+        if self.owners[node_id] != self.player_id:
+            return 'This node is already owned by another player'
+        if troop_count >= self.troops[node_id]:
+            return 'there is not enough troops in the node'
+        if self.use_fort:
+            return 'you have already used the fortification ability in the game'
+        return None
+
+    def fort(self, node_id, troop_count):
+        error = self.check_fort(node_id, troop_count)
+        if error is not None:
+            return {'error': error}
+        self.use_fort = True
+        self.troops[node_id] -= troop_count
+        self.fort_troops[node_id] += self.fort_coef * troop_count
+        return {'success': 'the fortification ability is applied successfully'}
+
+    def check_next_state(self):
+        if self.game_state == 2 and self.state >= 5:
+            return 'you already finished the turn'
+        return None
+
+    def next_state(self):
+        error = self.check_next_state()
+        if error is not None:
+            return {'error': error}
+        # in the initialize phase the kernel just ends the turn
+        self.state = self.state + 1 if self.game_state == 2 else 5
+        return {'game_state': self.state, 'message': 'success'}
@@ -0,0 +1,233 @@
+import itertools
+import random
+
+
+def get_round_outcomes():
+    """
+        the outcomes of one round of dice for each number of dice: (attacker dice, target dice): [(attacker loss, target loss, probability)]
+        the dice are compared like the kernel: sorted from high to low and the target wins the ties
+    """
+    outcomes = {}
+    for attacker_dice in range(1, 4):
+        for target_dice in range(1, 3):
+            counts = {}
+            rolls = list(itertools.product(range(1, 7), repeat=attacker_dice + target_dice))
+            for roll in rolls:
+                attacker_list = sorted(roll[:attacker_dice], reverse=True)
+                target_list = sorted(roll[attacker_dice:], reverse=True)
+                target_loss = sum(attacker_list[i] > target_list[i] for i in range(min(attacker_dice, target_dice)))
+                loss = (min(attacker_dice, target_dice) - target_loss, target_loss)
+                counts[loss] = counts.get(loss, 0) + 1
+            outcomes[(attacker_dice, target_dice)] = [(a, t, count / len(rolls)) for (a, t), count in counts.items()]
+    return outcomes
+
+ROUND_OUTCOMES = get_round_outcomes()
+BATTLES = {}  # (attacker troops, target troops, fraction): the outcomes of the battle, see battle_outcomes
+
+
+def is_fighting(attacker_troops, target_troops, fraction):
+    # the condition of the loop of the attack in the kernel
+    return attacker_troops > 1 and target_troops > 0 and attacker_troops / target_troops > fraction
+
+def battle_outcomes(attacker_troops, target_troops, fraction):
+    """
+        returns the probability of each end of the battle: {(attacker troops, target troops): probability}
+        the states are visited from the most troops to the least (each round removes one or two troops), so each state is finished
+        before the states it leads to, the results are cached because the same battles are planned many times in a turn
+    """
+    key = (attacker_troops, target_troops, fraction)
+    if key in BATTLES:
+        return BATTLES[key]
+
+    ends = {}
+    states = {(attacker_troops, target_troops): 1.0}
+    for total in range(attacker_troops + target_troops, -1, -1):
+        for a in range(max(total - target_troops, 0), min(total, attacker_troops) + 1):
+            probability = states.pop((a, total - a), None)
+            if probability is None:
+                continue
+            t = total - a
+            if not is_fighting(a, t, fraction):
+                ends[(a, t)] = ends.get((a, t), 0.0) + probability
+                continue
+            attacker_dice = 3 if a > 3 else a - 1
+            target_dice = 2 if t >= 2 else t
+            for attacker_loss, target_loss, p in ROUND_OUTCOMES[(attacker_dice, target_dice)]:
+                state = (a - attacker_loss, t - target_loss)
+                states[state] = states.get(state, 0.0) + probability * p
+
+    BATTLES[key] = ends
+    return ends
+
+def win_probability(attacker_troops, target_troops, fraction=0):
+    return sum(p for (a, t), p in battle_outcomes(attacker_troops, target_troops, fraction).items() if t <= 0)
+
+def roll_battle(attacker_troops, target_troops, fraction, rng=random):
+    """ Roll the dice of the battle like the kernel and return the troops of both sides at the end """
+
+    while is_fighting(attacker_troops, target_troops, fraction):
+        attacker_dice = 3 if attacker_troops > 3 else attacker_troops - 1
+        target_dice = 2 if target_troops >= 2 else target_troops
+        attacker_dice_list = sorted([rng.randint(1, 6) for _ in range(attacker_dice)], reverse=True)
+        target_dice_list = sorted([rng.randint(1, 6) for _ in range(target_dice)], reverse=True)
+        for i in range(min(attacker_dice, target_dice)):
+            if attacker_dice_list[i] > target_dice_list[i]:
+                target_troops -= 1
+            else:
+                attacker_troops -= 1
+    return attacker_troops, target_troops
+
+
+class Simulator:
+    """
+        a copy of the game state in flat lists (indexed by node id) to play hypothetical actions with the rules of the kernel
+        the actions don't check the rules (check them with src.rules.Rules), they are applied like the kernel applies them
+        each change is saved in the journal, so a line of actions is undone by undo(mark) without copying the state,
+        clone() copies the lists for the searches that keep several states
+    """
+    def __init__(self, owners, troops, fort_troops, adjacents, strategic_scores, player_id, turn_number=0, number_of_players=3,
+                 troops_to_put=None, use_fort=None, fort_coef=2, troops_after_attack=3, minimum_troops_per_turn=3) -> None:
+        size = max(owners) + 1
+        self.owners = [-1] * size  # node_id: owner_id (-1: no owner)
+        self.troops = [0] * size
+        self.fort_troops = [0] * size
+        for node_id in owners:
+            self.owners[node_id] = owners[node_id]
+            self.troops[node_id] = troops[node_id]
+            self.fort_troops[node_id] = fort_troops[node_id]
+        self.adjacents = [list(adjacents.get(node_id, [])) for node_id in range(size)]
+        self.scores = [strategic_scores.get(node_id, 0) for node_id in range(size)]  # the score of the strategic nodes, 0 for the others
+        self.player_id = player_id  # the player of the current turn
+        self.turn_number = turn_number
+        self.number_of_players = number_of_players
+        # the troops to put and the fortification ability of each player
+        self.troops_to_put = list(troops_to_put) if troops_to_put is not None else [0] * number_of_players
+        self.use_fort = list(use_fort) if use_fort is not None else [False] * number_of_players
+        self.has_won_troop = False
+        self.move_troop_done = False
+        self.fort_coef = fort_coef  # fort_coef, number_of_troops_after_successful_attack and minimum_troops_per_turn of the kernel config
+        self.troops_after_attack = troops_after_attack
+        self.minimum_troops_per_turn = minimum_troops_per_turn
+        self.journal = []  # (list or None for the attributes, index or name, old value) of each change
+
+    def clone(self):
+        simulator = Simulator.__new__(Simulator)
+        simulator.__dict__.update(self.__dict__)
+        for name in ['owners', 'troops', 'fort_troops', 'troops_to_put', 'use_fort']:
+            setattr(simulator, name, getattr(self, name)[:])
+        simulator.journal = []
+        return simulator
+
+    def mark(self):
+        """ Return the point of the journal that undo returns to """
+        return len(self.journal)
+
+    def undo(self, mark=0):
+        journal = self.journal
+        while len(journal) > mark:
+            values, key, value = journal.pop()
+            if values is None:
+                setattr(self, key, value)
+            else:
+                values[key] = value
+
+    def set(self, values, index, value):
+        self.journal.append((values, index, values[index]))
+        values[index] = value
+
+    def set_attribute(self, name, value):
+        self.journal.append((None, name, getattr(self, name)))
+        setattr(self, name, value)
+
+    def apply_put(self, node_id, number_of_troops):
+        self.set(self.owners, node_id, self.player_id)
+        self.set(self.troops, node_id, self.troops[node_id] + number_of_troops)
+        self.set(self.troops_to_put, self.player_id, self.troops_to_put[self.player_id] - number_of_troops)
+
+    def apply_attack(self, attacking_id, target_id, fraction, move_fraction, rng=None):
+        """
+            plays the attack with the dice of rng (like the kernel), or with the most likely result if rng is None:
+            the attack is won if it's won with a probability of at least 0.5 and the troops are the expected troops of that result
+            returns the probability of winning the attack
+        """
+        attacker_troops = self.troops[attacking_id]
+        normal_troops = self.troops[target_id]
+        fort_troops = self.fort_troops[target_id]
+        outcomes = battle_outcomes(attacker_troops, normal_troops + fort_troops, fraction)
+        probability = sum(p for (a, t), p in outcomes.items() if t <= 0)
+
+        if rng is not None:
+            attacker_troops, target_troops = roll_battle(attacker_troops, normal_troops + fort_troops, fraction, rng)
+        else:
+            won = probability >= 0.5
+            results = [(a, t, p) for (a, t), p in outcomes.items() if (t <= 0) == won]
+            total = sum(p for a, t, p in results)
+            attacker_troops = max(round(sum(a * p for a, t, p in results) / total), 1)
+            target_troops = 0 if won else max(round(sum(t * p for a, t, p in results) / total), 1)
+
+        if target_troops <= 0:
+            move_troops = max(int(attacker_troops * move_fraction), 1)
+            while attacker_troops - move_troops < 1:
+                move_troops -= 1
+            self.set(self.troops, attacking_id, attacker_troops - move_troops)
+            self.set(self.troops, target_id, move_troops)
+            self.set(self.fort_troops, target_id, 0)
+            self.set(self.owners, target_id, self.player_id)
+            if not self.has_won_troop:
+                self.set(self.troops_to_put, self.player_id, self.troops_to_put[self.player_id] + self.troops_after_attack)
+                self.set_attribute('has_won_troop', True)
+            return probability
+
+        # the fort troops are lost first
+        if fort_troops > 0:
+            if target_troops <= normal_troops:
+                self.set(self.fort_troops, target_id, 0)
+                self.set(self.troops, target_id, target_troops)
+            else:
+                self.set(self.fort_troops, target_id, target_troops - normal_troops)
+        else:
+            self.set(self.troops, target_id, target_troops)
+        self.set(self.troops, attacking_id, attacker_troops)
+        return probability
+
+    def apply_move(self, source, destination, troop_count):
+        self.set(self.troops, source, self.troops[source] - troop_count)
+        self.set(self.troops, destination, self.troops[destination] + troop_count)
+        self.set_attribute('move_troop_done', True)
+
+    def apply_fort(self, node_id, troop_count):
+        self.set(self.use_fort, self.player_id, True)
+        self.set(self.troops, node_id, self.troops[node_id] - troop_count)
+        self.set(self.fort_troops, node_id, self.fort_troops[node_id] + self.fort_coef * troop_count)
+
+    def calculate_number_of_troops(self, player_id):
+        # the troops that the player gets at the beginning of its turns (calculate_number_of_troops of the kernel)
+        number_of_nodes = 0
+        score_of_strategic_nodes = 0
+        for owner, score in zip(self.owners, self.scores):
+            if owner == player_id:
+                number_of_nodes += 1
+                score_of_strategic_nodes += score
+        return max(number_of_nodes // 4 + score_of_strategic_nodes, self.minimum_troops_per_turn)
+
+    def end_turn(self):
+        """ Start the turn of the next player like start_turn of the kernel, it gets its troops to put """
+
+        self.set_attribute('turn_number', self.turn_number + 1)
+        self.set_attribute('player_id', self.turn_number % self.number_of_players)
+        self.set_attribute('has_won_troop', False)
+        self.set_attribute('move_troop_done', False)
+        self.set(self.troops_to_put, self.player_id, self.troops_to_put[self.player_id] + self.calculate_number_of_troops(self.player_id))
+
+    def calculate_score(self):
+        """ Return the score of each player like calculate_score of check_finish and the number of their strategic nodes """
+
+        scores = [0] * self.number_of_players
+        strategic_nodes = [0] * self.number_of_players
+        for owner, count, score in zip(self.owners, self.troops, self.scores):
+            if owner >= 0:
+                scores[owner] += 1000 + count
+                if score:
+                    scores[owner] += 3000 // score
+                    strategic_nodes[owner] += 1
+        return scores, strategic_nodes
@@ -0,0 +1,81 @@
+import numpy as np
+from src.simulator import ROUND_OUTCOMES
+
+
+WIN_TABLE = np.zeros((0, 0))  # the table of win_table, it grows when a larger table is needed
+
+
+def win_table(size):
+    """
+        returns the table of the probability that a attacker troops capture a node with d troops (fraction 0): table[a, d] for a, d < size
+        each entry is found from the entries of the states after one round of dice (one or two troops less),
+        the entries with less than 3 attacker dice or 2 target dice (a <= 3 or d == 1) are filled first in python, they only need each other,
+        the rest all roll 3 against 2 dice, so they are filled one anti-diagonal (a + d) at a time with numpy
+    """
+    global WIN_TABLE
+    if len(WIN_TABLE) >= size:
+        return WIN_TABLE
+    size = max(size, 2 * len(WIN_TABLE))
+    table = np.zeros((size, size))
+    table[2:, 0] = 1.0
+
+    def fill(a, d):
+        table[a, d] = sum(p * table[a - attacker_loss, d - target_loss]
+                          for attacker_loss, target_loss, p in ROUND_OUTCOMES[(min(a - 1, 3), min(d, 2))])
+
+    for a in range(2, size):
+        fill(a, 1)
+    for d in range(2, size):
+        for a in range(2, min(size, 4)):
+            fill(a, d)
+    outcomes = ROUND_OUTCOMES[(3, 2)]
+    for k in range(6, 2 * size - 1):
+        a = np.arange(max(4, k - size + 1), min(size, k - 1))
+        d = k - a
+        table[a, d] = sum(p * table[a - attacker_loss, d - target_loss] for attacker_loss, target_loss, p in outcomes)
+    WIN_TABLE = table
+    return table
+
+
+class ThreatMap:
+    """
+        the threat of the enemies on the nodes for their next turns, computed for all the nodes at once with numpy
+        the strength of an enemy on a node is its strongest stack next to the node with the troops it gets at the beginning of its turn
+        (calculate_number_of_troops), because it can put all of them on that stack before it attacks
+        the capture probability of a node is the probability that at least one of the enemies captures it (the attacks are independent),
+        weights is the probability of each enemy to attack the player (src/opponents.py), the enemies always attack if it's None
+    """
+    def __init__(self, owners, troops, fort_troops, edges, player_id, reinforcements, weights=None) -> None:
+        self.owners = np.asarray(owners)
+        troops = np.asarray(troops)
+        self.defense = troops + np.asarray(fort_troops)  # the troops that an attacker should beat
+        self.player_id = player_id
+        players = np.arange(len(reinforcements))
+        # the stacks of each enemy (the fort troops don't attack): players x nodes
+        stacks = np.where(self.owners[None, :] == players[:, None], troops[None, :] + np.asarray(reinforcements)[:, None], 0)
+        stacks[player_id] = 0
+        # the strongest stack of each enemy next to each node: players x nodes, over the edges (see get_edges)
+        sources, targets = edges
+        self.strengths = np.zeros_like(stacks)
+        np.maximum.at(self.strengths.T, targets, stacks[:, sources].T)
+        self.weights = np.ones(len(reinforcements)) if weights is None else np.asarray(weights)
+
+    def capture_probability(self, defense=None):
+        """ The probability of each node to be captured in the next turns of the enemies, defense is the troops of the nodes (the current troops by default) """
+
+        defense = self.defense if defense is None else np.asarray(defense)
+        table = win_table(max(self.strengths.max(), defense.max()) + 1)
+        return 1 - np.prod(1 - table[self.strengths, defense[None, :]] * self.weights[:, None], axis=0)
+
+    def expected_loss(self, values, defense=None):
+        """ The expected value that the player loses in the next turns of the enemies, values is the value of each node """
+
+        mine = self.owners == self.player_id
+        return float((self.capture_probability(defense) * np.asarray(values))[mine].sum())
+
+
+def get_edges(adjacents):
+    # the edges of the adjacents dict (node_id: [node_id, ...]) as two arrays: the neighbor (source) and the node (target) of each edge
+    sources = np.fromiter((neighbor for neighbors in adjacents.values() for neighbor in neighbors), dtype=np.int64)
+    targets = np.repeat(np.fromiter(adjacents.keys(), dtype=np.int64), [len(neighbors) for neighbors in adjacents.values()])
+    return sources, targets